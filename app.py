@@ -1,158 +1,352 @@
 # app.py
-from flask import Flask, render_template, request, redirect, url_for, jsonify
-from daily_planner.constants import TODAY_FILE, FOOD_DB_FILE
+from flask import (
+    Flask, Response, g, render_template, request, redirect, url_for, jsonify
+)
+from daily_planner import metrics
+from daily_planner.clock import today
+from daily_planner.core.analytics import compute_stats
+from daily_planner.core.changes import get_change_feed
+from daily_planner.core.food import food_record, resolve_food
+from daily_planner.core.food_index import get_food_index
+from daily_planner.core.nutrient_index import (
+    get_nutrient_index, resolve_metric
+)
+from daily_planner.core.profile import day_summary
+from daily_planner.core.routine import ensure_day
+from daily_planner.core.scheduler import start_preinit
+from daily_planner.core.suggest import suggest_for_day
+from daily_planner.storage import get_storage, OpError, VersionConflict
 import json
-import os
-from subprocess import run
-from datetime import datetime
-import pytz
-TAIWAN_TZ = pytz.timezone('Asia/Taipei')
+import math
+import queue
+import time
 
 app = Flask(__name__)
 
-DATA_DIR = "./"  # Adjust path if needed
+storage = get_storage()
 
 
-def load_json(filename):
-    with open(os.path.join(DATA_DIR, filename), 'r', encoding='utf-8') as f:
-        return json.load(f)
+@app.before_request
+def start_timer():
+    g.started = time.perf_counter()
 
 
-def save_json(filename, data):
-    with open(os.path.join(DATA_DIR, filename), 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+@app.after_request
+def record_metrics(resp):
+    """
+    Record the request's latency per route and the response size.
+    Args:
+        resp (Response): Outgoing response.
+    Returns:
+        Response: The same response.
+    """
+    started = g.pop("started", None)
+    if started is not None:
+        rule = request.url_rule.rule if request.url_rule else "unmatched"
+        metrics.observe("planner_http_request_duration_seconds",
+                        time.perf_counter() - started, route=rule,
+                        method=request.method)
+    if not resp.is_streamed:
+        metrics.inc("planner_http_response_bytes_total",
+                    resp.content_length or 0)
+    return resp
+
+
+def find_key(mapping, name):
+    """
+    Find the key of a mapping matching name, trying case variants.
+    Args:
+        mapping (dict): Mapping to search.
+        name (str): Requested key.
+    Returns:
+        str: The existing key, or name unchanged if none matches.
+    """
+    for key in (name, name.capitalize(), name.lower()):
+        if key in mapping:
+            return key
+    return name
+
+
+def parse_weight(value):
+    """
+    Parse a food weight sent by a client.
+    Args:
+        value (str or float): Weight in grams.
+    Returns:
+        float: The weight.
+    Raises:
+        ValueError: If it is not a finite number above zero.
+    """
+    try:
+        weight = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid weight: {value!r}") from None
+    if not (math.isfinite(weight) and weight > 0):
+        raise ValueError(f"Invalid weight: {value!r}")
+    return weight
+
+
+def batch_ops(ops):
+    """
+    Check the ops of a /batch request and rebuild its food entries.
+    An add_food op only needs the food's name and weight; the entry is
+    built from the food database like /add_food does, so nutrient
+    values are never taken from the client.
+    Args:
+        ops (list): Op records from the request.
+    Returns:
+        list: Ops ready for storage.apply().
+    Raises:
+        ValueError: If ops is not a list of objects, or an add_food op
+            has an unknown food or an invalid weight.
+    """
+    if not isinstance(ops, list) or not all(
+            isinstance(op, dict) for op in ops):
+        raise ValueError("ops must be a list of objects")
+    food_index = None
+    result = []
+    for i, op in enumerate(ops):
+        if op.get("op") == "add_food":
+            item = op.get("item")
+            if not isinstance(item, dict):
+                raise ValueError(f"op {i}: item must be an object")
+            name = str(item.get("name", ""))
+            food_index = food_index or get_food_index()
+            food_key = resolve_food(name, food_index)
+            if food_key is None:
+                raise ValueError(
+                    f"op {i}: '{name}' not found in food database")
+            try:
+                weight = parse_weight(item.get("weight"))
+            except ValueError as e:
+                raise ValueError(f"op {i}: {e}") from None
+            op = dict(op, item=food_record(food_key, weight, food_index))
+        result.append(op)
+    return result
+
+
+def with_etag(resp, date):
+    """
+    Attach a day's ETag and caching policy to a response.
+    Any day can still be edited (past days through the date field of
+    /update_task, /remove_food, /batch...), so clients and proxies must
+    revalidate every time; unchanged days cost only a 304.
+    Args:
+        resp (Response): Response to update.
+        date (str): Date in 'YYYY-MM-DD' format.
+    Returns:
+        Response: The same response.
+    """
+    resp.set_etag(storage.day_etag(date))
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp
+
+
+def day_response(date):
+    """
+    Serve a day document, answering 304 if the client copy is current.
+    Args:
+        date (str): Date in 'YYYY-MM-DD' format.
+    Returns:
+        Response: 304 Not Modified or the JSON day document.
+    """
+    etag = storage.day_etag(date)
+    if request.if_none_match.contains(etag):
+        return with_etag(Response(status=304), date)
+    return with_etag(jsonify(storage.load_day(date)), date)
 
 
 @app.route("/")
 def home():
-    day_file = TODAY_FILE
-    data = load_json(day_file)
+    data = storage.load_day(today())
     return render_template("index.html", data=data)
 
 
 @app.route("/search_food")
 def search_food():
-    query = request.args.get("q", "").lower()
-    if not query:
+    query = request.args.get("q", "")
+    if not query.strip():
         return jsonify({"foods": []})
-    
+
     try:
-        food_db = load_json(FOOD_DB_FILE)
+        food_index = get_food_index()
         matches = []
-        for name, data in food_db.items():
-            if query in name.lower():
-                matches.append({
-                    "name": name,
-                    "protein": data.get("protein", 0),
-                    "fat": data.get("fat", 0),
-                    "carbon": data.get("carbon", 0)
-                })
-        return jsonify({"foods": matches[:10]})  # Limit to 10 results
+        for name in food_index.search(query, limit=10):
+            data = food_index.foods[name]
+            matches.append({
+                "name": name,
+                "protein": data.get("protein", 0),
+                "fat": data.get("fat", 0),
+                "carbon": data.get("carbon", 0)
+            })
+        return jsonify({"foods": matches})
     except Exception as e:
         return jsonify({"error": str(e)})
 
 
+@app.route("/foods/top")
+def foods_top():
+    by = request.args.get("by", "protein")
+    try:
+        k = max(0, int(request.args.get("k", 20)))
+        top = get_nutrient_index().top(by, k)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    foods = get_food_index().foods
+    return jsonify({"by": resolve_metric(by), "foods": [
+        dict(foods.get(name, {}), name=name, value=value)
+        for name, value in top
+    ]})
+
+
 @app.route("/update_task", methods=["POST"])
 def update_task():
-    date = request.form.get('date')
-    if date:
-        day_file = os.path.join("logs", f"{date}.json")
-    else:
-        day_file = TODAY_FILE
-    data = load_json(day_file)
-    part = request.form['part']
+    date = request.form.get('date') or today()
+    data = storage.load_day(date)
+    part = find_key(data['done'], request.form['part'])
     index = int(request.form['index'])
     new_value = request.form['done'] == 'true'
-    # Try all case variants
-    if part in data['done']:
-        data['done'][part][index] = new_value
-    elif part.capitalize() in data['done']:
-        data['done'][part.capitalize()][index] = new_value
-    elif part.lower() in data['done']:
-        data['done'][part.lower()][index] = new_value
-    save_json(day_file, data)
-    return jsonify({"success": True})
+    data = storage.apply(date, [{
+        "op": "check", "section": part, "index": index, "done": new_value
+    }], data)
+    return with_etag(jsonify({
+        "success": True, "version": data.get("version", 0)
+    }), date)
 
 
 @app.route("/update_goal", methods=["POST"])
 def update_goal():
-    date = request.form.get('date')
-    if date:
-        day_file = os.path.join("logs", f"{date}.json")
-    else:
-        day_file = TODAY_FILE
-    data = load_json(day_file)
-    section = request.form['section']
+    date = request.form.get('date') or today()
+    data = storage.load_day(date)
+    section = find_key(data['goals'], request.form['section'])
     index = int(request.form['index'])
     new_value = request.form['done'] == 'true'
-    # Try all case variants
-    if section in data['goals']:
-        data['goals'][section][index]['done'] = new_value
-    elif section.capitalize() in data['goals']:
-        data['goals'][section.capitalize()][index]['done'] = new_value
-    elif section.lower() in data['goals']:
-        data['goals'][section.lower()][index]['done'] = new_value
-    save_json(day_file, data)
-    return jsonify({"success": True})
+    data = storage.apply(date, [{
+        "op": "check_goal", "section": section,
+        "index": index, "done": new_value
+    }], data)
+    return with_etag(jsonify({
+        "success": True, "version": data.get("version", 0)
+    }), date)
 
 
 @app.route("/add_task", methods=["POST"])
 def add_task():
-    day_file = TODAY_FILE
-    data = load_json(day_file)
+    date = today()
+    data = storage.load_day(date)
     section = request.form['section']
     text = request.form['text']
-    data['tasks'][section].append(text)
-    data['done'][section].append(False)
-    save_json(day_file, data)
-    return jsonify({"success": True})
+    data = storage.apply(date, [
+        {"op": "add_task", "section": section, "text": text}
+    ], data)
+    return with_etag(jsonify({
+        "success": True, "version": data.get("version", 0)
+    }), date)
 
 
 @app.route("/add_goal", methods=["POST"])
 def add_goal():
-    day_file = TODAY_FILE
-    data = load_json(day_file)
+    date = today()
+    data = storage.load_day(date)
     section = request.form['section']
     text = request.form['text']
-    data['goals'][section].append({"text": text, "done": False})
-    save_json(day_file, data)
-    return jsonify({"success": True})
+    data = storage.apply(date, [
+        {"op": "add_goal", "section": section, "text": text}
+    ], data)
+    return with_etag(jsonify({
+        "success": True, "version": data.get("version", 0)
+    }), date)
 
 
 @app.route("/add_food", methods=["POST"])
 def add_food():
-    day_file = TODAY_FILE
-    data = load_json(day_file)
+    date = today()
+    data = storage.load_day(date)
     meal = request.form['meal']
     name = request.form['name']
-    weight = float(request.form['weight'])
-    data['food'][meal].append({"name": name, "weight": weight})
-    save_json(day_file, data)
-    return jsonify({"success": True})
+    try:
+        weight = parse_weight(request.form.get('weight'))
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    food_index = get_food_index()
+    food_key = resolve_food(name, food_index)
+    if food_key is None:
+        return jsonify({
+            "success": False, "error": f"'{name}' not found in food database"
+        }), 404
+    data = storage.apply(date, [{
+        "op": "add_food", "meal": meal,
+        "item": food_record(food_key, weight, food_index)
+    }], data)
+    return with_etag(jsonify({
+        "success": True, "version": data.get("version", 0)
+    }), date)
+
+
+@app.route("/remove_food", methods=["POST"])
+def remove_food():
+    date = request.form.get('date') or today()
+    data = storage.load_day(date)
+    meal = request.form['meal']
+    index = int(request.form['index'])
+    data = storage.apply(date, [
+        {"op": "remove_food", "meal": meal, "index": index}
+    ], data)
+    return with_etag(jsonify({
+        "success": True, "version": data.get("version", 0)
+    }), date)
 
 
 @app.route("/add_water", methods=["POST"])
 def add_water():
-    day_file = TODAY_FILE
-    data = load_json(day_file)
+    date = today()
+    data = storage.load_day(date)
     amount = int(request.form['amount'])
-    if 'water' not in data:
-        data['water'] = 0
-    data['water'] += amount
-    save_json(day_file, data)
-    return jsonify({"success": True, "total": data['water']})
+    data = storage.apply(date, [{"op": "add_water", "amount": amount}], data)
+    return with_etag(jsonify({
+        "success": True, "total": data['water'],
+        "version": data.get("version", 0)
+    }), date)
+
+
+@app.route("/batch", methods=["POST"])
+def batch():
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return jsonify({
+            "success": False, "error": "expected a JSON object"
+        }), 400
+    date = payload.get("date") or today()
+    try:
+        ops = batch_ops(payload.get("ops", []))
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    # The version check and the validation run under the day's lock,
+    # so two clients sending the same base_version cannot both win,
+    # and a bad op leaves the stored day untouched.
+    try:
+        data = storage.apply(date, ops,
+                             expected_version=payload.get("base_version"))
+    except FileNotFoundError as e:
+        return jsonify({"success": False, "error": str(e)}), 404
+    except VersionConflict as e:
+        return jsonify({
+            "success": False, "error": "version conflict",
+            "version": e.version, "data": e.data
+        }), 409
+    except OpError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    return with_etag(jsonify({
+        "success": True, "version": data.get("version", 0), "data": data
+    }), date)
 
 
 @app.route("/reload_today")
 def reload_today():
-    today_str = datetime.now(TAIWAN_TZ).strftime('%Y-%m-%d')
-    filename = os.path.join("logs", f"{today_str}.json")
-    if not os.path.exists(filename):
-        run(["uv", "run", "main.py", "init"], check=True)
+    today_str = today()
+    ensure_day(today_str, storage)
     try:
-        with open(filename, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        return jsonify(data)
+        return day_response(today_str)
     except Exception as e:
         return jsonify({"error": str(e)})
 
@@ -162,23 +356,121 @@ def get_day():
     date = request.args.get("date")
     if not date:
         return jsonify({"error": "No date provided"})
-    filename = os.path.join("logs", f"{date}.json")
-    today_str = datetime.now(TAIWAN_TZ).strftime('%Y-%m-%d')
-    if date == today_str and not os.path.exists(filename):
-        run(["uv", "run", "main.py", "init"], check=True)
+    if date == today():
+        ensure_day(date, storage)
     try:
-        with open(filename, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        return jsonify(data)
+        return day_response(date)
     except Exception as e:
         return jsonify({"error": str(e)})
 
 
+@app.route("/day_summary")
+def get_day_summary():
+    date = request.args.get("date") or today()
+    try:
+        data = storage.load_day(date)
+        return jsonify({"date": date, **day_summary(data, date)})
+    except Exception as e:
+        return jsonify({"error": str(e)})
+
+
+@app.route("/suggest")
+def suggest():
+    date = request.args.get("date") or today()
+    try:
+        max_foods = min(3, max(1, int(request.args.get("max_foods", 3))))
+        count = min(10, max(1, int(request.args.get("n", 3))))
+    except ValueError:
+        return jsonify({"error": "max_foods and n must be integers"}), 400
+    prefer = request.args.get("prefer_logged", "") in ("1", "true")
+    try:
+        return jsonify(suggest_for_day(date, max_foods, count, prefer,
+                                       storage))
+    except FileNotFoundError:
+        return jsonify({"error": f"No planner for {date}"}), 404
+
+
+@app.route("/get_range")
+def get_range():
+    start = request.args.get("start")
+    end = request.args.get("end")
+    if not start or not end:
+        return jsonify({"error": "start and end are required"})
+    fmt = request.args.get("format", "json")
+    sections = request.args.get("sections")
+    keep = set(sections.split(",")) if sections else None
+
+    def documents():
+        for date, data in storage.iter_days(start, end):
+            if keep is not None:
+                data = {k: v for k, v in data.items() if k in keep}
+            yield json.dumps({"date": date, **data}, ensure_ascii=False)
+
+    def ndjson():
+        for doc in documents():
+            yield doc + "\n"
+
+    def json_array():
+        yield "["
+        for i, doc in enumerate(documents()):
+            yield doc if i == 0 else "," + doc
+        yield "]"
+
+    if fmt == "ndjson":
+        return Response(ndjson(), mimetype="application/x-ndjson")
+    return Response(json_array(), mimetype="application/json")
+
+
+@app.route("/events")
+def events():
+    date = request.args.get("date") or today()
+    feed = get_change_feed(storage)
+
+    def stream():
+        q = feed.subscribe(date)
+        try:
+            yield "retry: 2000\n\n"
+            while True:
+                try:
+                    notice = q.get(timeout=15)
+                except queue.Empty:
+                    # Comment line keeps proxies from closing the stream.
+                    yield ": ping\n\n"
+                    continue
+                yield f"data: {json.dumps(notice, ensure_ascii=False)}\n\n"
+        finally:
+            feed.unsubscribe(date, q)
+
+    resp = Response(stream(), mimetype="text/event-stream")
+    resp.headers["Cache-Control"] = "no-cache"
+    resp.headers["X-Accel-Buffering"] = "no"
+    return resp
+
+
+@app.route("/stats")
+def stats():
+    start = request.args.get("start") or None
+    end = request.args.get("end") or None
+    try:
+        window = int(request.args.get("window", 7))
+        return jsonify(compute_stats(start, end, window, storage))
+    except Exception as e:
+        return jsonify({"error": str(e)})
+
+
+@app.route("/metrics")
+def get_metrics():
+    return Response(metrics.render_prometheus(),
+                    mimetype="text/plain; version=0.0.4")
+
+
 @app.route("/get_today_str")
 def get_today_str():
-    today_str = datetime.now(TAIWAN_TZ).strftime('%Y-%m-%d')
-    return jsonify({"today": today_str})
+    return jsonify({"today": today()})
 
 
 if __name__ == '__main__':
+    # Started here rather than at import, so tools importing the app
+    # (tests, benchmarks) do not get a background writer thread.
+    start_preinit(storage)
     app.run(host='0.0.0.0', port=5050, debug=True)
@@ -0,0 +1,149 @@
+import json
+import os
+import random
+from datetime import date, timedelta
+
+# Pieces for synthetic food names; CJK names mimic store-brand entries
+# such as '全聯_十三香雞胸' in the real database
+CJK_BRANDS = ["全聯", "7-11", "全家", "綿綿吐司", "萊爾富", "好市多"]
+CJK_WORDS = ["雞胸", "豆漿", "吐司", "沙拉", "牛肉", "豆腐", "燕麥", "鮭魚",
+             "優格", "蛋", "地瓜", "糙米", "黑豆", "奶茶", "香蕉", "雞腿"]
+LATIN_WORDS = ["chicken", "oat", "rice", "egg", "tofu", "salmon", "beef",
+               "yogurt", "banana", "bread", "milk", "bean", "potato"]
+SECTIONS = ["Morning", "Afternoon", "Evening", "Night"]
+MEALS = ["breakfast", "lunch", "dinner"]
+
+
+def food_name(rng, i, cjk_ratio=0.7):
+    """
+    Build a unique synthetic food name.
+    Args:
+        rng (random.Random): Random source.
+        i (int): Sequence number, keeps names unique.
+        cjk_ratio (float): Share of CJK names.
+    Returns:
+        str: Food name.
+    """
+    if rng.random() < cjk_ratio:
+        words = "".join(rng.sample(CJK_WORDS, 2))
+        return f"{rng.choice(CJK_BRANDS)}_{words}_{i}"
+    return f"{rng.choice(LATIN_WORDS)} {rng.choice(LATIN_WORDS)} {i}"
+
+
+def generate_food_db(size, cjk_ratio=0.7, seed=0):
+    """
+    Generate a food database.
+    Args:
+        size (int): Number of foods.
+        cjk_ratio (float): Share of CJK names. Defaults to 0.7.
+        seed (int): Random seed.
+    Returns:
+        dict: Mapping of food name to nutrients per 100g.
+    """
+    rng = random.Random(seed)
+    return {
+        food_name(rng, i, cjk_ratio): {
+            "protein": round(rng.uniform(0, 35), 1),
+            "fat": round(rng.uniform(0, 25), 1),
+            "carbon": round(rng.uniform(0, 70), 1),
+        }
+        for i in range(size)
+    }
+
+
+def generate_routine(tasks, seed=0):
+    """
+    Generate a routine template.
+    Args:
+        tasks (int): Total number of tasks, spread over the sections.
+        seed (int): Random seed.
+    Returns:
+        dict: Section name to task names, like defaults/routine.json.
+    """
+    rng = random.Random(seed)
+    routine = {s: [] for s in SECTIONS}
+    for i in range(tasks):
+        section = SECTIONS[i % len(SECTIONS)]
+        routine[section].append(f"{rng.choice(LATIN_WORDS).title()} {i}")
+    return {s: items for s, items in routine.items() if items}
+
+
+def generate_day(rng, routine, food_db_names, foods_per_meal=3):
+    """
+    Generate one logged day.
+    Args:
+        rng (random.Random): Random source.
+        routine (dict): Routine template.
+        food_db_names (list): Names to log foods from.
+        foods_per_meal (int): Maximum foods per meal.
+    Returns:
+        dict: Day document.
+    """
+    food = {}
+    for meal in MEALS:
+        food[meal] = []
+        for _ in range(rng.randint(0, foods_per_meal)):
+            weight = float(rng.randrange(50, 400, 10))
+            food[meal].append({
+                "name": rng.choice(food_db_names), "weight": weight,
+                "protein": round(rng.uniform(0, 40), 2),
+                "fat": round(rng.uniform(0, 25), 2),
+                "carbon": round(rng.uniform(0, 60), 2),
+            })
+    goals = {"focus": [], "todo": []}
+    for section in goals:
+        for i in range(rng.randint(0, 4)):
+            goals[section].append({"text": f"{section} goal {i}",
+                                   "done": rng.random() < 0.5})
+    return {
+        "tasks": routine,
+        "done": {s: [rng.random() < 0.7 for _ in items]
+                 for s, items in routine.items()},
+        "plan": {f"{h:02}": rng.choice(["", "", "work", "gym"])
+                 for h in range(5, 25)},
+        "goals": goals,
+        "food": food,
+        "water": rng.randrange(0, 3500, 250),
+    }
+
+
+def write_workspace(root, days=365, foods=2000, tasks=16, end=None,
+                    cjk_ratio=0.7, seed=0):
+    """
+    Write a planner workspace (logs/ and defaults/) with synthetic data.
+    Args:
+        root (str): Directory to write into.
+        days (int): Number of logged days ending at end.
+        foods (int): Size of the food database.
+        tasks (int): Number of routine tasks.
+        end (str, optional): Last logged date. Defaults to today.
+        cjk_ratio (float): Share of CJK food names.
+        seed (int): Random seed.
+    Returns:
+        dict: The routine, food database and list of dates written.
+    """
+    rng = random.Random(seed)
+    logs = os.path.join(root, "logs")
+    defaults = os.path.join(root, "defaults")
+    os.makedirs(logs, exist_ok=True)
+    os.makedirs(defaults, exist_ok=True)
+    routine = generate_routine(tasks, seed)
+    food_db = generate_food_db(foods, cjk_ratio, seed)
+    profile = {"weight": 73, "tall": 183, "protein_factor": 2,
+               "fat_factor": 1.0, "carbon_factor": 1.5, "water_factor": 10}
+    for name, data in (("routine.json", routine),
+                       ("food_db.json", food_db),
+                       ("user_profile.json", profile)):
+        with open(os.path.join(defaults, name), "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+    last = date.fromisoformat(end) if end else date.today()
+    names = list(food_db)
+    dates = []
+    for offset in range(days - 1, -1, -1):
+        date_str = (last - timedelta(days=offset)).isoformat()
+        with open(os.path.join(logs, f"{date_str}.json"), "w",
+                  encoding="utf-8") as f:
+            json.dump(generate_day(rng, routine, names), f,
+                      ensure_ascii=False, indent=2)
+        dates.append(date_str)
+    return {"routine": routine, "food_db": food_db, "dates": dates}
@@ -0,0 +1,170 @@
+# Concurrent-writer load test for today's day document.
+#
+# Run from the project root:
+#   python -m benchmarks.load_test
+#   python -m benchmarks.load_test --writers 16 --processes 8 --ops 100
+#   python -m benchmarks.load_test --storage journal
+#
+# Writer threads post to the Flask app through its test client while
+# CLI subprocesses run `main.py add-water` against the same workspace.
+# Every write adds a known amount of water (web writers alternate with
+# /add_food), so the final document tells how many updates were lost.
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def web_writer(app, ops, meal, food, results):
+    """
+    Post ops writes through a Flask test client of its own.
+    Args:
+        app (Flask): The planner web app.
+        ops (int): Number of requests to send.
+        meal (str): Meal of today's document for /add_food requests.
+        food (str): Food name for /add_food requests.
+        results (dict): Shared counters to update.
+    Returns:
+        None
+    """
+    client = app.test_client()
+    water = foods = failed = 0
+    for i in range(ops):
+        if i % 2:
+            resp = client.post("/add_food", data={
+                "meal": meal, "name": food, "weight": 100})
+            foods += resp.status_code == 200
+        else:
+            resp = client.post("/add_water", data={"amount": 1})
+            water += resp.status_code == 200
+        failed += resp.status_code != 200
+    with results["lock"]:
+        results["water"] += water
+        results["foods"] += foods
+        results["failed"] += failed
+
+
+def cli_writer(env, ops, results):
+    """
+    Run `main.py add-water 1` ops times, one process after another.
+    Args:
+        env (dict): Environment for the subprocesses.
+        ops (int): Number of commands to run.
+        results (dict): Shared counters to update.
+    Returns:
+        None
+    """
+    water = failed = 0
+    for _ in range(ops):
+        proc = subprocess.run(
+            [sys.executable, os.path.join(ROOT, "main.py"), "add-water", "1"],
+            env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        ok = proc.returncode == 0 and b"[\xe2\x9c\x93]" in proc.stdout
+        water += ok
+        failed += not ok
+    with results["lock"]:
+        results["water"] += water
+        results["failed"] += failed
+
+
+def run_writers(targets):
+    """
+    Start every writer at once and wait for all of them.
+    Args:
+        targets (list): (function, args) pairs, one per writer.
+    Returns:
+        float: Elapsed seconds.
+    """
+    threads = [threading.Thread(target=func, args=args)
+               for func, args in targets]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Planner load test")
+    parser.add_argument("--writers", type=int, default=8,
+                        help="Concurrent writer threads in the web app")
+    parser.add_argument("--ops", type=int, default=50,
+                        help="Requests per writer thread")
+    parser.add_argument("--processes", type=int, default=4,
+                        help="Concurrent CLI writers")
+    parser.add_argument("--cli-ops", type=int, default=10,
+                        help="Commands per CLI writer")
+    parser.add_argument("--storage", choices=("json", "journal", "sqlite"),
+                        default="json")
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--foods", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="planner-load-")
+    # Settings are read from the environment when the package loads
+    os.environ["PLANNER_STORAGE"] = args.storage
+    os.environ["PLANNER_DB"] = os.path.join(workdir, "planner.db")
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(
+        filter(None, [ROOT, os.environ.get("PYTHONPATH")])))
+    sys.path.insert(0, ROOT)
+    os.chdir(workdir)
+    try:
+        from benchmarks.generators import write_workspace
+        from daily_planner.clock import today
+        from daily_planner.storage import get_storage, JsonStorage
+        data = write_workspace(workdir, args.days, args.foods,
+                               end=today())
+        storage = get_storage()
+        if args.storage == "sqlite":
+            storage.copy_from(JsonStorage())
+        date_str = today()
+        before = storage.load_day(date_str)
+        meal = next(iter(before["food"]))
+        water_before = before["water"]
+        foods_before = len(before["food"][meal])
+        import app
+        food = next(iter(data["food_db"]))
+
+        results = {"lock": threading.Lock(), "water": 0, "foods": 0,
+                   "failed": 0}
+        targets = [(web_writer, (app.app, args.ops, meal, food, results))
+                   for _ in range(args.writers)]
+        targets += [(cli_writer, (env, args.cli_ops, results))
+                    for _ in range(args.processes)]
+        elapsed = run_writers(targets)
+
+        after = storage.load_day(date_str)
+        water_lost = water_before + results["water"] - after["water"]
+        foods_lost = (foods_before + results["foods"]
+                      - len(after["food"][meal]))
+    finally:
+        os.chdir(ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    web_ops = args.writers * args.ops
+    cli_ops = args.processes * args.cli_ops
+    total = web_ops + cli_ops
+    print(f"[✓] {args.writers} web writers x {args.ops} requests, "
+          f"{args.processes} CLI writers x {args.cli_ops} commands "
+          f"({args.storage} storage)")
+    print(f"  {total} writes in {elapsed:.2f}s: "
+          f"{total / elapsed:.1f} writes/s")
+    if results["failed"]:
+        print(f"[!] {results['failed']} writes failed")
+    lost = water_lost + foods_lost
+    if lost:
+        print(f"[x] Lost updates: {lost} ({water_lost} water, "
+              f"{foods_lost} food)")
+        sys.exit(1)
+    print("[✓] Lost updates: 0")
+
+
+if __name__ == "__main__":
+    main()
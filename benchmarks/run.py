@@ -0,0 +1,326 @@
+# Benchmarks for the planner's hot paths on synthetic data.
+#
+# Run from the project root:
+#   python -m benchmarks.run                  compare with the baseline
+#   python -m benchmarks.run --save-baseline  store results as baseline
+#   python -m benchmarks.run --days 1095 --foods 20000 --output out.json
+#
+# A workspace with years of logs, a large food DB (mostly CJK names)
+# and a long routine is generated in a temporary directory, so the
+# real logs/ and defaults/ are never touched.
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import os
+import platform
+import re
+import shutil
+import sys
+import tempfile
+import time
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmarks", "baseline.json")
+
+# Benchmark name -> factory(ctx) returning (func, setup)
+BENCHMARKS = {}
+
+
+def bench(name):
+    """
+    Register a benchmark factory.
+    Args:
+        name (str): Benchmark name used in the results.
+    Returns:
+        callable: Decorator storing the factory under name.
+    """
+    def register(factory):
+        BENCHMARKS[name] = factory
+        return factory
+    return register
+
+
+def quiet(func):
+    # Time the work, not the terminal
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            func()
+    return run
+
+
+class Context:
+    """
+    Shared state for the benchmarks: generated data, the storage
+    backend and a snapshot of today's document to reset writes.
+    """
+
+    def __init__(self, data):
+        from daily_planner.clock import today
+        from daily_planner.storage import get_storage
+        self.storage = get_storage()
+        self.today = today()
+        self.routine = data["routine"]
+        self.food_names = list(data["food_db"])
+        # Copy: load_day() may return the cached, mutable document
+        self.snapshot = json.dumps(self.storage.load_day(self.today))
+        self._client = None
+
+    def reset_today(self):
+        self.storage.save_day(self.today, json.loads(self.snapshot))
+
+    @property
+    def client(self):
+        if self._client is None:
+            import app
+            self._client = app.app.test_client()
+        return self._client
+
+    def first_task(self):
+        section, items = next(iter(self.routine.items()))
+        return section, items[0]
+
+
+QUERIES = ["雞胸", "豆", "全聯_", "chicken", "oat rice", "吐司_3"]
+
+
+@bench("search_food_matches")
+def _search_food_matches(ctx):
+    from daily_planner.core.food import search_food_matches
+    queries = itertools.cycle(QUERIES)
+    return (lambda: search_food_matches(next(queries), limit=10)), None
+
+
+@bench("add_food")
+def _add_food(ctx):
+    from daily_planner.core.food import add_food
+    name = ctx.food_names[len(ctx.food_names) // 2]
+    return quiet(lambda: add_food("lunch", name, 150)), ctx.reset_today
+
+
+@bench("check_by_name")
+def _check_by_name(ctx):
+    from daily_planner.core.routine import check_by_name
+    _, task = ctx.first_task()
+    status = itertools.cycle([True, False])
+    return quiet(lambda: check_by_name(task, next(status))), ctx.reset_today
+
+
+@bench("show_all_columns")
+def _show_all_columns(ctx):
+    from daily_planner.display.summary import show_all_columns
+    return quiet(lambda: show_all_columns(ctx.today)), None
+
+
+@bench("route:/search_food")
+def _route_search_food(ctx):
+    queries = itertools.cycle(QUERIES)
+    return (lambda: ctx.client.get("/search_food",
+                                   query_string={"q": next(queries)})), None
+
+
+@bench("route:/get_day")
+def _route_get_day(ctx):
+    return (lambda: ctx.client.get(f"/get_day?date={ctx.today}")), None
+
+
+@bench("route:/update_task")
+def _route_update_task(ctx):
+    section, _ = ctx.first_task()
+    done = itertools.cycle(["true", "false"])
+    return (lambda: ctx.client.post("/update_task", data={
+        "date": ctx.today, "part": section, "index": 0,
+        "done": next(done)})), ctx.reset_today
+
+
+@bench("route:/add_food")
+def _route_add_food(ctx):
+    name = ctx.food_names[len(ctx.food_names) // 3]
+    return (lambda: ctx.client.post("/add_food", data={
+        "meal": "dinner", "name": name, "weight": 120})), ctx.reset_today
+
+
+@bench("route:/day_summary")
+def _route_day_summary(ctx):
+    return (lambda: ctx.client.get(f"/day_summary?date={ctx.today}")), None
+
+
+@bench("route:/stats")
+def _route_stats(ctx):
+    return (lambda: ctx.client.get("/stats")), None
+
+
+@bench("route:/foods/top")
+def _route_foods_top(ctx):
+    return (lambda: ctx.client.get("/foods/top?by=protein&k=20")), None
+
+
+@bench("route:/suggest")
+def _route_suggest(ctx):
+    return (lambda: ctx.client.get(f"/suggest?date={ctx.today}")), None
+
+
+@bench("init_day")
+def _init_day(ctx):
+    # Registered last: every call adds a day file (far in the future)
+    from datetime import date, timedelta
+    from daily_planner.core.routine import init_day
+    counter = itertools.count()
+    first = date(2999, 1, 1)
+    return quiet(lambda: init_day(
+        (first + timedelta(days=next(counter))).isoformat())), None
+
+
+def measure(func, setup=None, repeat=5, min_time=0.2):
+    """
+    Time a callable like timeit: calibrate the loop count, then repeat.
+    Args:
+        func (callable): Work to time.
+        setup (callable, optional): Run before each repeat (untimed).
+        repeat (int): Number of timed repeats.
+        min_time (float): Minimum seconds per repeat.
+    Returns:
+        dict: Per-call median and min in microseconds, loops and repeats.
+    """
+    setup = setup or (lambda: None)
+    timer = timeit.Timer(func, setup=setup)
+    number = 1
+    while True:
+        if timer.timeit(number) >= min_time or number >= 10**6:
+            break
+        number *= 2
+    times = sorted(t / number * 1e6 for t in timer.repeat(repeat, number))
+    setup()
+    return {"median_us": round(times[len(times) // 2], 2),
+            "min_us": round(times[0], 2), "number": number,
+            "repeat": repeat}
+
+
+def compare(results, baseline, threshold):
+    """
+    Print percentage deltas against a baseline.
+    Args:
+        results (dict): Current results by benchmark name.
+        baseline (dict): Baseline results by benchmark name.
+        threshold (float): Percentage change reported as a regression.
+    Returns:
+        list: Names of benchmarks that regressed.
+    """
+    regressions = []
+    print(f"\n{'benchmark':<24} {'baseline':>12} {'current':>12} "
+          f"{'delta':>8}")
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<24} {'-':>12} {result['median_us']:>10.1f}us "
+                  f"{'new':>8}")
+            continue
+        delta = ((result["median_us"] - base["median_us"])
+                 / base["median_us"] * 100)
+        mark = ""
+        if delta > threshold:
+            mark = "  [x] regression"
+            regressions.append(name)
+        elif delta < -threshold:
+            mark = "  [✓] faster"
+        print(f"{name:<24} {base['median_us']:>10.1f}us "
+              f"{result['median_us']:>10.1f}us {delta:>+7.1f}%{mark}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Planner benchmarks")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--foods", type=int, default=2000)
+    parser.add_argument("--tasks", type=int, default=16)
+    parser.add_argument("--cjk", type=float, default=0.7,
+                        help="Share of CJK food names")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--storage", choices=("json", "journal", "sqlite"),
+                        default="json")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2)
+    parser.add_argument("--only", default=None,
+                        help="Regex selecting benchmark names")
+    parser.add_argument("--output", default=None,
+                        help="Write results JSON here")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="Percent slowdown reported as regression")
+    parser.add_argument("--strict", action="store_true",
+                        help="Exit with status 1 on regressions")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="planner-bench-")
+    # Settings are read from the environment when the package loads
+    os.environ["PLANNER_STORAGE"] = args.storage
+    os.environ["PLANNER_DB"] = os.path.join(workdir, "planner.db")
+    sys.path.insert(0, ROOT)
+    os.chdir(workdir)
+    try:
+        from benchmarks.generators import write_workspace
+        from daily_planner.clock import today
+        started = time.perf_counter()
+        data = write_workspace(workdir, args.days, args.foods, args.tasks,
+                               end=today(), cjk_ratio=args.cjk,
+                               seed=args.seed)
+        if args.storage == "sqlite":
+            from daily_planner.storage import get_storage, JsonStorage
+            get_storage().copy_from(JsonStorage())
+        print(f"[✓] Generated {args.days} days, {args.foods} foods and "
+              f"{args.tasks} tasks in {time.perf_counter() - started:.1f}s")
+        ctx = Context(data)
+        results = {}
+        for name, factory in BENCHMARKS.items():
+            if args.only and not re.search(args.only, name):
+                continue
+            func, setup = factory(ctx)
+            # Warm caches and lazy imports, and catch broken routes
+            status = getattr(func(), "status_code", 200)
+            if status >= 400:
+                print(f"[!] {name} returned HTTP {status}")
+            results[name] = measure(func, setup, args.repeat, args.min_time)
+            print(f"  {name:<24} {results[name]['median_us']:>10.1f}us")
+    finally:
+        os.chdir(ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "config": {k: v for k, v in vars(args).items()
+                       if k in ("days", "foods", "tasks", "cjk", "seed",
+                                "storage", "repeat", "min_time")},
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"[✓] Results written to {args.output}")
+    regressions = []
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline["meta"]["config"] != report["meta"]["config"]:
+            print("[!] Baseline was recorded with different settings: "
+                  f"{baseline['meta']['config']}")
+        regressions = compare(results, baseline["results"], args.threshold)
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"[✓] Baseline saved to {args.baseline}")
+    if regressions:
+        print(f"[x] {len(regressions)} regression(s) over "
+              f"{args.threshold:g}%: {', '.join(regressions)}")
+        if args.strict:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
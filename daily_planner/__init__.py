@@ -1,3 +1,15 @@
 # planner/__init__.py
-from .core import init_day, check_by_name, plan_hours, add_goal, mark_goal_by_name
-from .display import show_routine, show_plan, show_goals
+from .lazy import lazy_exports
+
+# Names are imported from their submodules on first use so that
+# `import daily_planner` stays cheap for quick CLI commands
+__getattr__, __dir__ = lazy_exports(__name__, {
+    "init_day": "core",
+    "check_by_name": "core",
+    "plan_hours": "core",
+    "add_goal": "core",
+    "mark_goal_by_name": "core",
+    "show_routine": "display",
+    "show_plan": "display",
+    "show_goals": "display",
+})
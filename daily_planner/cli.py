@@ -1,19 +1,12 @@
 # File: planner/cli.py
 import argparse
+import shlex
 import sys
-import os
-from .core import (
-    init_day, check_by_name, plan_hours, add_goal,
-    mark_goal_by_name, show_summary, fuzzy_show_type,
-    print_help_message, add_food, add_food_info, add_water
-)
-from .core.archive import get_today_filename, git_commit_and_push
-from .core.food import sort_key
-import json
-from .display import (
-    show_routine, show_plan, show_goals, show_food, show_all_columns
-)
-from .constants import TODAY_FILE, DATA_DIR
+from .clock import today
+
+# Command handlers import their modules when they run, so quick
+# commands such as `check` or `add-water` skip loading the display
+# code, wcwidth, subprocess, numpy and the food index.
 
 # Explicit aliases take precedence
 alias_map = {
@@ -50,14 +43,17 @@ alias_map = {
 canonical_cmds = [
     "interactive", "init", "show", "check", "uncheck",
     "check-goal", "uncheck-goal", "add-goal", "plan", "help",
-    "add-food", "add-food-info", "add-exercise"
+    "add-food", "add-food-info", "add-exercise", "compact", "migrate",
+    "stats", "food-db", "suggest", "metrics"
 ]
 
 
 def resolve_cmd(cmd):
-    # First: check exact aliases
+    # First: check exact aliases and full command names
     if cmd in alias_map:
         return alias_map[cmd]
+    if cmd in canonical_cmds:
+        return cmd
 
     # Second: attempt prefix match against canonical list
     matches = [full for full in canonical_cmds if full.startswith(cmd)]
@@ -69,176 +65,617 @@ def resolve_cmd(cmd):
         return cmd  # no match found
 
 
-# Example usage
-if len(sys.argv) > 1:
-    try:
-        sys.argv[1] = resolve_cmd(sys.argv[1])
-    except ValueError as e:
-        print(e)
-        sys.exit(1)
-
-
 def interactive_mode():
+    """
+    Run planner commands in a loop inside this process. The parser,
+    storage caches and food index stay warm between commands.
+    Args:
+        None
+    Returns:
+        None
+    """
+    from .core.scheduler import start_preinit
+    start_preinit()
     print("[🧠 Interactive Mode] Type 'exit', 'quit' or 'q' to leave.")
     while True:
         try:
             cmd = input("planner> ").strip()
             if cmd in ("exit", "quit", "q"):
                 break
-            if cmd:
-                import subprocess
-                subprocess.run([sys.executable, "main.py"] + cmd.split())
+            if not cmd:
+                continue
+            argv = shlex.split(cmd)
+            if resolve_cmd(argv[0]) == "interactive":
+                continue
+            main(argv)
+        except SystemExit:
+            # argparse errors and --help exit; stay in the shell
+            pass
+        except (ValueError, FileNotFoundError) as e:
+            print(f"[x] {e}")
         except KeyboardInterrupt:
             print("[!] Interrupted by keyboard. Type 'exit' to quit.")
+        except EOFError:
+            print()
+            break
 
 
 def handle_archive(args):
     """
-    CLI handler to archive today's planner file (git commit and push).
+    CLI handler to archive day files with one git commit (and push).
+    Without a date or range, today's file is archived.
+    Args:
+        args: argparse.Namespace with optional date, since, until,
+            push, remote and branch.
+    Returns:
+        None
+    """
+    from .core.archive import archive_days
+    since, until = args.since, args.until
+    if args.date:
+        since = until = args.date
+    elif not since and not until:
+        since = until = today()
+    archive_days(since, until, push=args.push, remote=args.remote,
+                 branch=args.branch)
+
+
+def handle_compact(args):
+    """
+    CLI handler to fold a day's mutation journal into its JSON file.
     Args:
         args: argparse.Namespace with optional date argument.
     Returns:
         None
     """
-    date_arg = args.date if hasattr(args, 'date') else None
-    today_filename = get_today_filename(date_arg)
-    git_commit_and_push(today_filename)
+    from .storage import get_storage, JsonStorage
+    storage = get_storage()
+    date_str = args.date or today()
+    if not isinstance(storage, JsonStorage):
+        print("[!] Compaction only applies to the JSON file storage.")
+        return
+    if not storage.day_exists(date_str):
+        print(f"[!] No planner for {date_str}.")
+        return
+    folded = storage.compact(date_str)
+    print(f"[✓] Compacted {folded} journal records for {date_str}")
+
+
+def handle_migrate(args):
+    """
+    CLI handler to copy the JSON logs and food database into the
+    configured storage backend (e.g. PLANNER_STORAGE=sqlite).
+    Args:
+        args: argparse.Namespace (unused).
+    Returns:
+        None
+    """
+    from .storage import get_storage, JsonStorage
+    storage = get_storage()
+    if isinstance(storage, JsonStorage):
+        print("[!] Already using JSON files; set PLANNER_STORAGE first.")
+        return
+    count = storage.copy_from(JsonStorage())
+    print(f"[✓] Copied {count} days and the food database.")
+
+
+def handle_stats(args):
+    """
+    CLI handler to print statistics over a range of days.
+    Args:
+        args: argparse.Namespace with optional start, end and window.
+    Returns:
+        None
+    """
+    from .core.analytics import show_stats
+    show_stats(args.start, args.end, args.window)
 
 
 def handle_sort_food_db(args):
     """
-    CLI handler to sort the food database by nutrient or name.
+    CLI handler to list the food database by nutrient or name. The
+    order comes from the nutrient indexes; the database file is left
+    untouched.
     Args:
         args: argparse.Namespace with optional mode argument.
     Returns:
         None
     """
     mode = args.mode[0].lower() if args.mode else 'n'
-    from .constants import FOOD_DB_FILE
-    with open(FOOD_DB_FILE, "r", encoding="utf-8") as f:
-        food_db = json.load(f)
-    reverse = mode in {"p", "f", "c"}
-    sorted_items = sorted(
-        food_db.items(),
-        key=lambda x: sort_key(x, mode),
-        reverse=reverse
-    )
-    sorted_db = {k: v for k, v in sorted_items}
-    with open(FOOD_DB_FILE, "w", encoding="utf-8") as f:
-        json.dump(sorted_db, f, ensure_ascii=False, indent=2)
-    print(
-        f"[✓] Sorted by '{mode}' "
-        f"({'desc' if reverse else 'asc'}) "
-        f"and saved to {FOOD_DB_FILE}"
-    )
-
-
-def main():
-    parser = argparse.ArgumentParser(description="Daily Planner")
-    subparsers = parser.add_subparsers(dest="cmd")
+    if mode in {"p", "f", "c"}:
+        from .core.food import show_top_foods
+        show_top_foods(mode, None)
+        return
+    from .core.food_index import get_food_index
+    for i, name in enumerate(sorted(get_food_index().foods), 1):
+        print(f"  {i:>3}. {name}")
 
-    init_parser = subparsers.add_parser("init")
-    init_parser.add_argument("date", nargs="?", default=None)
 
-    check_parser = subparsers.add_parser("check")
-    check_parser.add_argument("task_name")
+def handle_food_top(args):
+    """
+    CLI handler to list the foods highest in a nutrient or ratio.
+    Args:
+        args: argparse.Namespace with by and k.
+    Returns:
+        None
+    """
+    from .core.food import show_top_foods
+    show_top_foods(args.by, args.k)
 
-    uncheck_parser = subparsers.add_parser("uncheck")
-    uncheck_parser.add_argument("task_name")
 
-    show_parser = subparsers.add_parser("show")
-    show_parser.add_argument("date", nargs="?", default=None)
-    show_parser.add_argument("type", type=fuzzy_show_type, nargs="?",
-                             default="all")
+def handle_food_range(args):
+    """
+    CLI handler to list the foods whose nutrient or ratio is in a range.
+    Args:
+        args: argparse.Namespace with by, low, high and limit.
+    Returns:
+        None
+    """
+    from .core.food import show_food_range
+    show_food_range(args.by, args.low, args.high, args.limit)
 
-    plan_parser = subparsers.add_parser("plan")
-    plan_parser.add_argument("task")
-    plan_parser.add_argument("start")
-    plan_parser.add_argument("end", nargs='?', default=None)
 
-    add_goal_parser = subparsers.add_parser("add-goal")
-    add_goal_parser.add_argument("section")
-    add_goal_parser.add_argument("text")
+def handle_food_compile(args):
+    """
+    CLI handler to build the memory-mapped food store.
+    Args:
+        args: argparse.Namespace (unused).
+    Returns:
+        None
+    """
+    from .core.food import compile_foods
+    compile_foods()
 
-    goal_check_parser = subparsers.add_parser("check-goal")
-    goal_check_parser.add_argument("section")
-    goal_check_parser.add_argument("text")
 
-    goal_uncheck_parser = subparsers.add_parser("uncheck-goal")
-    goal_uncheck_parser.add_argument("section")
-    goal_uncheck_parser.add_argument("text")
+def handle_food_import(args):
+    """
+    CLI handler to import foods from a CSV file.
+    Args:
+        args: argparse.Namespace with file and dry_run.
+    Returns:
+        None
+    """
+    from .core.food_import import import_foods
+    import_foods(args.file, dry_run=args.dry_run)
+
+
+def handle_suggest(args):
+    """
+    CLI handler to suggest foods for the macros left today.
+    Args:
+        args: argparse.Namespace with date, foods, count and
+            prefer_logged.
+    Returns:
+        None
+    """
+    from .core.suggest import show_suggestions
+    show_suggestions(args.date, args.foods, args.count, args.prefer_logged)
+
+
+def handle_metrics(args):
+    """
+    CLI handler to print metrics in Prometheus text format, fetched
+    from the running web app or taken from this process.
+    Args:
+        args: argparse.Namespace with url and local.
+    Returns:
+        None
+    """
+    from . import metrics
+    if args.local:
+        print(metrics.render_prometheus(), end="")
+        return
+    from urllib.error import URLError
+    from urllib.request import urlopen
+    try:
+        with urlopen(args.url, timeout=5) as resp:
+            print(resp.read().decode("utf-8"), end="")
+    except (URLError, OSError) as e:
+        print(f"[x] Could not fetch {args.url}: {e}")
+        print("[!] Is the web app running? Use --local in interactive "
+              "mode for this process's metrics.")
+
+
+def handle_init(args):
+    """
+    CLI handler to initialize a day's planner.
+    Args:
+        args: argparse.Namespace with optional date argument.
+    Returns:
+        None
+    """
+    from .core.routine import init_day
+    init_day(args.date)
+
 
-    food_parser = subparsers.add_parser("add-food")
-    food_parser.add_argument("meal")
-    food_parser.add_argument("name")
-    food_parser.add_argument("weight", type=float)
+def handle_check(args):
+    """
+    CLI handler to check or uncheck a routine task.
+    Args:
+        args: argparse.Namespace with task_name and status.
+    Returns:
+        None
+    """
+    from .core.routine import check_by_name
+    check_by_name(args.task_name, status=args.status)
 
-    food_info_parser = subparsers.add_parser("add-food-info")
-    food_info_parser.add_argument("name")
-    food_info_parser.add_argument("protein", type=float)
-    food_info_parser.add_argument("fat", type=float)
-    food_info_parser.add_argument("carbon", type=float)
 
-    water_parser = subparsers.add_parser("add-water")
-    water_parser.add_argument("ml")
+def handle_show(args):
+    """
+    CLI handler to display a day's planner.
+    Args:
+        args: argparse.Namespace with optional date, type and watch.
+    Returns:
+        None
+    """
+    date_str = args.date or today()
+    if args.watch:
+        if args.type != "all":
+            print("[!] --watch only supports 'show all'.")
+            return
+        from .display.summary import watch_all_columns
+        watch_all_columns(date_str)
+    elif args.type == "all":
+        from .display.summary import show_all_columns
+        show_all_columns(date_str)
+    elif args.type == "routine":
+        from .display.routine import show_routine
+        show_routine(date_str)
+    elif args.type == "plan":
+        from .display.plan import show_plan
+        show_plan(date_str)
+    elif args.type == "goals":
+        from .display.goals import show_goals
+        show_goals(date_str)
+    elif args.type == "food":
+        from .display.food import show_food
+        show_food(date_str)
+    elif args.type == "summary":
+        from .core.routine import show_summary
+        show_summary()
 
-    archive_parser = subparsers.add_parser("archive")
-    archive_parser.add_argument("date", nargs="?", default=None)
-    archive_parser.set_defaults(func=handle_archive)
 
-    sort_parser = subparsers.add_parser("sort-food-db")
-    sort_parser.add_argument("mode", nargs="?", default="n")
-    sort_parser.set_defaults(func=handle_sort_food_db)
+def show_type(value):
+    """
+    argparse type for the `show` section, resolved by fuzzy matching.
+    Args:
+        value (str): Section name or abbreviation.
+    Returns:
+        str: Canonical section name.
+    """
+    from .core.routine import fuzzy_show_type
+    return fuzzy_show_type(value)
 
-    subparsers.add_parser("interactive")
 
-    args = parser.parse_args()
+def handle_plan(args):
+    """
+    CLI handler to plan a task over a range of hours.
+    Args:
+        args: argparse.Namespace with task, start and optional end.
+    Returns:
+        None
+    """
+    from .core.routine import plan_hours
+    plan_hours(args.task, args.start, args.end)
+
+
+def handle_add_goal(args):
+    """
+    CLI handler to add a goal.
+    Args:
+        args: argparse.Namespace with section and text.
+    Returns:
+        None
+    """
+    from .core.goals import add_goal
+    add_goal(args.section, args.text)
+
+
+def handle_check_goal(args):
+    """
+    CLI handler to check or uncheck a goal.
+    Args:
+        args: argparse.Namespace with section, text and status.
+    Returns:
+        None
+    """
+    from .core.goals import mark_goal_by_name
+    mark_goal_by_name(args.section, args.text, status=args.status)
+
+
+def handle_add_food(args):
+    """
+    CLI handler to log a food in a meal.
+    Args:
+        args: argparse.Namespace with meal, name and weight.
+    Returns:
+        None
+    """
+    from .core.food import add_food
+    add_food(args.meal, args.name, args.weight)
+
+
+def handle_add_food_info(args):
+    """
+    CLI handler to add a food to the database.
+    Args:
+        args: argparse.Namespace with name, protein, fat and carbon.
+    Returns:
+        None
+    """
+    from .core.food import add_food_info
+    add_food_info(args.name, args.protein, args.fat, args.carbon)
+
+
+def handle_add_water(args):
+    """
+    CLI handler to log drinking water.
+    Args:
+        args: argparse.Namespace with ml.
+    Returns:
+        None
+    """
+    from .core.hydration import add_water
+    add_water(args.ml)
+
+
+def handle_help(args):
+    """
+    CLI handler to print usage examples.
+    Args:
+        args: argparse.Namespace (unused).
+    Returns:
+        None
+    """
+    from .core.routine import print_help_message
+    print_help_message()
+
+
+def handle_interactive(args):
+    """
+    CLI handler to start the interactive shell.
+    Args:
+        args: argparse.Namespace (unused).
+    Returns:
+        None
+    """
+    interactive_mode()
+
+
+# Subcommand name -> function adding its arguments, in help order
+_subcommands = {}
+_parsers = {}
+
+
+def subcommand(name):
+    """
+    Register a function that configures a subcommand's parser.
+    Args:
+        name (str): Canonical command name.
+    Returns:
+        callable: Decorator storing the function under name.
+    """
+    def register(func):
+        _subcommands[name] = func
+        return func
+    return register
+
+
+@subcommand("init")
+def _init_args(p):
+    p.add_argument("date", nargs="?", default=None)
+    p.set_defaults(func=handle_init)
+
+
+@subcommand("check")
+def _check_args(p):
+    p.add_argument("task_name")
+    p.set_defaults(func=handle_check, status=True)
+
+
+@subcommand("uncheck")
+def _uncheck_args(p):
+    p.add_argument("task_name")
+    p.set_defaults(func=handle_check, status=False)
+
+
+@subcommand("show")
+def _show_args(p):
+    p.add_argument("date", nargs="?", default=None)
+    p.add_argument("type", type=show_type, nargs="?", default="all")
+    p.add_argument("--watch", action="store_true",
+                   help="Redraw 'all' whenever the day changes")
+    p.set_defaults(func=handle_show)
+
+
+@subcommand("plan")
+def _plan_args(p):
+    p.add_argument("task")
+    p.add_argument("start")
+    p.add_argument("end", nargs='?', default=None)
+    p.set_defaults(func=handle_plan)
+
+
+@subcommand("add-goal")
+def _add_goal_args(p):
+    p.add_argument("section")
+    p.add_argument("text")
+    p.set_defaults(func=handle_add_goal)
+
+
+@subcommand("check-goal")
+def _check_goal_args(p):
+    p.add_argument("section")
+    p.add_argument("text")
+    p.set_defaults(func=handle_check_goal, status=True)
+
+
+@subcommand("uncheck-goal")
+def _uncheck_goal_args(p):
+    p.add_argument("section")
+    p.add_argument("text")
+    p.set_defaults(func=handle_check_goal, status=False)
+
+
+@subcommand("add-food")
+def _add_food_args(p):
+    p.add_argument("meal")
+    p.add_argument("name")
+    p.add_argument("weight", type=float)
+    p.set_defaults(func=handle_add_food)
+
+
+@subcommand("add-food-info")
+def _add_food_info_args(p):
+    p.add_argument("name")
+    p.add_argument("protein", type=float)
+    p.add_argument("fat", type=float)
+    p.add_argument("carbon", type=float)
+    p.set_defaults(func=handle_add_food_info)
+
+
+@subcommand("add-water")
+def _add_water_args(p):
+    p.add_argument("ml")
+    p.set_defaults(func=handle_add_water)
+
+
+@subcommand("archive")
+def _archive_args(p):
+    from .constants import ARCHIVE_REMOTE, ARCHIVE_BRANCH
+    p.add_argument("date", nargs="?", default=None)
+    p.add_argument("--since", default=None)
+    p.add_argument("--until", default=None)
+    p.add_argument("--no-push", dest="push", action="store_false")
+    p.add_argument("--remote", default=ARCHIVE_REMOTE)
+    p.add_argument("--branch", default=ARCHIVE_BRANCH)
+    p.set_defaults(func=handle_archive)
+
+
+@subcommand("compact")
+def _compact_args(p):
+    p.add_argument("date", nargs="?", default=None)
+    p.set_defaults(func=handle_compact)
+
+
+@subcommand("migrate")
+def _migrate_args(p):
+    p.set_defaults(func=handle_migrate)
+
+
+@subcommand("stats")
+def _stats_args(p):
+    p.add_argument("start", nargs="?", default=None)
+    p.add_argument("end", nargs="?", default=None)
+    p.add_argument("--window", type=int, default=7)
+    p.set_defaults(func=handle_stats)
+
+
+@subcommand("sort-food-db")
+def _sort_food_db_args(p):
+    p.add_argument("mode", nargs="?", default="n")
+    p.set_defaults(func=handle_sort_food_db)
+
+
+@subcommand("food-db")
+def _food_db_args(p):
+    actions = p.add_subparsers(dest="action", required=True)
+    top = actions.add_parser("top", help="Foods highest in a nutrient")
+    top.add_argument("by", help="protein, fat, carbon, kcal, "
+                     "protein_per_kcal, fat_per_kcal or carbon_per_kcal")
+    top.add_argument("-k", type=int, default=10)
+    top.set_defaults(func=handle_food_top)
+    rng = actions.add_parser("range", help="Foods with a nutrient in "
+                             "[low, high]")
+    rng.add_argument("by")
+    rng.add_argument("low", type=float, nargs="?", default=None)
+    rng.add_argument("high", type=float, nargs="?", default=None)
+    rng.add_argument("--limit", type=int, default=None)
+    rng.set_defaults(func=handle_food_range)
+    compile_ = actions.add_parser(
+        "compile", help="Build the memory-mapped food store")
+    compile_.set_defaults(func=handle_food_compile)
+    import_ = actions.add_parser(
+        "import", help="Import foods from a CSV file (name, protein, "
+        "fat, carbon per 100g)")
+    import_.add_argument("file")
+    import_.add_argument("--dry-run", action="store_true")
+    import_.set_defaults(func=handle_food_import)
+
+
+@subcommand("suggest")
+def _suggest_args(p):
+    p.add_argument("date", nargs="?", default=None)
+    p.add_argument("--foods", type=int, choices=(1, 2, 3), default=3,
+                   help="Maximum foods per suggestion")
+    p.add_argument("-n", "--count", type=int, default=3)
+    p.add_argument("--prefer-logged", action="store_true",
+                   help="Favor foods logged in the last 30 days")
+    p.set_defaults(func=handle_suggest)
+
+
+@subcommand("metrics")
+def _metrics_args(p):
+    from .constants import METRICS_URL
+    p.add_argument("--url", default=METRICS_URL)
+    p.add_argument("--local", action="store_true",
+                   help="Metrics of this process instead of the web app")
+    p.set_defaults(func=handle_metrics)
+
+
+@subcommand("help")
+def _help_args(p):
+    p.set_defaults(func=handle_help)
+
+
+@subcommand("interactive")
+def _interactive_args(p):
+    p.set_defaults(func=handle_interactive)
+
+
+def build_parser(cmd=None):
+    """
+    Build the argparse tree, or only the branch for one subcommand, and
+    reuse it for later commands.
+    Args:
+        cmd (str, optional): Canonical subcommand about to run. Defaults
+            to building every subcommand (needed for top-level help and
+            error messages).
+    Returns:
+        argparse.ArgumentParser: The planner's argument parser.
+    """
+    names = [cmd] if cmd in _subcommands else list(_subcommands)
+    key = cmd if cmd in _subcommands else None
+    parser = _parsers.get(key)
+    if parser is not None:
+        return parser
+    parser = argparse.ArgumentParser(description="Daily Planner")
+    subparsers = parser.add_subparsers(dest="cmd")
+    for name in names:
+        _subcommands[name](subparsers.add_parser(name))
+    _parsers[key] = parser
+    return parser
+
+
+def main(argv=None):
+    """
+    Parse a planner command line and run it.
+    Args:
+        argv (list, optional): Arguments without the program name.
+            Defaults to sys.argv[1:].
+    Returns:
+        None
+    """
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if argv:
+        try:
+            argv[0] = resolve_cmd(argv[0])
+        except ValueError as e:
+            print(e)
+            sys.exit(1)
+    parser = build_parser(argv[0] if argv else None)
+    args = parser.parse_args(argv)
     if hasattr(args, 'func'):
         args.func(args)
-        return
-    if args.cmd == "init":
-        init_day(args.date)
-    elif args.cmd == "check":
-        check_by_name(args.task_name, status=True)
-    elif args.cmd == "uncheck":
-        check_by_name(args.task_name, status=False)
-    elif args.cmd == "show":
-        file_path = (
-            TODAY_FILE if args.date is None
-            else os.path.join(DATA_DIR, f"{args.date}.json")
-        )
-        if args.type == "all":
-            show_all_columns(file_path)
-        elif args.type == "routine":
-            show_routine(file_path)
-        elif args.type == "plan":
-            show_plan(file_path)
-        elif args.type == "goals":
-            show_goals(file_path)
-        elif args.type == "food":
-            show_food(file_path)
-        elif args.type == "summary":
-            show_summary()
-    elif args.cmd == "plan":
-        plan_hours(args.task, args.start, args.end)
-    elif args.cmd == "add-goal":
-        add_goal(args.section, args.text)
-    elif args.cmd == "check-goal":
-        mark_goal_by_name(args.section, args.text, status=True)
-    elif args.cmd == "uncheck-goal":
-        mark_goal_by_name(args.section, args.text, status=False)
-    elif args.cmd == "add-food":
-        add_food(args.meal, args.name, args.weight)
-    elif args.cmd == "add-food-info":
-        add_food_info(args.name, args.protein, args.fat, args.carbon)
-    elif args.cmd == "add-water":
-        if args:
-            add_water(args.ml)
-        else:
-            print("[!] Please provide the amount of water in ml.")
-    elif args.cmd == "help":
-        print_help_message()
-    elif args.cmd == "interactive":
-        interactive_mode()
     else:
         parser.print_help()
@@ -0,0 +1,128 @@
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from .constants import DATA_DIR, TIMEZONE
+
+
+class Clock:
+    """
+    Source of "now" and "today" in the planner's configured timezone.
+
+    The current date is cached together with the timestamp of the next
+    midnight, so today() costs one time.time() call and still rolls
+    over correctly in long-running processes (Flask, interactive mode).
+    """
+
+    def __init__(self, tz_name=TIMEZONE):
+        self.tz_name = tz_name
+        self._tz = None
+        self._today = None
+        self._rollover = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def tz(self):
+        """
+        The tzinfo for tz_name ("local" means the system timezone).
+        pytz is imported on first use to keep CLI startup fast.
+        """
+        if self._tz is None and self.tz_name != "local":
+            import pytz
+            self._tz = pytz.timezone(self.tz_name)
+        return self._tz
+
+    def now(self):
+        """
+        Get the current time.
+        Args:
+            None
+        Returns:
+            datetime: Aware datetime in the configured timezone (naive
+                local time for "local").
+        """
+        return datetime.now(self.tz)
+
+    def today(self):
+        """
+        Get the current date, recomputed only after midnight passes.
+        Args:
+            None
+        Returns:
+            str: Date in 'YYYY-MM-DD' format.
+        """
+        if time.time() >= self._rollover:
+            with self._lock:
+                now = self.now()
+                self._today = now.date().isoformat()
+                self._rollover = self._midnight_after(now)
+        return self._today
+
+    def tomorrow(self):
+        """
+        Get the date after today.
+        Args:
+            None
+        Returns:
+            str: Date in 'YYYY-MM-DD' format.
+        """
+        d = datetime.strptime(self.today(), "%Y-%m-%d").date()
+        return (d + timedelta(days=1)).isoformat()
+
+    def seconds_until_rollover(self):
+        """
+        Get the time left until the date changes.
+        Args:
+            None
+        Returns:
+            float: Seconds until the next midnight.
+        """
+        self.today()
+        return max(0.0, self._rollover - time.time())
+
+    def day_file(self, date_str=None):
+        """
+        Get the path of a day's JSON file.
+        Args:
+            date_str (str, optional): Date in 'YYYY-MM-DD' format.
+                Defaults to today.
+        Returns:
+            str: Path such as logs/2025-07-24.json.
+        """
+        return os.path.join(DATA_DIR, f"{date_str or self.today()}.json")
+
+    def _midnight_after(self, now):
+        midnight = datetime.combine(now.date() + timedelta(days=1),
+                                    datetime.min.time())
+        if self.tz is None:
+            return midnight.timestamp()
+        # localize() picks the right UTC offset across DST changes
+        return self.tz.localize(midnight).timestamp()
+
+
+_clock = None
+
+
+def get_clock():
+    """
+    Get the shared clock for the timezone set by PLANNER_TZ.
+    Args:
+        None
+    Returns:
+        Clock: Shared clock instance.
+    """
+    global _clock
+    if _clock is None:
+        _clock = Clock()
+    return _clock
+
+
+def today():
+    """
+    Get today's date in the planner's timezone.
+    Args:
+        None
+    Returns:
+        str: Date in 'YYYY-MM-DD' format.
+    """
+    return get_clock().today()
@@ -1,15 +1,45 @@
-from datetime import date
 import os
 
 # Directory paths
 DATA_DIR = "logs"
 DEFAULTS_DIR = "defaults"
 
+# Storage backend: "json" rewrites the whole day file on each change,
+# "journal" appends mutation records to logs/<date>.journal.jsonl,
+# "sqlite" keeps days and the food DB in SQLITE_FILE
+STORAGE_MODE = os.environ.get("PLANNER_STORAGE", "json")
+SQLITE_FILE = os.environ.get("PLANNER_DB", "planner.db")
+
+# Timezone that decides which day "today" is ("local" for the system
+# timezone); see clock.py for the current date and day file path
+TIMEZONE = os.environ.get("PLANNER_TZ", "Asia/Taipei")
+
+# Compact columnar copy of past days, one segment file per month,
+# read by analytics instead of parsing every JSON file
+COLUMNAR_DIR = os.path.join(DATA_DIR, "columnar")
+
+# Archiving commits day files to git; the record lists what has been
+# archived so repeated runs only pick up new or changed days
+ARCHIVE_RECORD_FILE = os.path.join(DATA_DIR, ".archived.json")
+# Present while an archive commit still has to be pushed
+ARCHIVE_PENDING_FILE = os.path.join(DATA_DIR, ".archive-pending.json")
+ARCHIVE_REMOTE = os.environ.get("PLANNER_ARCHIVE_REMOTE", "origin")
+ARCHIVE_BRANCH = os.environ.get("PLANNER_ARCHIVE_BRANCH", "main")
+
+# Metrics endpoint of the running web app, read by `planner metrics`
+METRICS_URL = os.environ.get("PLANNER_METRICS_URL",
+                             "http://127.0.0.1:5050/metrics")
+
 # Default template files
 ROUTINE_FILE = os.path.join(DEFAULTS_DIR, "routine.json")
 FOOD_DB_FILE = os.path.join(DEFAULTS_DIR, "food_db.json")
 USER_PROFILE_FILE = os.path.join(DEFAULTS_DIR, "user_profile.json")
 
-# Today’s data file path (e.g., logs/2025-07-24.json)
-TODAY_FILENAME = f"{date.today()}.json"
-TODAY_FILE = os.path.join(DATA_DIR, TODAY_FILENAME)
+# Sorted nutrient indexes over the food database, one memory-mapped
+# file per metric (derived, rebuilt when the database changes outside
+# add-food-info)
+NUTRIENT_INDEX_DIR = os.path.join(DEFAULTS_DIR, "food_db.index")
+
+# Memory-mapped food store built by `planner food-db compile`; lookups
+# use it while it matches the food database it was compiled from
+COMPILED_FOOD_DIR = os.path.join(DEFAULTS_DIR, "food_db.compiled")
@@ -1,4 +1,30 @@
-from .routine import init_day, check_by_name, plan_hours, match_one, normalize_section, fuzzy_show_type, show_summary, print_help_message
-from .goals import add_goal, mark_goal_by_name, list_goals
-from .food import add_food, add_food_info, search_food_matches, normalize_meal
-from .hydration import add_water
+from ..lazy import lazy_exports
+
+# Submodules load on first use, so a command only pays for what it runs
+__getattr__, __dir__ = lazy_exports(__name__, {
+    "init_day": "routine",
+    "ensure_day": "routine",
+    "check_by_name": "routine",
+    "plan_hours": "routine",
+    "match_one": "routine",
+    "normalize_section": "routine",
+    "fuzzy_show_type": "routine",
+    "show_summary": "routine",
+    "print_help_message": "routine",
+    "add_goal": "goals",
+    "mark_goal_by_name": "goals",
+    "list_goals": "goals",
+    "add_food": "food",
+    "add_food_info": "food",
+    "search_food_matches": "food",
+    "normalize_meal": "food",
+    "food_record": "food",
+    "resolve_food": "food",
+    "show_top_foods": "food",
+    "show_food_range": "food",
+    "compile_foods": "food",
+    "import_foods": "food_import",
+    "add_water": "hydration",
+    "suggest_foods": "suggest",
+    "suggest_for_day": "suggest",
+})
@@ -0,0 +1,297 @@
+from datetime import date
+import numpy as np
+from ..clock import today
+from ..storage import get_storage
+from ..storage.columnar import ColumnarStore, day_number, day_string
+from ..storage.ops import food_totals
+from .profile import get_targets
+
+NUTRIENTS = ("protein", "fat", "carbon")
+SERIES = NUTRIENTS + ("water",)
+WEEKDAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+
+
+class DayArrays:
+    """
+    Columnar view of a date range of day documents.
+
+    Every array has one row per calendar day from start to end; days
+    without a planner are NaN in the float series and False in
+    `present`.
+
+    Attributes:
+        dates (np.ndarray): datetime64[D] dates.
+        present (np.ndarray): bool, True where a planner exists.
+        totals (dict): 'protein', 'fat', 'carbon', 'water' float arrays.
+        task_names (list): 'Section/Task' labels, one per column.
+        tasks_done (np.ndarray): bool matrix (days x tasks).
+        tasks_present (np.ndarray): bool matrix, task listed that day.
+        goals_done (np.ndarray): int goals completed per day.
+        goals_total (np.ndarray): int goals listed per day.
+    """
+
+    def __init__(self, start, end, days, segments=()):
+        n = (end - start).days + 1
+        self.dates = np.arange(np.datetime64(start), np.datetime64(end) + 1,
+                               dtype="datetime64[D]")
+        self.present = np.zeros(n, dtype=bool)
+        self.totals = {k: np.full(n, np.nan) for k in SERIES}
+        self.goals_done = np.zeros(n, dtype=np.int64)
+        self.goals_total = np.zeros(n, dtype=np.int64)
+        columns = {}
+        # Task cells arrive in chunks: one per segment, one for documents
+        chunks = []
+        for segment in segments:
+            self._add_segment(segment, start, n, columns, chunks)
+        rows, cols, done_flags = [], [], []
+        for date_str, data in days:
+            i = (date.fromisoformat(date_str) - start).days
+            self.present[i] = True
+            sums = food_totals(data)["day"]
+            for k in NUTRIENTS:
+                self.totals[k][i] = sums[k]
+            self.totals["water"][i] = data.get("water", 0)
+            for section, items in data.get("tasks", {}).items():
+                done = data.get("done", {}).get(section, [])
+                for j, task in enumerate(items):
+                    label = f"{section}/{task}"
+                    col = columns.setdefault(label, len(columns))
+                    rows.append(i)
+                    cols.append(col)
+                    done_flags.append(bool(done[j]) if j < len(done)
+                                      else False)
+            for goals in data.get("goals", {}).values():
+                self.goals_total[i] += len(goals)
+                self.goals_done[i] += sum(1 for g in goals if g.get("done"))
+        chunks.append((np.array(rows, dtype=np.int64),
+                       np.array(cols, dtype=np.int64),
+                       np.array(done_flags, dtype=bool)))
+        self.task_names = list(columns)
+        self.tasks_done = np.zeros((n, len(columns)), dtype=bool)
+        self.tasks_present = np.zeros((n, len(columns)), dtype=bool)
+        for rows, cols, done_flags in chunks:
+            self.tasks_present[rows, cols] = True
+            self.tasks_done[rows, cols] = done_flags
+
+    def _add_segment(self, segment, start, n, columns, chunks):
+        # Vectorized fill from a memory-mapped columnar segment.
+        day = np.frombuffer(segment.column("day"), dtype=np.int32)
+        idx = day.astype(np.int64) - day_number(start.isoformat())
+        keep = (idx >= 0) & (idx < n)
+        if not keep.any():
+            return
+        self.present[idx[keep]] = True
+        for k in SERIES:
+            values = np.frombuffer(segment.column(k), dtype=np.float64)
+            self.totals[k][idx[keep]] = values[keep]
+        for k in ("goals_done", "goals_total"):
+            values = np.frombuffer(segment.column(k), dtype=np.int32)
+            getattr(self, k)[idx[keep]] = values[keep]
+        offsets = np.frombuffer(segment.column("task_offsets"),
+                                dtype=np.uint32).astype(np.int64)
+        counts = np.diff(offsets)
+        task_rows = np.repeat(idx, counts)
+        task_keep = np.repeat(keep, counts)
+        # Map the segment's string ids to this range's task columns
+        ids = np.frombuffer(segment.column("task_ids"), dtype=np.uint32)
+        names = segment.strings()
+        mapping = np.full(len(names), -1, dtype=np.int64)
+        for string_id in np.unique(ids[task_keep]):
+            mapping[string_id] = columns.setdefault(names[string_id],
+                                                    len(columns))
+        done = np.frombuffer(segment.column("task_done"), dtype=np.uint8)
+        chunks.append((task_rows[task_keep], mapping[ids[task_keep]],
+                       done[task_keep] != 0))
+
+
+def load_range(start=None, end=None, storage=None, columnar=True):
+    """
+    Load a date range of day documents into NumPy arrays.
+    Past days are read from the memory-mapped columnar store (refreshed
+    incrementally first); today and later days are parsed from storage.
+    Args:
+        start (str, optional): First date 'YYYY-MM-DD'. Defaults to the
+            oldest stored day.
+        end (str, optional): Last date 'YYYY-MM-DD'. Defaults to the
+            newest stored day.
+        storage (Storage, optional): Backend. Defaults to get_storage().
+        columnar (bool): Use the columnar store. Defaults to True.
+    Returns:
+        DayArrays or None: Arrays for the range, None if it holds no days.
+    """
+    storage = storage or get_storage()
+    segments = []
+    live_start = start
+    if columnar:
+        cutoff = today()
+        try:
+            store = ColumnarStore(storage)
+            store.refresh(cutoff)
+            segments = store.segments(start, end)
+            live_start = max(start or cutoff, cutoff)
+        except OSError:
+            segments = []
+    days = list(storage.iter_days(live_start, end))
+    known = [date.fromisoformat(d) for d, _ in days]
+    for segment in segments:
+        stored = segment.column("day")
+        if len(stored):
+            known += [date.fromisoformat(day_string(stored[0])),
+                      date.fromisoformat(day_string(stored[-1]))]
+    if not known:
+        return None
+    first = date.fromisoformat(start) if start else min(known)
+    last = date.fromisoformat(end) if end else max(known)
+    if last < first:
+        return None
+    arrays = DayArrays(first, last, days, segments)
+    return arrays if arrays.present.any() else None
+
+
+def rolling_mean(values, window):
+    """
+    Trailing rolling mean over calendar days, ignoring missing (NaN) days.
+    Args:
+        values (np.ndarray): Float series with NaN for missing days.
+        window (int): Window length in days.
+    Returns:
+        np.ndarray: Mean of the valid values in each trailing window
+            (NaN where the window has none).
+    """
+    valid = ~np.isnan(values)
+    sums = np.concatenate(([0.0], np.cumsum(np.where(valid, values, 0.0))))
+    counts = np.concatenate(([0], np.cumsum(valid)))
+    idx = np.arange(1, len(values) + 1)
+    lo = np.maximum(idx - window, 0)
+    win_sums = sums[idx] - sums[lo]
+    win_counts = counts[idx] - counts[lo]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(win_counts > 0, win_sums / win_counts, np.nan)
+
+
+def _round(values, digits=1):
+    return [None if np.isnan(v) else round(float(v), digits) for v in values]
+
+
+def compute_stats(start=None, end=None, window=7, storage=None):
+    """
+    Compute multi-day nutrition, hydration, routine and goal statistics.
+    Args:
+        start (str, optional): First date 'YYYY-MM-DD'.
+        end (str, optional): Last date 'YYYY-MM-DD'.
+        window (int): Rolling average window in days. Defaults to 7.
+        storage (Storage, optional): Backend. Defaults to get_storage().
+    Returns:
+        dict: JSON-serializable statistics, or an empty dict if the
+            range holds no days.
+    """
+    arrays = load_range(start, end, storage)
+    if arrays is None:
+        return {}
+    present = arrays.present
+    # Targets can change over time (profile "history"), so each day is
+    # measured against the target that applied on it.
+    day_targets = [get_targets(str(d)) for d in arrays.dates[present]]
+    days_logged = int(present.sum())
+
+    adherence = {}
+    averages = {}
+    rolling = {}
+    for key in SERIES:
+        values = arrays.totals[key]
+        logged = values[present]
+        target = np.array([t[key] for t in day_targets])
+        averages[key] = round(float(logged.mean()), 1)
+        rolling[key] = _round(rolling_mean(values, window))
+        if (target > 0).all():
+            ratio = logged / target
+            adherence[key] = {
+                "target": round(float(target.mean()), 1),
+                "mean_percent": round(float(ratio.mean() * 100), 1),
+                "days_met": int((ratio >= 1.0).sum()),
+            }
+
+    weekday = (arrays.dates.astype("datetime64[D]").view("int64") - 4) % 7
+    wd = weekday[present]
+    day_counts = np.bincount(wd, minlength=7)
+    by_weekday = {}
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for key in SERIES:
+            sums = np.bincount(wd, weights=arrays.totals[key][present],
+                               minlength=7)
+            by_weekday[key] = dict(zip(WEEKDAYS, _round(sums / day_counts)))
+        task_rate = arrays.tasks_done.sum(axis=1) / np.maximum(
+            arrays.tasks_present.sum(axis=1), 1)
+        rate_sums = np.bincount(wd, weights=task_rate[present], minlength=7)
+        by_weekday["task_completion"] = dict(
+            zip(WEEKDAYS, _round(rate_sums / day_counts * 100)))
+
+    done_counts = arrays.tasks_done.sum(axis=0)
+    listed_counts = arrays.tasks_present.sum(axis=0)
+    tasks = {
+        name: round(float(done_counts[j] / listed_counts[j] * 100), 1)
+        for j, name in enumerate(arrays.task_names) if listed_counts[j]
+    }
+    goals_total = int(arrays.goals_total.sum())
+    goals_done = int(arrays.goals_done.sum())
+
+    return {
+        "start": str(arrays.dates[0]),
+        "end": str(arrays.dates[-1]),
+        "days_logged": days_logged,
+        "window": window,
+        "averages": averages,
+        "adherence": adherence,
+        "rolling": {"dates": [str(d) for d in arrays.dates], **rolling},
+        "by_weekday": by_weekday,
+        "task_completion": tasks,
+        "goals": {
+            "done": goals_done,
+            "total": goals_total,
+            "percent": round(goals_done / goals_total * 100, 1)
+            if goals_total else 0.0,
+        },
+    }
+
+
+def show_stats(start=None, end=None, window=7):
+    """
+    Print a multi-day statistics report.
+    Args:
+        start (str, optional): First date 'YYYY-MM-DD'.
+        end (str, optional): Last date 'YYYY-MM-DD'.
+        window (int): Rolling average window in days. Defaults to 7.
+    Returns:
+        None
+    """
+    stats = compute_stats(start, end, window)
+    if not stats:
+        print("[!] No planner days in that range.")
+        return
+    print(f"[Stats] {stats['start']} .. {stats['end']} "
+          f"({stats['days_logged']} days logged)")
+    print("\n  Daily averages vs targets:")
+    for key in SERIES:
+        unit = "ml" if key == "water" else "g"
+        avg = stats["averages"][key]
+        line = f"    {key.capitalize():<8} {avg:>8.1f}{unit}"
+        adh = stats["adherence"].get(key)
+        if adh:
+            line += (f"  {adh['mean_percent']:>5.1f}% of {adh['target']:.1f}"
+                     f"{unit}, met on {adh['days_met']} days")
+        print(line)
+    print(f"\n  Last {window}-day rolling average:")
+    for key in SERIES:
+        last = next((v for v in reversed(stats["rolling"][key])
+                     if v is not None), None)
+        print(f"    {key.capitalize():<8} {last if last is not None else '-'}")
+    print("\n  By weekday (task completion %):")
+    rates = stats["by_weekday"]["task_completion"]
+    print("    " + "  ".join(
+        f"{d} {'-' if v is None else f'{v:.0f}'}" for d, v in rates.items()))
+    print("\n  Routine completion:")
+    for name, pct in sorted(stats["task_completion"].items(),
+                            key=lambda x: -x[1]):
+        print(f"    {pct:>5.1f}%  {name}")
+    g = stats["goals"]
+    print(f"\n  Goals: {g['done']}/{g['total']} done ({g['percent']}%)")
@@ -1,41 +1,214 @@
+import hashlib
+import os
 import subprocess
 from datetime import datetime
-import sys
+from .. import metrics
+from ..clock import today
+from ..constants import (
+    DATA_DIR, ARCHIVE_RECORD_FILE, ARCHIVE_PENDING_FILE, ARCHIVE_REMOTE,
+    ARCHIVE_BRANCH
+)
+from ..file_utils import read_json, write_json
+from ..storage import journal
+from ..storage.locks import file_lock
+from ..storage.json_files import DAY_FILE_RE
 
 
-def get_today_filename(date_str=None):
+def valid_date(date_str):
     """
-    Get the filename for today's planner or a specific date.
+    Check that a string is a 'YYYY-MM-DD' date.
     Args:
-        date_str (str, optional): Date string in 'YYYY-MM-DD' format.
+        date_str (str): Date string.
     Returns:
-        str: The filename for the planner JSON file.
+        bool: True if valid.
     """
-    if date_str:
-        try:
-            datetime.strptime(date_str, "%Y-%m-%d")
-            return f"{date_str}.json"
-        except ValueError:
-            print(f"[x] Invalid date format: {date_str}. Use YYYY-MM-DD.")
-            sys.exit(1)
-    return f"{datetime.today().strftime('%Y-%m-%d')}.json"
+    try:
+        datetime.strptime(date_str, "%Y-%m-%d")
+        return True
+    except ValueError:
+        return False
+
+
+def load_archive_record(record_file=ARCHIVE_RECORD_FILE):
+    """
+    Load the record of archived day files.
+    Args:
+        record_file (str): Path of the record.
+    Returns:
+        dict: Mapping of day file path to the sha1 of its archived content.
+    """
+    if not os.path.exists(record_file):
+        return {}
+    return read_json(record_file)
+
+
+def _digest(path):
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def _git(*args, **kwargs):
+    metrics.inc("planner_subprocess_launches_total", command="git")
+    return subprocess.run(["git", *args], **kwargs)
 
 
-def git_commit_and_push(filename):
+def find_unarchived(since=None, until=None, data_dir=DATA_DIR,
+                    record=None):
     """
-    Commit and push a file to the main branch using git.
+    Find day files in a date range that are new or changed since they
+    were last archived. Pending journal records are folded into the day
+    files first so the archived copies are complete.
     Args:
-        filename (str): The file to commit and push.
+        since (str, optional): First date 'YYYY-MM-DD'.
+        until (str, optional): Last date 'YYYY-MM-DD'.
+        data_dir (str): Directory holding the day files.
+        record (dict, optional): Archive record. Defaults to the saved one.
     Returns:
-        None
+        list: (path, sha1) tuples, oldest day first.
     """
+    record = load_archive_record() if record is None else record
+    try:
+        names = sorted(n for n in os.listdir(data_dir)
+                       if DAY_FILE_RE.match(n))
+    except FileNotFoundError:
+        return []
+    pending = []
+    for name in names:
+        date_str = name[:-5]
+        if (since and date_str < since) or (until and date_str > until):
+            continue
+        path = os.path.join(data_dir, name)
+        if os.path.exists(journal.journal_path(path)):
+            with file_lock(path):
+                journal.compact(path)
+        digest = _digest(path)
+        if record.get(path) != digest:
+            pending.append((path, digest))
+    return pending
+
+
+def git_commit(paths, message):
+    """
+    Stage files with one git add and commit them in one commit.
+    If the commit fails (e.g. no git identity is configured) the files
+    are unstaged again so the index is left as it was.
+    Args:
+        paths (list): Files to commit.
+        message (str): Commit message.
+    Returns:
+        bool: True if the files are committed (or already were).
+    """
+    try:
+        _git("add", "--", *paths, check=True)
+    except subprocess.CalledProcessError as e:
+        print(f"[x] Git error: {e}")
+        return False
+    except FileNotFoundError:
+        print("[x] git is not installed.")
+        return False
     try:
-        subprocess.run(["git", "add", filename], check=True)
-        subprocess.run(
-            ["git", "commit", "-m", f"archive: add {filename}"],
-            check=True
-        )
-        subprocess.run(["git", "push", "origin", "main"], check=True)
-        print("[✓] Pushed to GitHub.")
+        staged = _git("diff", "--cached", "--quiet", "--", *paths)
+        if staged.returncode == 0:
+            print("[!] Files already match the last commit.")
+        else:
+            _git("commit", "-q", "-m", message, "--", *paths, check=True)
     except subprocess.CalledProcessError as e:
         print(f"[x] Git error: {e}")
+        _git("reset", "-q", "--", *paths)
+        return False
+    return True
+
+
+def git_push(remote=ARCHIVE_REMOTE, branch=ARCHIVE_BRANCH):
+    """
+    Push HEAD to a remote branch.
+    The full ref name is given so the push also works from a detached
+    HEAD and creates the branch on an empty remote.
+    Args:
+        remote (str): Remote name or URL to push to.
+        branch (str): Remote branch to push HEAD to.
+    Returns:
+        bool: True if the push succeeded.
+    """
+    try:
+        _git("push", "-q", remote, f"HEAD:refs/heads/{branch}", check=True)
+    except subprocess.CalledProcessError as e:
+        print(f"[x] Git push failed: {e}")
+        return False
+    except FileNotFoundError:
+        print("[x] git is not installed.")
+        return False
+    print(f"[✓] Pushed to {remote}/{branch}.")
+    return True
+
+
+def archive_days(since=None, until=None, push=True, remote=ARCHIVE_REMOTE,
+                 branch=ARCHIVE_BRANCH, data_dir=DATA_DIR,
+                 record_file=ARCHIVE_RECORD_FILE,
+                 pending_file=ARCHIVE_PENDING_FILE):
+    """
+    Archive every unarchived day file in a range with one git commit.
+    Days already archived with the same content are skipped, so
+    repeating a run is a no-op. A failed push leaves pending_file
+    behind, and the next run with push on retries it even when there
+    is nothing new to commit.
+    Args:
+        since (str, optional): First date 'YYYY-MM-DD'.
+        until (str, optional): Last date 'YYYY-MM-DD'.
+        push (bool): Push after committing. Defaults to True.
+        remote (str): Remote name or URL to push to.
+        branch (str): Remote branch to push HEAD to.
+        data_dir (str): Directory holding the day files.
+        record_file (str): Path of the archive record.
+        pending_file (str): Marker of a commit not yet pushed.
+    Returns:
+        int: Number of day files archived.
+    """
+    for value in (since, until):
+        if value and not valid_date(value):
+            print(f"[x] Invalid date format: {value}. Use YYYY-MM-DD.")
+            return 0
+    record = load_archive_record(record_file)
+    pending = find_unarchived(since, until, data_dir, record)
+    retry = push and os.path.exists(pending_file)
+    if not pending and not retry:
+        print("[!] Nothing to archive.")
+        return 0
+    if pending:
+        paths = [path for path, _ in pending]
+        first = os.path.basename(paths[0])[:-5]
+        last = os.path.basename(paths[-1])[:-5]
+        span = first if len(paths) == 1 else f"{first}..{last}"
+        if len(paths) == 1:
+            message = f"archive: add {first}"
+        else:
+            message = f"archive: {span} ({len(paths)} days)"
+        if not git_commit(paths, message):
+            return 0
+        record.update(pending)
+        write_json(record_file, record)
+        print(f"[✓] Archived {len(paths)} day(s): {span}")
+    else:
+        print("[!] Nothing new to archive; retrying the last push.")
+    if push:
+        # Marked before pushing so a crash mid-push is retried too.
+        write_json(pending_file, {"remote": remote, "branch": branch})
+        if git_push(remote, branch):
+            os.remove(pending_file)
+        else:
+            print("[!] The commit is kept; the next archive run pushes "
+                  "it again.")
+    return len(pending)
+
+
+def archive_day(date_str=None, **kwargs):
+    """
+    Archive a single day's planner file.
+    Args:
+        date_str (str, optional): Date 'YYYY-MM-DD'. Defaults to today.
+        **kwargs: Passed to archive_days().
+    Returns:
+        int: Number of day files archived (0 or 1).
+    """
+    date_str = date_str or today()
+    return archive_days(date_str, date_str, **kwargs)
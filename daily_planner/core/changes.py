@@ -0,0 +1,186 @@
+import copy
+import queue
+import threading
+import time
+from ..storage import get_storage
+
+# Bookkeeping keys that are not shown to the user.
+IGNORED_KEYS = ("version", "journal_seq")
+
+
+def diff_day(old, new, path=()):
+    """
+    Compute per-field changes between two versions of a day document.
+    Lists that only grew report each appended item; other list edits of
+    a different length replace the whole list.
+    Args:
+        old: Previous value.
+        new: Current value.
+        path (tuple): Path of the values inside the document.
+    Returns:
+        list: Changes as {"path": [...], "value": ...} dicts, with
+            {"path": [...], "deleted": True} for removed keys.
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        changes = []
+        for key, value in new.items():
+            if not path and key in IGNORED_KEYS:
+                continue
+            if key in old:
+                changes.extend(diff_day(old[key], value, path + (key,)))
+            else:
+                changes.append({"path": [*path, key], "value": value})
+        for key in old:
+            if key not in new and (path or key not in IGNORED_KEYS):
+                changes.append({"path": [*path, key], "deleted": True})
+        return changes
+    if isinstance(old, list) and isinstance(new, list):
+        if len(old) == len(new):
+            changes = []
+            for i, (a, b) in enumerate(zip(old, new)):
+                changes.extend(diff_day(a, b, path + (i,)))
+            return changes
+        if len(new) > len(old) and new[:len(old)] == old:
+            return [{"path": [*path, i], "value": new[i]}
+                    for i in range(len(old), len(new))]
+    if old == new:
+        return []
+    return [{"path": list(path), "value": new}]
+
+
+class ChangeFeed:
+    """
+    Shared watcher that turns day document changes into small notices.
+
+    One background thread polls storage.day_etag() for every date that
+    has a subscriber (a stat() call for the JSON backend), so changes
+    written by the CLI, another tab or this process are all noticed
+    the same way. When a tag changes, the day is reloaded once and the
+    per-field diff is put on each subscriber's queue.
+    """
+
+    def __init__(self, storage, interval=0.5):
+        self.storage = storage
+        self.interval = interval
+        # date -> [etag, snapshot, set of subscriber queues]
+        self._watched = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def subscribe(self, date_str):
+        """
+        Start receiving change notices for a day.
+        Args:
+            date_str (str): Date in 'YYYY-MM-DD' format.
+        Returns:
+            queue.Queue: Queue of notice dicts; pass it to unsubscribe().
+        """
+        q = queue.Queue()
+        with self._lock:
+            entry = self._watched.get(date_str)
+            if entry is None:
+                etag, snapshot = self._capture(date_str)
+                entry = self._watched[date_str] = [etag, snapshot, set()]
+            entry[2].add(q)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="change-feed", daemon=True)
+                self._thread.start()
+        return q
+
+    def unsubscribe(self, date_str, q):
+        """
+        Stop receiving change notices.
+        Args:
+            date_str (str): Date passed to subscribe().
+            q (queue.Queue): Queue returned by subscribe().
+        Returns:
+            None
+        """
+        with self._lock:
+            entry = self._watched.get(date_str)
+            if entry is None:
+                return
+            entry[2].discard(q)
+            if not entry[2]:
+                del self._watched[date_str]
+
+    def poll(self):
+        """
+        Check every watched day once and publish what changed.
+        Args:
+            None
+        Returns:
+            int: Number of days that changed.
+        """
+        with self._lock:
+            dates = list(self._watched)
+        changed = 0
+        for date_str in dates:
+            try:
+                etag = self.storage.day_etag(date_str)
+            except FileNotFoundError:
+                etag = None
+            with self._lock:
+                entry = self._watched.get(date_str)
+                if entry is None or entry[0] == etag:
+                    continue
+            etag, snapshot = self._capture(date_str)
+            with self._lock:
+                entry = self._watched.get(date_str)
+                if entry is None:
+                    continue
+                old = entry[1]
+                entry[0], entry[1] = etag, snapshot
+                subscribers = list(entry[2])
+            notice = {"date": date_str,
+                      "version": (snapshot or {}).get("version", 0)}
+            if old is None or snapshot is None:
+                notice["reset"] = True
+            else:
+                notice["changes"] = diff_day(old, snapshot)
+                if not notice["changes"]:
+                    continue
+            changed += 1
+            for q in subscribers:
+                q.put(notice)
+        return changed
+
+    def _capture(self, date_str):
+        # Backends may hand out their cached document and mutate it in
+        # place later, so keep a private copy to diff against.
+        try:
+            etag = self.storage.day_etag(date_str)
+            return etag, copy.deepcopy(self.storage.load_day(date_str))
+        except FileNotFoundError:
+            return None, None
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._watched:
+                    self._thread = None
+                    return
+            self.poll()
+            time.sleep(self.interval)
+
+
+_feeds = {}
+_feeds_lock = threading.Lock()
+
+
+def get_change_feed(storage=None):
+    """
+    Get the shared change feed for a storage backend.
+    Args:
+        storage (Storage, optional): Backend to watch. Defaults to
+            get_storage().
+    Returns:
+        ChangeFeed: The feed shared by every subscriber of the backend.
+    """
+    storage = storage or get_storage()
+    with _feeds_lock:
+        feed = _feeds.get(storage)
+        if feed is None:
+            feed = _feeds[storage] = ChangeFeed(storage)
+    return feed
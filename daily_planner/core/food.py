@@ -1,39 +1,24 @@
-from ..file_utils import read_json, write_json
-from ..constants import TODAY_FILE, FOOD_DB_FILE
+import math
 import os
+from ..clock import today
+from ..constants import COMPILED_FOOD_DIR
+from ..storage import get_storage
+from ..storage.food_store import compile_food_db
+from .food_index import get_food_index, stored_name
+from .nutrient_index import get_nutrient_index, resolve_metric
 
 
-def sort_key(entry, mode):
-    """
-    Key function for sorting food database entries by nutrient or name.
-    Args:
-        entry (tuple): (name, data) tuple from food_db.items().
-        mode (str): 'p' for protein, 'f' for fat, 'c' for carbon, else by name.
-    Returns:
-        value: The value to sort by.
-    """
-    name, data = entry
-    if mode == "p":
-        return data.get("protein", 0)
-    elif mode == "f":
-        return data.get("fat", 0)
-    elif mode == "c":
-        return data.get("carbon", 0)
-    else:
-        return name  # default to name sorting
-
-
-def search_food_matches(food_db, query):
+def search_food_matches(query, limit=None):
     """
     Search for food names in the food database that match the query substring.
     Args:
-        food_db (dict): The food database.
         query (str): The query string to match.
+        limit (int, optional): Maximum number of matches. Defaults to all.
     Returns:
-        list: List of (index, name) tuples for matching foods.
+        list: List of (index, name) tuples for matching foods, best first.
     """
-    query = query.lower()
-    return [(i+1, name) for i, name in enumerate(food_db) if query in name]
+    names = get_food_index().search(query, limit=limit)
+    return [(i+1, name) for i, name in enumerate(names)]
 
 
 def normalize_meal(meal):
@@ -57,6 +42,49 @@ def normalize_meal(meal):
         raise ValueError(f"Invalid meal: {meal}")
 
 
+def food_record(food_key, weight, food_index=None):
+    """
+    Build a food log entry with nutrients scaled to the eaten weight.
+    Args:
+        food_key (str): Exact name in the food database.
+        weight (float): Weight in grams.
+        food_index (FoodIndex, optional): Index to read nutrients from.
+            Defaults to get_food_index().
+    Returns:
+        dict: Entry with name, weight, protein, fat and carbon.
+    """
+    food_index = food_index or get_food_index()
+    entry = food_index.foods[food_key]
+    factor = weight / 100.0
+    return {
+        "name": food_key,
+        "weight": weight,
+        "protein": round(entry.get("protein", 0.0) * factor, 2),
+        "fat": round(entry.get("fat", 0.0) * factor, 2),
+        "carbon": round(entry.get("carbon", 0.0) * factor, 2)
+    }
+
+
+def resolve_food(food_name, food_index=None):
+    """
+    Resolve a food name without prompting: an exact (normalized) match,
+    or the only substring match.
+    Args:
+        food_name (str): Name typed by the user.
+        food_index (FoodIndex, optional): Index to search. Defaults to
+            get_food_index().
+    Returns:
+        str or None: Database name, or None if missing or ambiguous.
+    """
+    food_index = food_index or get_food_index()
+    food_key = food_index.resolve(food_name)
+    if food_key is None:
+        matches = food_index.search(food_name, limit=2)
+        if len(matches) == 1:
+            food_key = matches[0]
+    return food_key
+
+
 def add_food(meal, food_name, weight):
     """
     Add a food entry to a meal in today's planner, with nutrient calculation.
@@ -74,16 +102,18 @@ def add_food(meal, food_name, weight):
         return
     try:
         weight = float(weight)
-        if weight <= 0:
+        if not (math.isfinite(weight) and weight > 0):
             raise ValueError
     except ValueError:
         print(f"[x] Invalid weight: {weight}. Use a positive number.")
         return
-    data = read_json(TODAY_FILE)
-    food_db = read_json(FOOD_DB_FILE) if os.path.exists(FOOD_DB_FILE) else {}
-    food_key = food_name.lower()
-    if food_key not in food_db:
-        matches = search_food_matches(food_db, food_key)
+    storage = get_storage()
+    date_str = today()
+    data = storage.load_day(date_str)
+    food_index = get_food_index()
+    food_key = food_index.resolve(food_name)
+    if food_key is None:
+        matches = search_food_matches(food_name)
         if not matches:
             print(f"[!] '{food_name}' not found in food_db.json.")
             return
@@ -92,10 +122,6 @@ def add_food(meal, food_name, weight):
             print(f"[✓] Auto-selected match: {food_key}")
         else:
             print(f"[?] Multiple matches found for '{food_name}'. Select one:")
-            matched_food = list(dict(matches).values())
-            matches = [
-                (i + 1, matched_food[i])
-                for i in range(len(matched_food))]
             for i, name in matches:
                 print(f"  {i}. {name}")
             try:
@@ -107,17 +133,10 @@ def add_food(meal, food_name, weight):
             except ValueError:
                 print("[x] Invalid input.")
                 return
-    entry = food_db[food_key]
-    factor = weight / 100.0
-    record = {
-        "name": food_key,
-        "weight": weight,
-        "protein": round(entry.get("protein", 0.0) * factor, 2),
-        "fat": round(entry.get("fat", 0.0) * factor, 2),
-        "carbon": round(entry.get("carbon", 0.0) * factor, 2)
-    }
-    data["food"][meal].append(record)
-    write_json(TODAY_FILE, data)
+    record = food_record(food_key, weight, food_index)
+    storage.apply(date_str, [
+        {"op": "add_food", "meal": meal, "item": record}
+    ], data)
     print(f"[+] Logged {weight:.1f}g of '{food_key}' in {meal}")
 
 
@@ -132,15 +151,96 @@ def add_food_info(name, protein, fat, carbon):
     Returns:
         None
     """
-    food_db = read_json(FOOD_DB_FILE) if os.path.exists(FOOD_DB_FILE) else {}
-    key = name.lower()
-    if key in food_db:
-        print(f"[!] '{name}' already exists in database.")
-        return
-    food_db[key] = {
+    key = stored_name(name)
+    info = {
         "protein": float(protein),
         "fat": float(fat),
         "carbon": float(carbon)
     }
-    write_json(FOOD_DB_FILE, food_db)
+    # Load the indexes before the write so insert() can update them in
+    # place instead of a full rebuild
+    nutrient_index = get_nutrient_index()
+    storage = get_storage()
+    stamp = storage.food_db_stamp()
+    if (get_food_index().resolve(name) is not None
+            or not storage.add_food(key, info)):
+        print(f"[!] '{name}' already exists in database.")
+        return
+    nutrient_index.insert(key, info, stamp)
+    if os.path.exists(COMPILED_FOOD_DIR):
+        compile_foods(quiet=True)
     print(f"[✓] Added food '{name}' to database.")
+
+
+def _print_ranking(title, rows):
+    if not rows:
+        print("[!] No matching foods.")
+        return
+    print(f"[{title}]")
+    for i, (name, value) in enumerate(rows, 1):
+        print(f"  {i:>3}. {value:>8.2f}  {name}")
+
+
+def show_top_foods(by, k=10):
+    """
+    Print the foods with the highest value of a nutrient or ratio,
+    using the sorted nutrient indexes.
+    Args:
+        by (str): Metric name or alias (e.g. 'protein', 'p').
+        k (int, optional): Number of foods; None lists all. Defaults
+            to 10.
+    Returns:
+        None
+    """
+    try:
+        metric = resolve_metric(by)
+    except ValueError as e:
+        print(f"[x] {e}")
+        return
+    title = f"All foods by {metric}" if k is None else (
+        f"Top {k} by {metric}")
+    _print_ranking(title,
+                   get_nutrient_index().top(metric, k))
+
+
+def show_food_range(by, low=None, high=None, limit=None):
+    """
+    Print the foods whose nutrient or ratio lies in a range, lowest
+    first.
+    Args:
+        by (str): Metric name or alias.
+        low (float, optional): Minimum value.
+        high (float, optional): Maximum value.
+        limit (int, optional): Maximum number of foods.
+    Returns:
+        None
+    """
+    try:
+        metric = resolve_metric(by)
+    except ValueError as e:
+        print(f"[x] {e}")
+        return
+    low_text = "-inf" if low is None else f"{low:g}"
+    high_text = "inf" if high is None else f"{high:g}"
+    _print_ranking(f"{metric} in [{low_text}, {high_text}]",
+                   get_nutrient_index().range(metric, low, high, limit))
+
+
+def compile_foods(storage=None, quiet=False):
+    """
+    Build the memory-mapped food store from the food database. Lookups
+    use it until the database changes; add-food-info recompiles it.
+    Args:
+        storage (Storage, optional): Backend holding the food database.
+            Defaults to get_storage().
+        quiet (bool): Skip the summary line. Defaults to False.
+    Returns:
+        int: Number of foods compiled.
+    """
+    storage = storage or get_storage()
+    # Take the stamp first so a concurrent edit makes the store stale
+    stamp = storage.food_db_stamp()
+    count = compile_food_db(storage.load_food_db(), stamp)
+    if not quiet:
+        print(f"[✓] Compiled {count} foods into {COMPILED_FOOD_DIR}")
+    return count
@@ -0,0 +1,166 @@
+import csv
+import math
+import os
+from ..constants import COMPILED_FOOD_DIR
+from ..storage import get_storage
+from ..storage.ops import NUTRIENTS
+from .food_index import get_food_index, normalize_name, stored_name
+
+# Accepted CSV header names for each field (after normalize_name)
+COLUMN_ALIASES = {
+    "name": ("name", "food", "食品名稱", "名稱"),
+    "protein": ("protein", "p", "蛋白質"),
+    "fat": ("fat", "f", "脂肪"),
+    "carbon": ("carbon", "carbs", "carbohydrate", "c", "碳水化合物"),
+}
+
+# Conflicts and errors listed individually in the report
+REPORT_LIMIT = 10
+
+
+def _columns(header):
+    positions = {normalize_name(h): i for i, h in enumerate(header)}
+    columns = {}
+    for field, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in positions:
+                columns[field] = positions[alias]
+                break
+        else:
+            raise ValueError(f"CSV has no '{field}' column "
+                             f"(accepted: {', '.join(aliases)})")
+    return columns
+
+
+def read_food_csv(path):
+    """
+    Stream food rows from a CSV file with a header row.
+    Args:
+        path (str): CSV file with name, protein, fat and carbon columns
+            (nutrients per 100g).
+    Yields:
+        tuple: (line number, name, info, error); error is None for a
+            valid row, otherwise name/info are None.
+    Raises:
+        ValueError: If required columns are missing.
+    """
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        columns = _columns(header)
+        width = max(columns.values()) + 1
+        for row in reader:
+            line = reader.line_num
+            if not any(cell.strip() for cell in row):
+                continue
+            if len(row) < width:
+                yield line, None, None, "missing columns"
+                continue
+            name = row[columns["name"]].strip()
+            if not name:
+                yield line, None, None, "empty name"
+                continue
+            try:
+                info = {k: float(row[columns[k]] or 0) for k in NUTRIENTS}
+            except ValueError:
+                yield line, None, None, "non-numeric nutrient"
+                continue
+            if not all(math.isfinite(v) for v in info.values()):
+                yield line, None, None, "non-finite nutrient"
+                continue
+            if any(v < 0 for v in info.values()):
+                yield line, None, None, "negative nutrient"
+                continue
+            yield line, name, info, None
+
+
+def import_foods(path, storage=None, dry_run=False):
+    """
+    Import foods from a CSV file into the food database.
+
+    Rows are streamed and deduplicated by normalized name against the
+    database and against earlier rows; rows naming an existing food
+    with different nutrients are reported as conflicts and skipped.
+    Duplicate rows cost no memory, but each new food keeps a small
+    entry (its nutrients and line) until the import ends, so memory
+    grows with the number of foods added. New foods are stored under
+    stored_name(), like add-food-info, with one storage.add_foods()
+    call, and an existing compiled food store is rebuilt once
+    afterwards.
+    Args:
+        path (str): CSV file to import.
+        storage (Storage, optional): Backend to import into. Defaults
+            to get_storage().
+        dry_run (bool): Report without writing. Defaults to False.
+    Returns:
+        int: Number of foods added (or that would be added).
+    """
+    storage = storage or get_storage()
+    food_index = get_food_index(storage)
+    seen = {}
+    duplicates = conflict_count = error_count = 0
+    # Only the rows that are listed in the report are kept
+    conflicts, errors = [], []
+
+    def new_foods():
+        nonlocal duplicates, conflict_count, error_count
+        for line, name, info, error in read_food_csv(path):
+            if error:
+                error_count += 1
+                if len(errors) < REPORT_LIMIT:
+                    errors.append((line, error))
+                continue
+            key = normalize_name(name)
+            existing = food_index.resolve(name)
+            if existing is not None:
+                known = food_index.foods[existing]
+                known = tuple(known.get(k, 0) for k in NUTRIENTS)
+                other = ("the database"
+                         if existing in (name, stored_name(name))
+                         else f"'{existing}' in the database")
+            elif key in seen:
+                known, first = seen[key]
+                other = f"line {first}"
+            else:
+                seen[key] = (tuple(info[k] for k in NUTRIENTS), line)
+                yield stored_name(name), info
+                continue
+            if all(abs(v - info[k]) < 1e-9
+                   for k, v in zip(NUTRIENTS, known)):
+                duplicates += 1
+            else:
+                conflict_count += 1
+                if len(conflicts) < REPORT_LIMIT:
+                    conflicts.append((line, name, other, known, info))
+
+    try:
+        if dry_run:
+            added = sum(1 for _ in new_foods())
+        else:
+            added = storage.add_foods(new_foods())
+    except (OSError, ValueError) as e:
+        print(f"[x] Import failed: {e}")
+        return 0
+    verb = "Would import" if dry_run else "Imported"
+    print(f"[✓] {verb} {added} food(s) from {path}")
+    if duplicates:
+        print(f"[!] Skipped {duplicates} duplicate row(s).")
+    if conflicts:
+        print(f"[!] {conflict_count} conflict(s), existing values kept "
+              "(existing -> imported):")
+        for line, name, other, known, info in conflicts:
+            diffs = ", ".join(
+                f"{k} {v:g} -> {info[k]:g}"
+                for k, v in zip(NUTRIENTS, known)
+                if abs(v - info[k]) >= 1e-9)
+            print(f"  line {line}: '{name}' vs {other}: {diffs}")
+    if errors:
+        print(f"[x] {error_count} invalid row(s) skipped:")
+        for line, error in errors:
+            print(f"  line {line}: {error}")
+    if added and not dry_run and os.path.exists(COMPILED_FOOD_DIR):
+        from .food import compile_foods
+        compile_foods(storage)
+    return added
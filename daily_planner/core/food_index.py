@@ -0,0 +1,217 @@
+import heapq
+import os
+import threading
+import unicodedata
+from ..constants import COMPILED_FOOD_DIR
+from ..storage import get_storage
+from ..storage.day_cache import file_stamp
+from ..storage.food_store import open_compiled
+
+NGRAM = 2
+
+
+def normalize_name(name):
+    """
+    Normalize a food name for matching.
+    NFKC folds full-width forms (e.g. '７－１１' -> '7-11') and casefold
+    handles case, so CJK and mixed-width names compare equal.
+    Args:
+        name (str): Raw food name or query.
+    Returns:
+        str: Normalized name.
+    """
+    return unicodedata.normalize("NFKC", name).casefold().strip()
+
+
+def stored_name(name):
+    """
+    Get the name a new food is stored under in the food database.
+    add-food-info and the CSV import both use it, so one food never
+    ends up under two spellings.
+    Args:
+        name (str): Food name as typed or read from a file.
+    Returns:
+        str: Database key.
+    """
+    return name.lower()
+
+
+def _grams(text, n):
+    """
+    Get the set of character n-grams of a string.
+    Args:
+        text (str): Normalized text.
+        n (int): Gram length.
+    Returns:
+        set: Set of n-gram strings.
+    """
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+class FoodIndex:
+    """
+    In-memory substring index over the food database.
+
+    The database is loaded once and indexed by character unigrams and
+    bigrams of the normalized names. Queries intersect the posting lists
+    of their grams instead of scanning every name, then rank the
+    surviving candidates. The index is rebuilt when the storage
+    backend's food_db_stamp() changes (file mtime/size for JSON).
+    """
+
+    def __init__(self, storage):
+        self.storage = storage
+        self._state = ({}, [], [], {}, {})
+        self._stamp = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """
+        Reload and re-index the database if the file changed on disk.
+        Args:
+            None
+        Returns:
+            FoodIndex: self, for chaining.
+        """
+        stamp = self.storage.food_db_stamp()
+        if self._loaded and stamp == self._stamp:
+            return self
+        with self._lock:
+            if not self._loaded or stamp != self._stamp:
+                self._build(self.storage.load_food_db())
+                self._stamp = stamp
+                self._loaded = True
+        return self
+
+    def _build(self, foods):
+        names = list(foods)
+        normalized = [normalize_name(n) for n in names]
+        postings = {}
+        for i, norm in enumerate(normalized):
+            for gram in _grams(norm, 1) | _grams(norm, NGRAM):
+                postings.setdefault(gram, []).append(i)
+        by_normalized = {}
+        for i, norm in enumerate(normalized):
+            by_normalized.setdefault(norm, names[i])
+        # Swap in one assignment so concurrent readers never see a mix
+        self._state = (foods, names, normalized, by_normalized, postings)
+
+    @property
+    def foods(self):
+        return self._state[0]
+
+    def _candidates(self, postings, query):
+        if len(query) < NGRAM:
+            return postings.get(query, [])
+        lists = []
+        for gram in _grams(query, NGRAM):
+            ids = postings.get(gram)
+            if not ids:
+                return []
+            lists.append(ids)
+        lists.sort(key=len)
+        result = set(lists[0])
+        for ids in lists[1:]:
+            result.intersection_update(ids)
+            if not result:
+                break
+        return result
+
+    def search(self, query, limit=10):
+        """
+        Find food names containing the query, best matches first.
+        Exact matches rank first, then prefix matches, then by match
+        position, name length and database order.
+        Args:
+            query (str): Substring to search for.
+            limit (int, optional): Maximum number of results.
+                None returns all matches. Defaults to 10.
+        Returns:
+            list: Matching food names (original keys).
+        """
+        self.refresh()
+        _, names, normalized, _, postings = self._state
+        query = normalize_name(query)
+        if not query:
+            return []
+        ranked = []
+        for i in self._candidates(postings, query):
+            norm = normalized[i]
+            pos = norm.find(query)
+            if pos < 0:
+                continue
+            ranked.append((norm != query, pos, len(norm), i))
+        if limit is None:
+            ranked.sort()
+        else:
+            ranked = heapq.nsmallest(limit, ranked)
+        return [names[r[3]] for r in ranked]
+
+    def resolve(self, name):
+        """
+        Find the database key equal to a name after normalization.
+        Args:
+            name (str): Food name as typed by the user.
+        Returns:
+            str or None: The stored key, or None if there is no exact match.
+        """
+        self.refresh()
+        foods, _, _, by_normalized, _ = self._state
+        if name in foods:
+            return name
+        return by_normalized.get(normalize_name(name))
+
+    def get(self, name):
+        """
+        Get the nutrient entry for a food name.
+        Args:
+            name (str): Food name (normalized lookup).
+        Returns:
+            dict or None: Nutrients per 100g, or None if unknown.
+        """
+        key = self.resolve(name)
+        return self.foods.get(key) if key is not None else None
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+# storage -> (meta.json stamp, food_db_stamp(), store or None)
+_compiled = {}
+
+
+def _compiled_store(storage):
+    meta_stamp = file_stamp(os.path.join(COMPILED_FOOD_DIR, "meta.json"))
+    if meta_stamp is None:
+        return None
+    db_stamp = storage.food_db_stamp()
+    cached = _compiled.get(storage)
+    if cached is not None and cached[:2] == (meta_stamp, db_stamp):
+        return cached[2]
+    store = open_compiled(db_stamp)
+    _compiled[storage] = (meta_stamp, db_stamp, store)
+    return store
+
+
+def get_food_index(storage=None):
+    """
+    Get the shared, up-to-date food index for a storage backend.
+    When `planner food-db compile` has built a store from the current
+    database, the memory-mapped store is returned instead, so large
+    databases are never loaded into memory.
+    Args:
+        storage (Storage, optional): Backend holding the food database.
+            Defaults to get_storage().
+    Returns:
+        FoodIndex or CompiledFoodStore: Index with resolve(), search(),
+            get() and foods.
+    """
+    storage = storage or get_storage()
+    compiled = _compiled_store(storage)
+    if compiled is not None:
+        return compiled
+    index = _indexes.get(storage)
+    if index is None:
+        with _indexes_lock:
+            index = _indexes.setdefault(storage, FoodIndex(storage))
+    return index.refresh()
@@ -1,5 +1,5 @@
-from ..file_utils import read_json, write_json
-from ..constants import TODAY_FILE
+from ..clock import today
+from ..storage import get_storage
 from .routine import match_one, normalize_section
 
 
@@ -13,13 +13,9 @@ def add_goal(section, text):
         None
     """
     section = normalize_section(section)
-    data = read_json(TODAY_FILE)
-    if "goals" not in data:
-        data["goals"] = {}
-    if section not in data["goals"]:
-        data["goals"][section] = []
-    data["goals"][section].append({"text": text, "done": False})
-    write_json(TODAY_FILE, data)
+    get_storage().apply(today(), [
+        {"op": "add_goal", "section": section, "text": text}
+    ])
     print(f"[+] Added to {section.title()} Goals: {text}")
 
 
@@ -34,7 +30,9 @@ def mark_goal_by_name(section, text_snippet, status=True):
         None
     """
     section = normalize_section(section)
-    data = read_json(TODAY_FILE)
+    storage = get_storage()
+    date_str = today()
+    data = storage.load_day(date_str)
     try:
         goals = data["goals"][section]
     except KeyError:
@@ -44,9 +42,10 @@ def mark_goal_by_name(section, text_snippet, status=True):
     if match is None:
         return
     idx, goal = match
-    goal["done"] = status
-    data["goals"][section][idx] = goal
-    write_json(TODAY_FILE, data)
+    storage.apply(date_str, [{
+        "op": "check_goal", "section": section,
+        "index": idx, "done": status
+    }], data)
     print(
         f"[✓] Marked goal: {goal['text']} in [{section}]" if status else
         f"[✗] Unmarked goal: {goal['text']} in [{section}]"
@@ -62,7 +61,7 @@ def list_goals(section=None, done=None):
     Returns:
         list: List of (section, goal) tuples.
     """
-    data = read_json(TODAY_FILE)
+    data = get_storage().load_day(today())
     results = []
     for sec, goals in data["goals"].items():
         if section and sec != section:
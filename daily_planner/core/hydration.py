@@ -1,6 +1,5 @@
-from ..file_utils import read_json, write_json
-from ..constants import TODAY_FILE
-import os
+from ..clock import today
+from ..storage import get_storage
 
 
 def add_water(amount):
@@ -11,15 +10,15 @@ def add_water(amount):
     Returns:
         None
     """
-    if not os.path.exists(TODAY_FILE):
+    storage = get_storage()
+    date_str = today()
+    if not storage.day_exists(date_str):
         print("[!] No planner for today. Run 'init' first.")
         return
-    data = read_json(TODAY_FILE)
-    if "water" not in data:
-        data["water"] = 0
     try:
-        data["water"] += int(amount)
-        write_json(TODAY_FILE, data)
-        print(f"[✓] Added {amount}ml water. Total: {data['water']}ml.")
+        amount = int(amount)
     except ValueError:
         print("[!] Invalid water amount. Please enter an integer.")
+        return
+    data = storage.apply(date_str, [{"op": "add_water", "amount": amount}])
+    print(f"[✓] Added {amount}ml water. Total: {data['water']}ml.")
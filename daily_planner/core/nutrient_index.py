@@ -0,0 +1,371 @@
+import bisect
+import heapq
+import itertools
+import json
+import operator
+import os
+import struct
+import threading
+from .. import metrics
+from ..constants import NUTRIENT_INDEX_DIR
+from ..file_utils import read_json, temp_path, write_json
+from ..storage import get_storage
+from ..storage.day_cache import stamp_value
+from ..storage.food_store import map_file
+from ..storage.locks import file_lock
+
+
+def calories(info):
+    """
+    Estimate energy per 100g from the macronutrients (4/9/4 kcal per g).
+    Args:
+        info (dict): Nutrients per 100g.
+    Returns:
+        float: Kilocalories per 100g.
+    """
+    return (4 * info.get("protein", 0) + 9 * info.get("fat", 0)
+            + 4 * info.get("carbon", 0))
+
+
+def _per_100kcal(nutrient):
+    def metric(info):
+        kcal = calories(info)
+        return info.get(nutrient, 0) * 100 / kcal if kcal else 0.0
+    return metric
+
+
+# Indexed orderings: name -> value per food
+METRICS = {
+    "protein": lambda info: info.get("protein", 0),
+    "fat": lambda info: info.get("fat", 0),
+    "carbon": lambda info: info.get("carbon", 0),
+    "kcal": calories,
+    # grams per 100 kcal, e.g. protein density for cutting
+    "protein_per_kcal": _per_100kcal("protein"),
+    "fat_per_kcal": _per_100kcal("fat"),
+    "carbon_per_kcal": _per_100kcal("carbon"),
+}
+
+MAGIC = b"PLNRNIDX"
+# magic, entry count
+HEADER = struct.Struct("<8sQ")
+# value, name offset, name length
+ENTRY = struct.Struct("<dQI")
+# Inserts appended to the delta file before the next full rebuild
+DELTA_LIMIT = 256
+
+# Short names accepted on the command line
+METRIC_ALIASES = {"p": "protein", "f": "fat", "c": "carbon", "k": "kcal",
+                  "carbs": "carbon", "calories": "kcal",
+                  "pk": "protein_per_kcal"}
+
+
+def resolve_metric(name):
+    """
+    Resolve a metric name or alias.
+    Args:
+        name (str): Metric such as 'protein', 'p' or 'protein_per_kcal'.
+    Returns:
+        str: Canonical metric name.
+    Raises:
+        ValueError: If the metric is unknown.
+    """
+    key = name.lower()
+    key = METRIC_ALIASES.get(key, key)
+    if key not in METRICS:
+        raise ValueError(f"Unknown nutrient '{name}'. "
+                         f"Use one of: {', '.join(METRICS)}")
+    return key
+
+
+class _Column:
+    """
+    One metric's entries in a mapped file, sorted by (value, name).
+    Indexing yields the values, so bisect searches the file directly.
+    """
+
+    def __init__(self, buf=b"", names=b""):
+        self._buf = buf
+        self._names = names
+        self.count = 0
+        if buf:
+            magic, self.count = HEADER.unpack_from(buf, 0)
+            if magic != MAGIC:
+                raise ValueError("Corrupt nutrient index")
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        return ENTRY.unpack_from(self._buf, HEADER.size + i * ENTRY.size)[0]
+
+    def entry(self, i):
+        value, off, length = ENTRY.unpack_from(
+            self._buf, HEADER.size + i * ENTRY.size)
+        return value, self._names[off:off + length].decode("utf-8")
+
+
+class NutrientIndex:
+    """
+    Sorted secondary indexes over the food database, one per metric.
+
+    Each metric is a file of fixed-width (value, name) entries sorted
+    ascending under NUTRIENT_INDEX_DIR and memory-mapped, so top-k and
+    range queries are a bisect plus a slice over the pages they touch.
+    Foods added through insert() go to a small append-only delta file
+    that is merged into query results and folded in by the next full
+    rebuild (after DELTA_LIMIT inserts, or when the database changed
+    behind the index's back). meta.json and each delta line record the
+    food_db_stamp() they match; the food database is never reordered.
+    Processes sharing the files serialize on the lock of meta.json.
+    """
+
+    def __init__(self, storage, root=NUTRIENT_INDEX_DIR):
+        self.storage = storage
+        self.root = root
+        self._columns = {}
+        # metric -> sorted [(value, name)] of inserts since the build
+        self._delta = {}
+        self._stamp = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """
+        Open the saved indexes, rebuilding them if the database changed.
+        Args:
+            None
+        Returns:
+            NutrientIndex: self, for chaining.
+        """
+        stamp = self._stamp_now()
+        if self._loaded and stamp == self._stamp:
+            return self
+        with self._lock:
+            if self._loaded and stamp == self._stamp:
+                return self
+            if not self._open(stamp):
+                self._rebuild(stamp)
+            self._stamp = stamp
+            self._loaded = True
+        return self
+
+    def _stamp_now(self):
+        return stamp_value(self.storage.food_db_stamp())
+
+    def _path(self, name):
+        return os.path.join(self.root, name)
+
+    def _read_delta(self):
+        try:
+            f = open(self._path("delta.jsonl"), "rb")
+        except FileNotFoundError:
+            return []
+        with f:
+            # A torn last line from a crash fails to parse and is
+            # dropped; its stamp then no longer matches, forcing a
+            # rebuild.
+            lines = []
+            for raw in f:
+                try:
+                    lines.append(json.loads(raw))
+                except ValueError:
+                    break
+            return lines
+
+    def _open(self, stamp):
+        # Read meta.json, the delta and the columns of one build only
+        try:
+            with file_lock(self._path("meta.json")):
+                return self._open_files(stamp)
+        except OSError:
+            return False
+
+    def _open_files(self, stamp):
+        try:
+            meta = read_json(self._path("meta.json"))
+        except (OSError, ValueError):
+            return False
+        delta = self._read_delta()
+        current = delta[-1]["stamp"] if delta else meta.get("stamp")
+        if current != stamp or meta.get("metrics") != list(METRICS):
+            return False
+        try:
+            names = map_file(self._path("names"))
+            columns = {m: _Column(map_file(self._path(m)), names)
+                       for m in METRICS}
+        except (OSError, ValueError):
+            return False
+        if any(len(c) != meta["count"] for c in columns.values()):
+            return False
+        self._columns = columns
+        self._delta = {m: sorted((line["values"][i], line["name"])
+                                 for line in delta)
+                       for i, m in enumerate(METRICS)}
+        return True
+
+    def _rebuild(self, stamp):
+        foods = self.storage.load_food_db()
+        try:
+            self._write(foods, stamp)
+            if self._open(stamp):
+                return
+        except OSError:
+            pass
+        # Read-only location: keep everything in the in-memory delta
+        self._columns = {m: _Column() for m in METRICS}
+        self._delta = {
+            m: sorted((round(value_of(info), 4), name)
+                      for name, info in foods.items())
+            for m, value_of in METRICS.items()}
+
+    def _write(self, foods, stamp):
+        os.makedirs(self.root, exist_ok=True)
+        names = sorted(foods)
+        tmps = {part: temp_path(self._path(part))
+                for part in ("names", *METRICS)}
+        with file_lock(self._path("meta.json")):
+            try:
+                offsets = {}
+                with open(tmps["names"], "wb") as f:
+                    for name in names:
+                        raw = name.encode("utf-8")
+                        offsets[name] = (f.tell(), len(raw))
+                        f.write(raw)
+                for metric, value_of in METRICS.items():
+                    pairs = sorted((round(value_of(foods[name]), 4), name)
+                                   for name in names)
+                    with open(tmps[metric], "wb") as f:
+                        f.write(HEADER.pack(MAGIC, len(pairs)))
+                        for value, name in pairs:
+                            f.write(ENTRY.pack(value, *offsets[name]))
+                for part, tmp in tmps.items():
+                    os.replace(tmp, self._path(part))
+            except BaseException:
+                for tmp in tmps.values():
+                    try:
+                        os.remove(tmp)
+                    except FileNotFoundError:
+                        pass
+                raise
+            try:
+                os.remove(self._path("delta.jsonl"))
+            except FileNotFoundError:
+                pass
+            # Written last: a crash before this leaves a stale meta.json
+            write_json(self._path("meta.json"), {
+                "stamp": stamp, "count": len(names),
+                "metrics": list(METRICS)})
+
+    def insert(self, name, info, stamp):
+        """
+        Add a newly inserted food to every index.
+        Call after the food database write has succeeded. The food is
+        appended to the delta file; every DELTA_LIMIT inserts, or when
+        the database had changed since the index was loaded, the
+        indexes are rebuilt from the database instead.
+        Args:
+            name (str): Food name as stored.
+            info (dict): Nutrients per 100g.
+            stamp (object): food_db_stamp() taken before the write.
+        Returns:
+            None
+        """
+        with self._lock:
+            if not self._loaded:
+                return  # the next refresh() builds from the database
+            if stamp_value(stamp) != self._stamp:
+                # Someone else changed the database too; the delta
+                # would miss their foods.
+                self._stamp = self._stamp_now()
+                self._rebuild(self._stamp)
+                return
+            values = [round(value_of(info), 4)
+                      for value_of in METRICS.values()]
+            for metric, value in zip(METRICS, values):
+                bisect.insort(self._delta[metric], (value, name))
+            self._stamp = self._stamp_now()
+            if len(self._delta[next(iter(METRICS))]) >= DELTA_LIMIT:
+                self._rebuild(self._stamp)
+                return
+            line = json.dumps({"name": name, "values": values,
+                               "stamp": self._stamp},
+                              ensure_ascii=False) + "\n"
+            payload = line.encode("utf-8")
+            try:
+                with file_lock(self._path("meta.json")), \
+                        open(self._path("delta.jsonl"), "ab") as f:
+                    f.write(payload)
+            except OSError:
+                return  # the in-memory delta still works
+            metrics.inc("planner_json_writes_total")
+            metrics.inc("planner_json_bytes_written_total", len(payload))
+
+    def top(self, metric, k=10):
+        """
+        Get the foods with the highest values of a metric.
+        Args:
+            metric (str): Metric name or alias.
+            k (int, optional): Number of foods; None returns all.
+                Defaults to 10.
+        Returns:
+            list: (name, value) tuples, highest first.
+        """
+        metric = resolve_metric(metric)
+        self.refresh()
+        column, delta = self._columns[metric], self._delta[metric]
+        base = (column.entry(i) for i in range(len(column) - 1, -1, -1))
+        rows = heapq.merge(base, reversed(delta), reverse=True)
+        if k is not None:
+            rows = itertools.islice(rows, k)
+        return [(name, value) for value, name in rows]
+
+    def range(self, metric, low=None, high=None, limit=None):
+        """
+        Get the foods whose metric lies within [low, high].
+        Args:
+            metric (str): Metric name or alias.
+            low (float, optional): Minimum value. Defaults to unbounded.
+            high (float, optional): Maximum value. Defaults to unbounded.
+            limit (int, optional): Maximum number of foods.
+        Returns:
+            list: (name, value) tuples, lowest first.
+        """
+        metric = resolve_metric(metric)
+        self.refresh()
+        column, delta = self._columns[metric], self._delta[metric]
+        value_of = operator.itemgetter(0)
+        lo, dlo = 0, 0
+        hi, dhi = len(column), len(delta)
+        if low is not None:
+            lo = bisect.bisect_left(column, low)
+            dlo = bisect.bisect_left(delta, low, key=value_of)
+        if high is not None:
+            hi = bisect.bisect_right(column, high)
+            dhi = bisect.bisect_right(delta, high, key=value_of)
+        rows = heapq.merge((column.entry(i) for i in range(lo, hi)),
+                           delta[dlo:dhi])
+        if limit is not None:
+            rows = itertools.islice(rows, limit)
+        return [(name, value) for value, name in rows]
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_nutrient_index(storage=None):
+    """
+    Get the shared, up-to-date nutrient index for a storage backend.
+    Args:
+        storage (Storage, optional): Backend holding the food database.
+            Defaults to get_storage().
+    Returns:
+        NutrientIndex: The cached index for the backend.
+    """
+    storage = storage or get_storage()
+    index = _indexes.get(storage)
+    if index is None:
+        with _indexes_lock:
+            index = _indexes.setdefault(storage, NutrientIndex(storage))
+    return index.refresh()
@@ -0,0 +1,110 @@
+import threading
+from ..constants import USER_PROFILE_FILE
+from ..storage.day_cache import DayCache, file_stamp
+from ..storage.ops import food_totals
+
+# Keeps the parsed profile across calls in long-lived processes
+_profile_cache = DayCache(maxsize=1, name="profile")
+# Targets derived from the profile, valid while its file stamp holds
+_targets_lock = threading.Lock()
+_targets_stamp = None
+_targets_memo = {}
+
+TARGET_KEYS = ("protein", "fat", "carbon", "water")
+
+
+def load_profile():
+    """
+    Load the user profile, reusing the parsed copy while the file is
+    unchanged.
+    Args:
+        None
+    Returns:
+        dict: User profile (weight, tall and *_factor fields).
+    """
+    return _profile_cache.get(USER_PROFILE_FILE)
+
+
+def compute_targets(profile):
+    """
+    Derive daily nutrient and water targets from a user profile.
+    Args:
+        profile (dict): User profile.
+    Returns:
+        dict: Targets for 'protein', 'fat', 'carbon' (g) and 'water' (ml).
+    """
+    weight = profile.get("weight", 0)
+    tall = profile.get("tall", 0)
+    return {
+        "protein": profile.get("protein_factor", 0) * weight,
+        "fat": profile.get("fat_factor", 0) * weight,
+        "carbon": profile.get("carbon_factor", 0) * weight,
+        "water": profile.get("water_factor", 0) * (tall + weight),
+    }
+
+
+def profile_on(profile, date_str=None):
+    """
+    Get the profile that applied on a date.
+    The optional "history" list holds {"since": 'YYYY-MM-DD', ...}
+    entries whose fields override the base profile from that date on;
+    without a date the latest entry applies.
+    Args:
+        profile (dict): User profile.
+        date_str (str, optional): Date in 'YYYY-MM-DD' format.
+    Returns:
+        dict: Effective profile without the "history" key.
+    """
+    effective = {k: v for k, v in profile.items() if k != "history"}
+    for entry in sorted(profile.get("history", []),
+                        key=lambda e: e.get("since", "")):
+        if date_str is not None and entry.get("since", "") > date_str:
+            break
+        effective.update((k, v) for k, v in entry.items() if k != "since")
+    return effective
+
+
+def get_targets(date_str=None):
+    """
+    Get the daily targets that applied on a date.
+    Targets are derived once per profile version and date, and dropped
+    when the profile file's mtime or size changes.
+    Args:
+        date_str (str, optional): Date in 'YYYY-MM-DD' format. Defaults
+            to the latest profile.
+    Returns:
+        dict: Targets for 'protein', 'fat', 'carbon' (g) and 'water' (ml).
+    """
+    global _targets_stamp
+    stamp = file_stamp(USER_PROFILE_FILE)
+    with _targets_lock:
+        if stamp != _targets_stamp:
+            _targets_memo.clear()
+            _targets_stamp = stamp
+        targets = _targets_memo.get(date_str)
+    if targets is None:
+        targets = compute_targets(profile_on(load_profile(), date_str))
+        with _targets_lock:
+            if stamp == _targets_stamp:
+                _targets_memo[date_str] = targets
+    return targets
+
+
+def day_summary(data, date_str=None):
+    """
+    Summarize a day's intake against the targets for that date.
+    Args:
+        data (dict): Day document.
+        date_str (str, optional): Date of the document.
+    Returns:
+        dict: {"totals", "targets", "progress"}, each keyed by 'protein',
+            'fat', 'carbon' and 'water'; progress is a percentage.
+    """
+    totals = dict(food_totals(data)["day"])
+    totals["water"] = data.get("water", 0) or 0
+    targets = get_targets(date_str)
+    progress = {
+        k: round(totals[k] / targets[k] * 100, 1) if targets[k] > 0 else 0.0
+        for k in TARGET_KEYS
+    }
+    return {"totals": totals, "targets": targets, "progress": progress}
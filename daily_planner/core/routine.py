@@ -1,7 +1,9 @@
 from datetime import date, datetime
-import os
-from ..file_utils import read_json, write_json
-from ..constants import ROUTINE_FILE, TODAY_FILE
+import threading
+from ..file_utils import read_json
+from ..clock import today
+from ..constants import ROUTINE_FILE
+from ..storage import get_storage
 
 
 def match_one(entries, key_func, query):
@@ -75,7 +77,57 @@ def fuzzy_show_type(value):
         raise ValueError(f"Unknown show type: {value}")
 
 
-def init_day(target_date=None) -> None:
+def new_day(d):
+    """
+    Build a fresh planner document for a date from the routine template.
+    Args:
+        d (datetime.date): The date to build the planner for.
+    Returns:
+        dict: New day document.
+    """
+    template = read_json(ROUTINE_FILE)
+    data = {
+        "tasks": template,
+        "done": {s: [False] * len(items) for s, items in template.items()},
+        "plan": {f"{h:02}": "" for h in range(5, 25)},
+        "goals": {"focus": [], "todo": []},
+        "food": {"breakfast": [], "lunch": [], "dinner": []},
+        "water": 0
+    }
+    weekday = d.weekday()
+    if weekday in (1, 4):
+        data["goals"]["todo"].append({"text": "laundry", "done": False})
+    return data
+
+
+_init_lock = threading.Lock()
+
+
+def ensure_day(date_str, storage=None):
+    """
+    Create the planner for a date if it does not exist yet.
+    Concurrent callers, in this or another process, create it exactly
+    once.
+    Args:
+        date_str (str): Date string in 'YYYY-MM-DD' format.
+        storage (Storage, optional): Backend to use. Defaults to
+            get_storage().
+    Returns:
+        bool: True if the planner was created, False if it existed.
+    Raises:
+        ValueError: If date_str is not a valid date.
+    """
+    storage = storage or get_storage()
+    if storage.day_exists(date_str):
+        return False
+    d = datetime.strptime(date_str, "%Y-%m-%d").date()
+    with _init_lock:
+        if storage.day_exists(date_str):
+            return False
+        return storage.create_day(date_str, new_day(d))
+
+
+def init_day(target_date=None, storage=None) -> None:
     """
     Initialize the planner for a specific day. Creates a new planner file
     if it doesn't exist.
@@ -83,6 +135,8 @@ def init_day(target_date=None) -> None:
     Args:
         target_date (str, optional): Date string in 'YYYY-MM-DD' format.
             Defaults to today.
+        storage (Storage, optional): Backend to use. Defaults to
+            get_storage().
 
     Returns:
         None
@@ -94,25 +148,11 @@ def init_day(target_date=None) -> None:
             print("[!] Invalid date format. Use YYYY-MM-DD.")
             return
     else:
-        d = date.today()
+        d = date.fromisoformat(today())
 
-    if os.path.exists(TODAY_FILE):
+    if not ensure_day(d.isoformat(), storage):
         print(f"[!] Planner for {d} already exists.")
         return
-
-    template = read_json(ROUTINE_FILE)
-    data = {
-        "tasks": template,
-        "done": {s: [False] * len(items) for s, items in template.items()},
-        "plan": {f"{h:02}": "" for h in range(5, 25)},
-        "goals": {"focus": [], "todo": []},
-        "food": {"breakfast": [], "lunch": [], "dinner": []},
-        "water": 0
-    }
-    weekday = d.weekday()
-    if weekday in (1, 4):
-        data["goals"]["todo"].append({"text": "laundry", "done": False})
-    write_json(TODAY_FILE, data)
     print(f"[✓] Initialized planner for {d}.")
 
 
@@ -125,7 +165,9 @@ def check_by_name(task_name, status=True):
     Returns:
         None
     """
-    data = read_json(TODAY_FILE)
+    storage = get_storage()
+    date_str = today()
+    data = storage.load_day(date_str)
     matches = []
     for section, items in data["tasks"].items():
         for i, item in enumerate(items):
@@ -137,8 +179,10 @@ def check_by_name(task_name, status=True):
     for section, idx, item in matches:
         already_checked = data["done"][section][idx]
         if already_checked != status:
-            data["done"][section][idx] = status
-            write_json(TODAY_FILE, data)
+            storage.apply(date_str, [{
+                "op": "check", "section": section,
+                "index": idx, "done": status
+            }], data)
             print(f"[✓] Marked '{item}' in [{section}]" if status
                   else f"[ ] Unmarked '{item}' in [{section}]")
             return
@@ -163,7 +207,9 @@ def plan_hours(task, start_hour, end_hour=None):
     Returns:
         None
     """
-    data = read_json(TODAY_FILE)
+    storage = get_storage()
+    date_str = today()
+    data = storage.load_day(date_str)
     try:
         start = int(start_hour)
         end = int(end_hour) if end_hour else start + 1
@@ -173,9 +219,9 @@ def plan_hours(task, start_hour, end_hour=None):
     except ValueError:
         print("[!] Invalid time format. Use numbers like 8 or 14.")
         return
-    for h in range(start, end):
-        data["plan"][f"{h:02}"] = task
-    write_json(TODAY_FILE, data)
+    storage.apply(date_str, [{
+        "op": "plan", "task": task, "start": start, "end": end
+    }], data)
     print(f"[->] Planned '{task}' from {start}:00 to {end}:00")
 
 
@@ -187,7 +233,7 @@ def show_summary():
     Returns:
         None
     """
-    data = read_json(TODAY_FILE)
+    data = get_storage().load_day(today())
     total = done = 0
     for section, checks in data["done"].items():
         total += len(checks)
@@ -217,8 +263,15 @@ Usage Examples:
   planner check-goal f "focus"        Check a focus goal
   planner show goals                  Show goals
   planner show summary                Show summary of the day
+  planner show --watch                Live view, redrawn on changes
   planner add-food lunch "egg"        Log 'egg' in lunch
                                       (requires food_db.json)
   planner add-food-info "egg" 5 6.3 5.3 0.6  Add 'egg' to database
   planner add-exercise workout "push-ups"    Log push-ups to workout
+  planner food-db top protein -k 20   Foods highest in protein
+  planner food-db range fat 0 5       Foods with 0-5g fat per 100g
+  planner food-db compile             Build the fast on-disk food store
+  planner food-db import foods.csv    Import foods from a CSV file
+  planner suggest --prefer-logged     Foods to fill today's macros
+  planner metrics                     Latency and I/O counters of the app
 """)
@@ -0,0 +1,55 @@
+import logging
+import threading
+from ..clock import get_clock
+from .routine import ensure_day
+
+# Create tomorrow's planner this many seconds before midnight
+PREINIT_LEAD = 300
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+logger = logging.getLogger(__name__)
+
+
+def _preinit_loop(stop, clock, storage, lead):
+    while not stop.is_set():
+        wait = clock.seconds_until_rollover() - lead
+        if wait > 0:
+            # Re-check after waking in case the clock was adjusted
+            stop.wait(wait)
+            continue
+        try:
+            ensure_day(clock.tomorrow(), storage)
+        except Exception:
+            # Keep the thread alive for the next night; the request
+            # path will create the day instead.
+            logger.exception("Could not pre-create tomorrow's planner")
+        stop.wait(clock.seconds_until_rollover() + 1)
+
+
+def start_preinit(storage=None, lead=PREINIT_LEAD, clock=None):
+    """
+    Start a background thread that creates the next day's planner from
+    routine.json shortly before midnight, so the first request of the
+    day does not pay for initialization. Only one thread is started per
+    process; later calls return the running one's stop event.
+    Args:
+        storage (Storage, optional): Backend to create days in. Defaults
+            to get_storage().
+        lead (float): Seconds before midnight to run. Defaults to 300.
+        clock (Clock, optional): Clock to follow. Defaults to
+            get_clock().
+    Returns:
+        threading.Event: Set it to stop the scheduler.
+    """
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is not None and _scheduler[0].is_alive():
+            return _scheduler[1]
+        stop = threading.Event()
+        thread = threading.Thread(
+            target=_preinit_loop, name="planner-preinit", daemon=True,
+            args=(stop, clock or get_clock(), storage, lead))
+        thread.start()
+        _scheduler = (thread, stop)
+        return stop
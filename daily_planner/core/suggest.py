@@ -0,0 +1,277 @@
+from itertools import combinations, product
+import threading
+import numpy as np
+from ..clock import today
+from ..storage import get_storage
+from ..storage.ops import NUTRIENTS
+from .food_index import get_food_index
+from .profile import day_summary
+
+# Largest amount of one food in a suggestion, in grams
+MAX_GRAMS = 400
+# Suggested amounts are rounded to this many grams
+GRAM_STEP = 5
+# Candidates kept per pruning criterion before combining foods
+POOL_PER_CRITERION = 8
+# Score multiplier per previously logged food when preferring them
+LOGGED_BONUS = 0.8
+# Days of history searched for previously logged foods
+LOGGED_DAYS = 30
+
+_matrices = {}
+_matrices_lock = threading.Lock()
+
+
+def food_matrix(storage=None):
+    """
+    Get the nutrient matrix of the food database, rebuilt only when the
+    database changes.
+    Args:
+        storage (Storage, optional): Backend holding the food database.
+            Defaults to get_storage().
+    Returns:
+        tuple: (names, matrix) with matrix of shape (len(names), 3)
+            holding protein, fat and carbon per gram.
+    """
+    storage = storage or get_storage()
+    stamp = storage.food_db_stamp()
+    cached = _matrices.get(storage)
+    if cached is not None and cached[0] == stamp:
+        return cached[1], cached[2]
+    with _matrices_lock:
+        foods = get_food_index(storage).foods
+        names = list(foods)
+        matrix = np.array(
+            [[foods[n].get(k, 0) or 0 for k in NUTRIENTS] for n in names],
+            dtype=float).reshape(-1, len(NUTRIENTS)) / 100.0
+        _matrices[storage] = (stamp, names, matrix)
+    return names, matrix
+
+
+def logged_foods(storage=None, days=LOGGED_DAYS):
+    """
+    Collect the names of foods logged in recent days.
+    Args:
+        storage (Storage, optional): Backend to read. Defaults to
+            get_storage().
+        days (int): Number of most recent days to search.
+    Returns:
+        set: Food names.
+    """
+    storage = storage or get_storage()
+    names = set()
+    for date_str in storage.list_days()[-days:]:
+        for items in storage.load_day(date_str).get("food", {}).values():
+            for item in items:
+                if isinstance(item, dict) and item.get("name"):
+                    names.add(item["name"])
+    return names
+
+
+def remaining_budget(data, date_str=None):
+    """
+    Get the protein, fat and carbs still left for a day.
+    Args:
+        data (dict): Day document.
+        date_str (str, optional): Date of the document.
+    Returns:
+        dict: Grams left per nutrient (never negative).
+    """
+    summary = day_summary(data, date_str)
+    return {k: round(max(0.0, summary["targets"][k] - summary["totals"][k]),
+                     2) for k in NUTRIENTS}
+
+
+def _solve(A, b, max_grams):
+    """
+    Bounded least squares for a batch of food combinations.
+    Minimizes |A x - b|^2 with 0 <= x <= max_grams exactly: every food
+    is either at a bound or free, so each of the 3**k cases solves the
+    free foods' normal equations and the best feasible case wins.
+    Args:
+        A (np.ndarray): (M, nutrients, k) weighted per-gram nutrients.
+        b (np.ndarray): (nutrients,) weighted budget.
+        max_grams (float): Upper bound per food.
+    Returns:
+        tuple: (x of shape (M, k), squared error of shape (M,)).
+    """
+    m, _, k = A.shape
+    best_x = np.zeros((m, k))
+    best_err = np.full(m, np.inf)
+    for states in product((None, 0.0, max_grams), repeat=k):
+        free = [j for j, s in enumerate(states) if s is None]
+        x = np.array([0.0 if s is None else s for s in states])
+        x = np.broadcast_to(x, (m, k)).copy()
+        residual = b - np.einsum("mnk,mk->mn", A, x)
+        ok = np.ones(m, dtype=bool)
+        if free:
+            F = A[:, :, free]
+            gram = np.einsum("mnf,mng->mfg", F, F)
+            # A tiny ridge keeps foods without nutrients solvable
+            gram += np.eye(len(free)) * 1e-12
+            rhs = np.einsum("mnf,mn->mf", F, residual)
+            sol = np.linalg.solve(gram, rhs[..., None])[..., 0]
+            ok = ((sol >= -1e-9) & (sol <= max_grams + 1e-9)).all(axis=1)
+            x[:, free] = np.clip(sol, 0, max_grams)
+            residual = b - np.einsum("mnk,mk->mn", A, x)
+        err = np.einsum("mn,mn->m", residual, residual)
+        better = ok & (err < best_err)
+        best_x[better] = x[better]
+        best_err[better] = err[better]
+    return best_x, best_err
+
+
+def suggest_foods(budget, max_foods=3, count=3, prefer=None,
+                  max_grams=MAX_GRAMS, storage=None):
+    """
+    Find gram amounts of one to max_foods foods that best fill a macro
+    budget.
+
+    Errors are relative to each nutrient's budget. Every food is scored
+    alone in one vectorized pass; the pool for combinations is the best
+    single foods plus the foods richest in each nutrient (and the best
+    preferred foods), and pairs/triples from the pool are solved as a
+    batch.
+    Args:
+        budget (dict): Grams of protein, fat and carbon to reach.
+        max_foods (int): Foods per suggestion, 1 to 3. Defaults to 3.
+        count (int): Number of suggestions. Defaults to 3.
+        prefer (set, optional): Food names to favor, e.g. from
+            logged_foods().
+        max_grams (float): Largest amount of one food.
+        storage (Storage, optional): Backend holding the food database.
+    Returns:
+        list: Suggestions, best first, each {"foods": [{"name", "grams",
+            "protein", "fat", "carbon"}], "totals", "error"}.
+    """
+    names, matrix = food_matrix(storage)
+    target = np.array([budget.get(k, 0) for k in NUTRIENTS], dtype=float)
+    if not names or not target.any():
+        return []
+    weights = 1.0 / np.maximum(target, 1.0)
+    A = matrix * weights
+    b = target * weights
+    preferred = np.array([n in prefer for n in names]) if prefer else None
+
+    def scored(combos, A_sub):
+        x, err = _solve(A_sub, b, max_grams)
+        if preferred is not None:
+            err = err * LOGGED_BONUS ** preferred[combos].sum(axis=1)
+        return x, err
+
+    singles = np.arange(len(names))[:, None]
+    x1, err1 = scored(singles, A[:, :, None])
+    results = [(err1, singles, x1)]
+    if max_foods > 1:
+        pool = set(np.argsort(err1)[:POOL_PER_CRITERION].tolist())
+        share = A / np.maximum(np.linalg.norm(A, axis=1, keepdims=True),
+                               1e-12)
+        for n in range(len(NUTRIENTS)):
+            if target[n] > 0:
+                pool.update(np.argsort(-share[:, n])
+                            [:POOL_PER_CRITERION].tolist())
+        if preferred is not None and preferred.any():
+            liked = np.flatnonzero(preferred)
+            pool.update(liked[np.argsort(err1[liked])]
+                        [:POOL_PER_CRITERION].tolist())
+        pool = sorted(pool)
+        for k in range(2, min(max_foods, 3) + 1):
+            combos = np.array(list(combinations(pool, k)), dtype=np.intp)
+            if len(combos):
+                x, err = scored(combos, A[combos].transpose(0, 2, 1))
+                results.append((err, combos, x))
+
+    # Re-score after rounding the amounts, which can reorder close calls
+    scored_suggestions, seen = [], set()
+    for err, combos, x in results:
+        for i in np.argsort(err)[:count * 4]:
+            grams = np.round(x[i] / GRAM_STEP) * GRAM_STEP
+            keep = grams > 0
+            combo = combos[i][keep]
+            key = frozenset(combo.tolist())
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            residual = A[combo].T @ grams[keep] - b
+            score = float(residual @ residual)
+            if preferred is not None:
+                score *= LOGGED_BONUS ** int(preferred[combo].sum())
+            scored_suggestions.append((score, len(combo), combo,
+                                       grams[keep]))
+    scored_suggestions.sort(key=lambda s: s[:2])
+    return [_suggestion(names, matrix, combo, grams, target)
+            for _, _, combo, grams in scored_suggestions[:count]]
+
+
+def _suggestion(names, matrix, combo, grams, target):
+    foods = []
+    for i, g in zip(combo.tolist(), grams.tolist()):
+        amounts = matrix[i] * g
+        foods.append({"name": names[i], "grams": g, **{
+            k: round(float(v), 1) for k, v in zip(NUTRIENTS, amounts)}})
+    totals = matrix[combo].T @ grams
+    rel = (totals - target) / np.maximum(target, 1.0)
+    return {
+        "foods": foods,
+        "totals": {k: round(float(v), 1) for k, v in zip(NUTRIENTS, totals)},
+        "error": round(float(np.sqrt(np.mean(rel ** 2))) * 100, 1),
+    }
+
+
+def suggest_for_day(date_str=None, max_foods=3, count=3,
+                    prefer_logged=False, storage=None):
+    """
+    Suggest foods for the macros still left on a day.
+    Args:
+        date_str (str, optional): Date 'YYYY-MM-DD'. Defaults to today.
+        max_foods (int): Foods per suggestion, 1 to 3.
+        count (int): Number of suggestions.
+        prefer_logged (bool): Favor foods logged in recent days.
+        storage (Storage, optional): Backend to use.
+    Returns:
+        dict: {"date", "remaining", "suggestions"}.
+    Raises:
+        FileNotFoundError: If the day has no planner.
+    """
+    storage = storage or get_storage()
+    date_str = date_str or today()
+    remaining = remaining_budget(storage.load_day(date_str), date_str)
+    prefer = logged_foods(storage) if prefer_logged else None
+    return {
+        "date": date_str,
+        "remaining": remaining,
+        "suggestions": suggest_foods(remaining, max_foods, count, prefer,
+                                     storage=storage),
+    }
+
+
+def show_suggestions(date_str=None, max_foods=3, count=3,
+                     prefer_logged=False):
+    """
+    Print meal suggestions for the macros still left on a day.
+    Args:
+        date_str (str, optional): Date 'YYYY-MM-DD'. Defaults to today.
+        max_foods (int): Foods per suggestion, 1 to 3.
+        count (int): Number of suggestions.
+        prefer_logged (bool): Favor foods logged in recent days.
+    Returns:
+        None
+    """
+    try:
+        result = suggest_for_day(date_str, max_foods, count, prefer_logged)
+    except FileNotFoundError:
+        print(f"[!] No planner for {date_str or today()}.")
+        return
+    left = result["remaining"]
+    print(f"[Remaining] P {left['protein']}g  F {left['fat']}g  "
+          f"C {left['carbon']}g")
+    if not result["suggestions"]:
+        print("[!] No suggestions: nothing is left to fill or no food "
+              "fits the remaining budget.")
+        return
+    for i, s in enumerate(result["suggestions"], 1):
+        t = s["totals"]
+        print(f"\n  {i}. P {t['protein']}g  F {t['fat']}g  C {t['carbon']}g"
+              f"  (off by {s['error']}%)")
+        for food in s["foods"]:
+            print(f"     {food['grams']:>5.0f}g  {food['name']}")
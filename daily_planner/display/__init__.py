@@ -1,5 +1,18 @@
-from .routine import show_routine, get_routine_lines
-from .plan import show_plan, get_plan_lines
-from .goals import show_goals, get_goals_lines
-from .food import show_food, get_food_lines, make_bar
-from .summary import show_all_columns, pad_display
+from ..lazy import lazy_exports
+
+# Submodules load on first use; 'show all' pulls in wcwidth, the
+# single-section views do not
+__getattr__, __dir__ = lazy_exports(__name__, {
+    "show_routine": "routine",
+    "get_routine_lines": "routine",
+    "show_plan": "plan",
+    "get_plan_lines": "plan",
+    "show_goals": "goals",
+    "get_goals_lines": "goals",
+    "show_food": "food",
+    "get_food_lines": "food",
+    "make_bar": "food",
+    "show_all_columns": "summary",
+    "watch_all_columns": "summary",
+    "pad_display": "summary",
+})
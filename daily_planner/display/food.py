@@ -1,64 +1,57 @@
-from ..file_utils import read_json
-from ..constants import USER_PROFILE_FILE
+from ..storage import get_storage
+from ..core.profile import day_summary
 
 
-def show_food(file_path):
+def show_food(date_str):
     """
     Display the food log for the given file.
     Args:
-        file_path (str): Path to the planner file.
+        date_str (str): Planner date in 'YYYY-MM-DD' format.
     Returns:
         None
     """
-    data = read_json(file_path)
+    data = get_storage().load_day(date_str)
     print("\n[Food] Meals:")
-    for line in get_food_lines(data)[1:]:
+    for line in get_food_lines(data, date_str)[1:]:
         print(line)
 
 
-def get_food_lines(data):
+def get_food_lines(data, date_str=None):
     """
     Get formatted lines for the food log, including nutrients and water.
     Args:
         data (dict): Planner data loaded from file.
+        date_str (str, optional): Planner date, used to pick the targets
+            that applied that day. Defaults to the current profile.
     Returns:
         list: List of formatted strings for display.
     """
     lines = ["[Food] Meals:"]
-    profile = read_json(USER_PROFILE_FILE)
-    weight = profile.get("weight", 0)
-    tall = profile.get("tall", 0)
-    target_p = profile.get("protein_factor", 0) * weight
-    target_f = profile.get("fat_factor", 0) * weight
-    target_c = profile.get("carbon_factor", 0) * weight
-    target_w = profile.get("water_factor", 0) * (tall + weight)
-    total_protein = 0.0
-    total_fat = 0.0
-    total_carbon = 0.0
+    summary = day_summary(data, date_str)
+    targets = summary["targets"]
+    target_p = targets["protein"]
+    target_f = targets["fat"]
+    target_c = targets["carbon"]
+    target_w = targets["water"]
     for meal in ["breakfast", "lunch", "dinner"]:
         items = data.get("food", {}).get(meal, [])
         lines.append(f"  {meal.capitalize()}:")
-        meal_protein = 0.0
-        meal_fat = 0.0
-        meal_carbon = 0.0
         if items:
             for i, food in enumerate(items, 1):
                 name = food.get("name", str(food))
                 lines.append(f"    {i}. {name}")
-                meal_protein += food.get("protein", 0.0)
-                meal_fat += food.get("fat", 0.0)
-                meal_carbon += food.get("carbon", 0.0)
         else:
             lines.append("    (none)")
-        total_protein += meal_protein
-        total_fat += meal_fat
-        total_carbon += meal_carbon
+    totals = summary["totals"]
+    total_protein = totals["protein"]
+    total_fat = totals["fat"]
+    total_carbon = totals["carbon"]
     lines.append("")
     lines.append("  Total:")
     lines.append(f"    Protein: {total_protein:.1f}g")
     lines.append(f"    Fat: {total_fat:.1f}g")
     lines.append(f"    Carbon: {total_carbon:.1f}g")
-    total_water = data.get("water", 0)
+    total_water = totals["water"]
     lines.append(f"    Water: {total_water} ml")
     lines.append(" " * ((35//2) - 12) + "=" * 24 + (" " * ((35//2) - 12)))
     lines.append("")
@@ -1,15 +1,15 @@
-from ..file_utils import read_json
+from ..storage import get_storage
 
 
-def show_goals(file_path):
+def show_goals(date_str):
     """
     Display the goals (focus and todo) for the given file.
     Args:
-        file_path (str): Path to the planner file.
+        date_str (str): Planner date in 'YYYY-MM-DD' format.
     Returns:
         None
     """
-    data = read_json(file_path)
+    data = get_storage().load_day(date_str)
     print("\n[Goals] Focus:")
     for i, g in enumerate(data["goals"].get("focus", []), 1):
         icon = "[✓]" if g["done"] else "[ ]"
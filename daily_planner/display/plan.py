@@ -1,15 +1,15 @@
-from ..file_utils import read_json
+from ..storage import get_storage
 
 
-def show_plan(file_path):
+def show_plan(date_str):
     """
     Display the daily planning schedule for the given file.
     Args:
-        file_path (str): Path to the planner file.
+        date_str (str): Planner date in 'YYYY-MM-DD' format.
     Returns:
         None
     """
-    data = read_json(file_path)
+    data = get_storage().load_day(date_str)
     print("\n[Schedule] Daily Planning:")
     for h in range(5, 25):
         hour = f"{h:02}"
@@ -1,15 +1,15 @@
-from ..file_utils import read_json
+from ..storage import get_storage
 
 
-def show_routine(file_path):
+def show_routine(date_str):
     """
     Display the daily routine checklist for the given file.
     Args:
-        file_path (str): Path to the planner file.
+        date_str (str): Planner date in 'YYYY-MM-DD' format.
     Returns:
         None
     """
-    data = read_json(file_path)
+    data = get_storage().load_day(date_str)
     print("\n[Checklist] Daily Routine:")
     for section, items in data["tasks"].items():
         print(f"\n[{section}]")
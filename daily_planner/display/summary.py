@@ -1,10 +1,26 @@
-from ..file_utils import read_json
+import hashlib
+import json
+import sys
+import time
+from functools import lru_cache
+from .. import metrics
+from ..core.profile import get_targets
+from ..storage import get_storage
 from .routine import get_routine_lines
 from .plan import get_plan_lines
 from .goals import get_goals_lines
 from .food import get_food_lines
 from wcwidth import wcswidth
 
+CLEAR_SCREEN = "\033[H\033[J"
+
+# Planner lines repeat a lot between frames, so widths are memoized.
+display_width = lru_cache(maxsize=4096)(wcswidth)
+metrics.track_cache("display_width", display_width)
+
+# column name -> (data hash, padded lines)
+_column_cache = {}
+
 
 def pad_display(s, width):
     """
@@ -15,37 +31,128 @@ def pad_display(s, width):
     Returns:
         str: The padded string.
     """
-    display_len = wcswidth(s)
+    display_len = display_width(s)
     padding = max(0, width - display_len)
     return s + ' ' * padding
 
 
-def show_all_columns(file_path):
+def _routine_column(data, date_str):
+    return (data["tasks"], data["done"]), lambda: get_routine_lines(data)
+
+
+def _plan_column(data, date_str):
+    return data.get("plan"), lambda: get_plan_lines(data)
+
+
+def _goals_column(data, date_str):
+    return data.get("goals"), lambda: get_goals_lines(data)
+
+
+def _food_column(data, date_str):
+    # Targets come from the profile, so they are part of the key too.
+    key = (data.get("food"), data.get("food_totals"), data.get("water"),
+           get_targets(date_str))
+    return key, lambda: get_food_lines(data, date_str)
+
+
+COLUMNS = (
+    ("routine", 30, _routine_column),
+    ("plan", 30, _plan_column),
+    ("goals", 30, _goals_column),
+    ("food", 35, _food_column),
+)
+
+
+def _render_column(name, width, key_parts, build):
+    """
+    Get a column's padded lines, rebuilding them only if its data changed.
+    Args:
+        name (str): Column name.
+        width (int): Display width to pad to.
+        key_parts: JSON-serializable data the column is rendered from.
+        build (callable): Returns the column's unpadded lines.
+    Returns:
+        list: Padded lines.
+    """
+    blob = json.dumps(key_parts, sort_keys=True, ensure_ascii=False)
+    key = hashlib.sha1(blob.encode("utf-8")).digest()
+    cached = _column_cache.get(name)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    lines = [pad_display(line, width) for line in build()]
+    _column_cache[name] = (key, lines)
+    return lines
+
+
+def render_all_columns(data, date_str):
+    """
+    Render all planner columns side by side into one frame.
+    Args:
+        data (dict): Planner data.
+        date_str (str): Planner date in 'YYYY-MM-DD' format.
+    Returns:
+        str: The frame, one newline-terminated row per line.
+    """
+    columns = []
+    for name, width, source in COLUMNS:
+        key_parts, build = source(data, date_str)
+        columns.append((width, _render_column(name, width, key_parts,
+                                              build)))
+    max_lines = max(len(lines) for _, lines in columns)
+    rows = []
+    for i in range(max_lines):
+        rows.append(" | ".join(
+            lines[i] if i < len(lines) else pad_display(' ', width)
+            for width, lines in columns))
+    return "\n".join(rows) + "\n"
+
+
+def show_all_columns(date_str):
     """
     Display all planner columns side by side:
     routine, plan, goals, food, and exercise.
 
     Args:
-        file_path (str): Path to the planner file.
+        date_str (str): Planner date in 'YYYY-MM-DD' format.
+
+    Returns:
+        None
+    """
+    data = get_storage().load_day(date_str)
+    sys.stdout.write(render_all_columns(data, date_str))
+    sys.stdout.flush()
+
 
+def watch_all_columns(date_str, interval=1.0):
+    """
+    Redraw all planner columns whenever the day or the profile changes,
+    until interrupted with Ctrl-C.
+    Args:
+        date_str (str): Planner date in 'YYYY-MM-DD' format.
+        interval (float): Seconds between change checks. Defaults to 1.
     Returns:
         None
     """
-    data = read_json(file_path)
-    col1 = get_routine_lines(data)
-    col2 = get_plan_lines(data)
-    col3 = get_goals_lines(data)
-    col4 = get_food_lines(data)
-    max_lines = max(len(col1), len(col2), len(col3), len(col4))
-    col1 += [' '] * (max_lines - len(col1))
-    col2 += [' '] * (max_lines - len(col2))
-    col3 += [' '] * (max_lines - len(col3))
-    col4 += [' '] * (max_lines - len(col4))
-    widths = [30, 30, 30, 35]
-    for l1, l2, l3, l4 in zip(col1, col2, col3, col4):
-        print(
-            f"{pad_display(l1, widths[0])} | "
-            f"{pad_display(l2, widths[1])} | "
-            f"{pad_display(l3, widths[2])} | "
-            f"{pad_display(l4, widths[3])}"
-        )
+    storage = get_storage()
+    last = None
+    try:
+        while True:
+            # day_etag() is a stat() for the JSON backend, so idle
+            # polling never reads or re-renders anything.
+            try:
+                etag = storage.day_etag(date_str)
+            except FileNotFoundError:
+                etag = None
+            stamp = (etag, get_targets(date_str))
+            if stamp != last:
+                last = stamp
+                if etag is None:
+                    frame = f"[!] No planner for {date_str} yet.\n"
+                else:
+                    frame = render_all_columns(storage.load_day(date_str),
+                                               date_str)
+                sys.stdout.write(CLEAR_SCREEN + frame)
+                sys.stdout.flush()
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print()
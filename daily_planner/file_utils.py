@@ -1,4 +1,7 @@
 import json
+import os
+import threading
+from . import metrics
 
 
 def read_json(path):
@@ -11,17 +14,56 @@ def read_json(path):
     Returns:
         dict: Parsed JSON data.
     """
+    metrics.inc("planner_json_reads_total")
     with open(path, encoding='utf-8') as f:
         return json.load(f)
 
 
+def temp_path(path):
+    """
+    Get a temporary file name next to a file, unique to this writer.
+
+    The pid and thread id keep concurrent writers (threads of the web
+    app, CLI processes) from truncating each other's half-written file.
+
+    Args:
+        path (str): The file that will be replaced.
+
+    Returns:
+        str: Hidden temporary path in the same directory.
+    """
+    head, tail = os.path.split(path)
+    return os.path.join(
+        head, f".{tail}.{os.getpid()}-{threading.get_ident()}.tmp")
+
+
 def write_json(path, data):
     """
     Write dictionary content to a JSON file.
 
+    The payload goes to a temporary file in the same directory that is
+    flushed to disk and then renamed over the target, so readers and a
+    crash only ever see the old or the new document, never a mix.
+
     Args:
         path (str): The file path to write to.
         data (dict): The data to serialize into JSON.
     """
-    with open(path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    payload = json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+    tmp = temp_path(path)
+    # 0o666 lets the umask decide, matching a plain open(path, 'w').
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+    metrics.inc("planner_json_writes_total")
+    metrics.inc("planner_json_bytes_written_total", len(payload))
@@ -0,0 +1,30 @@
+import importlib
+
+
+def lazy_exports(package, exports):
+    """
+    Build module-level __getattr__ and __dir__ (PEP 562) that import a
+    package's re-exported names from their submodules on first use, so
+    importing the package does not load every submodule.
+    Args:
+        package (str): The package's __name__.
+        exports (dict): Mapping of exported name to submodule name,
+            relative to the package.
+    Returns:
+        tuple: (__getattr__, __dir__) functions for the package.
+    """
+    namespace = importlib.import_module(package).__dict__
+
+    def __getattr__(name):
+        module = exports.get(name)
+        if module is None:
+            raise AttributeError(
+                f"module {package!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(f".{module}", package), name)
+        namespace[name] = value
+        return value
+
+    def __dir__():
+        return sorted(set(namespace) | set(exports))
+
+    return __getattr__, __dir__
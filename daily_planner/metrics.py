@@ -0,0 +1,171 @@
+import bisect
+import threading
+import weakref
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0)
+
+HELP = {
+    "planner_json_reads_total": "JSON files parsed",
+    "planner_json_writes_total": "JSON files written",
+    "planner_json_bytes_written_total": "Bytes of JSON serialized to disk",
+    "planner_http_response_bytes_total": "Bytes of HTTP response bodies",
+    "planner_subprocess_launches_total": "Subprocesses started",
+    "planner_cache_hits_total": "Cache lookups served from memory",
+    "planner_cache_misses_total": "Cache lookups that had to load",
+    "planner_http_request_duration_seconds": "Request latency per route",
+}
+
+_lock = threading.Lock()
+# (name, labels) -> value; labels is a tuple of (key, value) pairs
+_counters = {}
+# (name, labels) -> [bucket counts..., +Inf count, sum]
+_histograms = {}
+# cache name -> object with hits/misses or an lru_cache wrapper
+_caches = weakref.WeakValueDictionary()
+
+
+def inc(name, amount=1, **labels):
+    """
+    Increase a counter.
+    Args:
+        name (str): Metric name, e.g. 'planner_json_reads_total'.
+        amount (int or float): Increment. Defaults to 1.
+        **labels: Label values.
+    Returns:
+        None
+    """
+    key = (name, tuple(sorted(labels.items())) if labels else ())
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def observe(name, value, **labels):
+    """
+    Record a value in a histogram with LATENCY_BUCKETS.
+    Args:
+        name (str): Metric name.
+        value (float): Observed value in seconds.
+        **labels: Label values.
+    Returns:
+        None
+    """
+    key = (name, tuple(sorted(labels.items())))
+    i = bisect.bisect_left(LATENCY_BUCKETS, value)
+    with _lock:
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = [0] * (len(LATENCY_BUCKETS) + 2)
+        hist[i] += 1
+        hist[-1] += value
+
+
+def track_cache(name, cache):
+    """
+    Report a cache's hits and misses, read when metrics are rendered.
+    Args:
+        name (str): Cache label, e.g. 'day'.
+        cache: Object with hits/misses attributes, or a functools
+            lru_cache wrapper.
+    Returns:
+        None
+    """
+    _caches[name] = cache
+
+
+def _cache_counts():
+    counts = {}
+    for name, cache in list(_caches.items()):
+        if hasattr(cache, "cache_info"):
+            info = cache.cache_info()
+            counts[name] = (info.hits, info.misses)
+        else:
+            counts[name] = (cache.hits, cache.misses)
+    return counts
+
+
+def snapshot():
+    """
+    Copy the current metric values.
+    Args:
+        None
+    Returns:
+        dict: {"counters": {(name, labels): value}, "histograms":
+            {(name, labels): [bucket counts..., +Inf, sum]}}.
+    """
+    with _lock:
+        counters = dict(_counters)
+        histograms = {k: list(v) for k, v in _histograms.items()}
+    for name, (hits, misses) in _cache_counts().items():
+        labels = (("cache", name),)
+        counters[("planner_cache_hits_total", labels)] = hits
+        counters[("planner_cache_misses_total", labels)] = misses
+    return {"counters": counters, "histograms": histograms}
+
+
+def _labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"')
+               for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"'
+                          for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _number(value):
+    # Counters must keep every digit: '%g' turns 12345678 into 1.23457e+07
+    if isinstance(value, float) and not value.is_integer():
+        return repr(value)
+    return str(int(value))
+
+
+def _header(lines, name, kind):
+    if name in HELP:
+        lines.append(f"# HELP {name} {HELP[name]}")
+    lines.append(f"# TYPE {name} {kind}")
+
+
+def render_prometheus():
+    """
+    Render all metrics in the Prometheus text exposition format.
+    Args:
+        None
+    Returns:
+        str: Text for a /metrics endpoint.
+    """
+    snap = snapshot()
+    lines = []
+    seen = set()
+    for (name, labels), value in sorted(snap["counters"].items()):
+        if name not in seen:
+            _header(lines, name, "counter")
+            seen.add(name)
+        lines.append(f"{name}{_labels(labels)} {_number(value)}")
+    for (name, labels), hist in sorted(snap["histograms"].items()):
+        if name not in seen:
+            _header(lines, name, "histogram")
+            seen.add(name)
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), hist[:-1]):
+            cumulative += count
+            le = bound if isinstance(bound, str) else f"{bound:g}"
+            lines.append(f"{name}_bucket{_labels(labels, [('le', le)])} "
+                         f"{cumulative}")
+        lines.append(f"{name}_sum{_labels(labels)} {_number(hist[-1])}")
+        lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    """
+    Clear counters and histograms (cache statistics are kept).
+    Args:
+        None
+    Returns:
+        None
+    """
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
@@ -0,0 +1,102 @@
+import atexit
+import sys
+import time
+
+
+class _TimedLoader:
+    """
+    Loader proxy that times exec_module() of the wrapped loader.
+    """
+
+    def __init__(self, loader, profiler, name):
+        self._loader = loader
+        self._profiler = profiler
+        self._name = name
+
+    def __getattr__(self, attr):
+        return getattr(self._loader, attr)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        self._profiler.enter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._profiler.leave(self._name)
+
+
+class ImportProfiler:
+    """
+    Meta path finder recording how long each newly imported module took.
+
+    It asks the remaining finders for the spec and wraps the loader, so
+    self time (the module body) and cumulative time (including the
+    imports it triggers) are measured like `python -X importtime`.
+    """
+
+    def __init__(self):
+        self.records = []
+        self.started = time.perf_counter()
+        self._stack = []
+
+    def find_spec(self, name, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = _TimedLoader(spec.loader, self, name)
+        return spec
+
+    def enter(self):
+        self._stack.append([time.perf_counter(), 0.0])
+
+    def leave(self, name):
+        start, children = self._stack.pop()
+        total = time.perf_counter() - start
+        if self._stack:
+            self._stack[-1][1] += total
+        self.records.append((name, total - children, total,
+                             len(self._stack)))
+
+    def report(self, limit=25, file=None):
+        """
+        Print the slowest imports and the overall timings.
+        Args:
+            limit (int): Number of modules to list. Defaults to 25.
+            file: Stream to write to. Defaults to sys.stderr.
+        Returns:
+            None
+        """
+        file = file or sys.stderr
+        elapsed = time.perf_counter() - self.started
+        imported = sum(r[2] for r in self.records if r[3] == 0)
+        print("\n[Startup profile] slowest imports (ms):", file=file)
+        print(f"  {'self':>7} {'cumul':>7}  module", file=file)
+        for name, own, total, _ in sorted(self.records,
+                                          key=lambda r: -r[2])[:limit]:
+            print(f"  {own * 1000:7.1f} {total * 1000:7.1f}  {name}",
+                  file=file)
+        print(f"  {len(self.records)} modules imported in "
+              f"{imported * 1000:.1f} ms; command finished after "
+              f"{elapsed * 1000:.1f} ms", file=file)
+
+
+def enable():
+    """
+    Start profiling imports and print a report when the process exits.
+    Args:
+        None
+    Returns:
+        ImportProfiler: The installed profiler.
+    """
+    profiler = ImportProfiler()
+    sys.meta_path.insert(0, profiler)
+    atexit.register(profiler.report)
+    return profiler
@@ -0,0 +1,46 @@
+from .base import Storage, VersionConflict
+from .ops import OpError, apply_op, apply_ops
+from .json_files import JsonStorage
+from ..constants import STORAGE_MODE, SQLITE_FILE
+from ..lazy import lazy_exports
+
+# sqlite3 is only imported when the SQLite backend is used
+__getattr__, __dir__ = lazy_exports(__name__, {"SqliteStorage": "sqlite"})
+
+_storage = None
+
+
+def get_storage():
+    """
+    Get the storage backend selected by PLANNER_STORAGE.
+    Args:
+        None
+    Returns:
+        Storage: Shared backend instance ("json", "journal" or "sqlite").
+    Raises:
+        ValueError: If the configured mode is unknown.
+    """
+    global _storage
+    if _storage is None:
+        if STORAGE_MODE == "json":
+            _storage = JsonStorage()
+        elif STORAGE_MODE == "journal":
+            _storage = JsonStorage(journal=True)
+        elif STORAGE_MODE == "sqlite":
+            from .sqlite import SqliteStorage
+            _storage = SqliteStorage(SQLITE_FILE)
+        else:
+            raise ValueError(f"Unknown storage mode: {STORAGE_MODE}")
+    return _storage
+
+
+def set_storage(storage):
+    """
+    Replace the shared storage backend (e.g. for scripts and benchmarks).
+    Args:
+        storage (Storage): Backend to use from now on.
+    Returns:
+        None
+    """
+    global _storage
+    _storage = storage
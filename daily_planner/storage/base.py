@@ -0,0 +1,239 @@
+import copy
+import json
+from .ops import apply_ops
+
+
+class VersionConflict(Exception):
+    """
+    Raised by Storage.apply() when the day is not at the expected
+    version, i.e. someone else changed it since the caller read it.
+    Attributes:
+        version (int): Current version of the day.
+        data (dict): Current day document.
+    """
+
+    def __init__(self, data):
+        self.version = data.get("version", 0)
+        self.data = data
+        super().__init__(f"version conflict: day is at {self.version}")
+
+
+class Storage:
+    """
+    Interface for persisting day documents and the food database.
+
+    Days are addressed by their 'YYYY-MM-DD' date string. Changes are
+    expressed as mutation records (see storage.ops) so backends can
+    persist them without rewriting whole documents.
+    """
+
+    def day_exists(self, date_str):
+        """
+        Check whether a planner exists for a date.
+        Args:
+            date_str (str): Date in 'YYYY-MM-DD' format.
+        Returns:
+            bool: True if the day exists.
+        """
+        raise NotImplementedError
+
+    def load_day(self, date_str):
+        """
+        Load the day document for a date.
+        Args:
+            date_str (str): Date in 'YYYY-MM-DD' format.
+        Returns:
+            dict: Day document.
+        Raises:
+            FileNotFoundError: If there is no planner for the date.
+        """
+        raise NotImplementedError
+
+    def save_day(self, date_str, data):
+        """
+        Store a whole day document, replacing any existing one.
+        Args:
+            date_str (str): Date in 'YYYY-MM-DD' format.
+            data (dict): Day document.
+        Returns:
+            None
+        """
+        raise NotImplementedError
+
+    def create_day(self, date_str, data):
+        """
+        Store a day document unless the date already has one.
+        Backends override this to check and write atomically, so two
+        processes creating the same day cannot overwrite each other.
+        Args:
+            date_str (str): Date in 'YYYY-MM-DD' format.
+            data (dict): Day document.
+        Returns:
+            bool: True if the day was created, False if it existed.
+        """
+        if self.day_exists(date_str):
+            return False
+        self.save_day(date_str, data)
+        return True
+
+    def day_etag(self, date_str):
+        """
+        Get an opaque tag that changes whenever a day document changes.
+        The default hashes the canonical JSON of the document; backends
+        override it with something cheaper when they can.
+        Args:
+            date_str (str): Date in 'YYYY-MM-DD' format.
+        Returns:
+            str: Tag for use as an HTTP ETag.
+        Raises:
+            FileNotFoundError: If there is no planner for the date.
+        """
+        import hashlib  # only needed by backends without a cheap tag
+        data = self.load_day(date_str)
+        blob = json.dumps(data, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha1(blob.encode("utf-8")).hexdigest()[:20]
+
+    def apply(self, date_str, ops, data=None, expected_version=None):
+        """
+        Apply mutation records to a day and persist them.
+        The version check, the ops and the write happen as one unit, so
+        either every op is stored or none is.
+        Args:
+            date_str (str): Date in 'YYYY-MM-DD' format.
+            ops (list): Mutation records.
+            data (dict, optional): Document previously returned by
+                load_day(), used as the starting point by backends that
+                cannot reload it under a lock. It is not modified.
+            expected_version (int, optional): Only apply the ops if the
+                day is still at this version.
+        Returns:
+            dict: The updated day document; use it instead of data.
+        Raises:
+            FileNotFoundError: If there is no planner for the date.
+            VersionConflict: If the day is not at expected_version.
+            OpError: If an op cannot be applied.
+        """
+        current = self.load_day(date_str) if data is None else data
+        if (expected_version is not None
+                and current.get("version", 0) != expected_version):
+            raise VersionConflict(current)
+        if not ops:
+            return current
+        data = apply_ops(copy.deepcopy(current), ops)
+        self.save_day(date_str, data)
+        return data
+
+    def list_days(self):
+        """
+        List the dates that have a planner, oldest first.
+        Args:
+            None
+        Returns:
+            list: Date strings in 'YYYY-MM-DD' format.
+        """
+        raise NotImplementedError
+
+    def iter_days(self, start=None, end=None):
+        """
+        Iterate over stored days within an inclusive date range.
+        Args:
+            start (str, optional): First date. Defaults to the oldest.
+            end (str, optional): Last date. Defaults to the newest.
+        Yields:
+            tuple: (date_str, day document).
+        """
+        for date_str in self.list_days():
+            if start and date_str < start:
+                continue
+            if end and date_str > end:
+                break
+            yield date_str, self.load_day(date_str)
+
+    def load_food_db(self):
+        """
+        Load the whole food database.
+        Args:
+            None
+        Returns:
+            dict: Mapping of food name to nutrients per 100g.
+        """
+        raise NotImplementedError
+
+    def food_db_stamp(self):
+        """
+        Get a value that changes whenever the food database changes.
+        Args:
+            None
+        Returns:
+            object: Comparable freshness stamp.
+        """
+        raise NotImplementedError
+
+    def get_food(self, name):
+        """
+        Look up one food by its exact name.
+        Args:
+            name (str): Food name.
+        Returns:
+            dict or None: Nutrients per 100g, or None if unknown.
+        """
+        return self.load_food_db().get(name)
+
+    def add_food(self, name, info):
+        """
+        Insert a food into the database if it is not there yet.
+        Args:
+            name (str): Food name.
+            info (dict): Nutrients per 100g.
+        Returns:
+            bool: True if inserted, False if the name already exists.
+        """
+        food_db = self.load_food_db()
+        if name in food_db:
+            return False
+        food_db[name] = info
+        self.save_food_db(food_db)
+        return True
+
+    def add_foods(self, foods):
+        """
+        Insert many foods with a single write, skipping existing names.
+        Args:
+            foods (iterable): (name, info) pairs; may be a generator.
+        Returns:
+            int: Number of foods inserted.
+        """
+        food_db = self.load_food_db()
+        added = 0
+        for name, info in foods:
+            if name not in food_db:
+                food_db[name] = info
+                added += 1
+        if added:
+            self.save_food_db(food_db)
+        return added
+
+    def save_food_db(self, food_db):
+        """
+        Replace the whole food database.
+        Args:
+            food_db (dict): Mapping of food name to nutrients per 100g.
+        Returns:
+            None
+        """
+        raise NotImplementedError
+
+    def copy_from(self, other):
+        """
+        Copy every day and the food database from another backend.
+        Args:
+            other (Storage): Source backend.
+        Returns:
+            int: Number of days copied.
+        """
+        count = 0
+        for date_str, data in other.iter_days():
+            self.save_day(date_str, data)
+            count += 1
+        self.save_food_db(other.load_food_db())
+        return count
@@ -0,0 +1,284 @@
+import mmap
+import os
+import struct
+from array import array
+from datetime import date
+from ..constants import COLUMNAR_DIR
+from ..file_utils import read_json, temp_path, write_json
+from .locks import file_lock
+from .ops import NUTRIENTS, food_totals
+
+MAGIC = b"PLNRCOL1"
+# magic, number of columns, reserved
+HEADER = struct.Struct("<8sII")
+# column name, array typecode, item count, byte offset
+ENTRY = struct.Struct("<16scxxxIQ")
+EPOCH = date(1970, 1, 1).toordinal()
+
+
+def day_number(date_str):
+    """
+    Convert a date to days since 1970-01-01 (numpy's datetime64[D]).
+    Args:
+        date_str (str): Date in 'YYYY-MM-DD' format.
+    Returns:
+        int: Day number.
+    """
+    return date.fromisoformat(date_str).toordinal() - EPOCH
+
+
+def day_string(number):
+    """
+    Convert a day number back to a date string.
+    Args:
+        number (int): Days since 1970-01-01.
+    Returns:
+        str: Date in 'YYYY-MM-DD' format.
+    """
+    return date.fromordinal(int(number) + EPOCH).isoformat()
+
+
+class _Strings:
+    """
+    String dictionary shared by the task, goal and food name columns.
+    """
+
+    def __init__(self):
+        self.ids = {}
+
+    def id(self, text):
+        return self.ids.setdefault(text, len(self.ids))
+
+    def columns(self):
+        blob = bytearray()
+        offsets = array("I", [0])
+        for text in self.ids:
+            blob += text.encode("utf-8")
+            offsets.append(len(blob))
+        return array("B", blob), offsets
+
+
+def write_segment(path, days):
+    """
+    Write a columnar segment for a set of days.
+
+    Per-day columns hold the day number, macro totals, water and goal
+    counts; tasks, goals and food entries are flattened into parallel
+    columns with per-day offsets, names being ids into a string
+    dictionary. The file is replaced atomically.
+    Args:
+        path (str): Segment file path.
+        days (list): (date_str, day document) tuples, oldest first.
+    Returns:
+        None
+    """
+    strings = _Strings()
+    cols = {
+        "day": array("i"), "water": array("d"),
+        "goals_done": array("i"), "goals_total": array("i"),
+        "task_offsets": array("I", [0]), "task_ids": array("I"),
+        "task_done": array("B"),
+        "goal_offsets": array("I", [0]), "goal_ids": array("I"),
+        "goal_done": array("B"),
+        "food_offsets": array("I", [0]), "food_ids": array("I"),
+        "food_weight": array("d"),
+    }
+    for k in NUTRIENTS:
+        cols[k] = array("d")
+    for date_str, data in days:
+        cols["day"].append(day_number(date_str))
+        totals = food_totals(data)["day"]
+        for k in NUTRIENTS:
+            cols[k].append(totals[k])
+        cols["water"].append(data.get("water", 0) or 0)
+        for section, items in data.get("tasks", {}).items():
+            done = data.get("done", {}).get(section, [])
+            for j, task in enumerate(items):
+                cols["task_ids"].append(strings.id(f"{section}/{task}"))
+                cols["task_done"].append(j < len(done) and bool(done[j]))
+        cols["task_offsets"].append(len(cols["task_ids"]))
+        goals_done = 0
+        for section, goals in data.get("goals", {}).items():
+            for g in goals:
+                cols["goal_ids"].append(
+                    strings.id(f"{section}/{g.get('text', '')}"))
+                cols["goal_done"].append(bool(g.get("done")))
+                goals_done += bool(g.get("done"))
+        cols["goal_offsets"].append(len(cols["goal_ids"]))
+        cols["goals_done"].append(goals_done)
+        cols["goals_total"].append(
+            cols["goal_offsets"][-1] - cols["goal_offsets"][-2])
+        for items in data.get("food", {}).values():
+            for item in items:
+                if isinstance(item, str):
+                    item = {"name": item}
+                cols["food_ids"].append(strings.id(item.get("name", "")))
+                cols["food_weight"].append(item.get("weight") or 0.0)
+        cols["food_offsets"].append(len(cols["food_ids"]))
+    cols["strings"], cols["string_offsets"] = strings.columns()
+
+    offset = HEADER.size + ENTRY.size * len(cols)
+    entries = []
+    for name, values in cols.items():
+        offset = (offset + 7) & ~7
+        entries.append((name, values, offset))
+        offset += len(values) * values.itemsize
+    tmp = temp_path(path)
+    try:
+        with open(tmp, "wb") as f:
+            f.write(HEADER.pack(MAGIC, len(cols), 0))
+            for name, values, start in entries:
+                f.write(ENTRY.pack(name.encode(), values.typecode.encode(),
+                                   len(values), start))
+            for name, values, start in entries:
+                f.write(b"\0" * (start - f.tell()))
+                values.tofile(f)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+class Segment:
+    """
+    Read-only, memory-mapped view of one columnar segment file.
+
+    column() returns zero-copy memoryviews over the mapping; numpy
+    callers can wrap them with np.frombuffer().
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, ncols, _ = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Not a columnar segment: {path}")
+        self._columns = {}
+        for i in range(ncols):
+            name, code, count, start = ENTRY.unpack_from(
+                self._map, HEADER.size + i * ENTRY.size)
+            self._columns[name.rstrip(b"\0").decode()] = (
+                code.decode(), count, start)
+        self._strings = None
+
+    def column(self, name):
+        """
+        Get a column without copying it.
+        Args:
+            name (str): Column name.
+        Returns:
+            memoryview: Typed view of the column's values.
+        """
+        code, count, start = self._columns[name]
+        size = array(code).itemsize
+        view = memoryview(self._map)[start:start + count * size]
+        return view.cast(code)
+
+    def strings(self):
+        """
+        Decode the string dictionary (names of tasks, goals and foods).
+        Args:
+            None
+        Returns:
+            list: Strings indexed by id.
+        """
+        if self._strings is None:
+            blob = self.column("strings")
+            offsets = self.column("string_offsets")
+            self._strings = [bytes(blob[offsets[i]:offsets[i + 1]]).decode()
+                             for i in range(len(offsets) - 1)]
+        return self._strings
+
+    def dates(self):
+        """
+        Get the dates stored in the segment.
+        Args:
+            None
+        Returns:
+            list: Date strings, oldest first.
+        """
+        return [day_string(n) for n in self.column("day")]
+
+
+class ColumnarStore:
+    """
+    Compact columnar copy of past days, one segment file per month.
+
+    The day documents in storage stay the source of truth. refresh()
+    compares each past day's day_etag() with the manifest and rewrites
+    only the months that changed; today and later days are never stored
+    because they are still being edited. Refreshes are serialized by a
+    file lock on the manifest.
+    """
+
+    def __init__(self, storage, root=COLUMNAR_DIR):
+        self.storage = storage
+        self.root = root
+        self.manifest_file = os.path.join(root, "manifest.json")
+
+    def segment_path(self, month):
+        return os.path.join(self.root, f"{month}.col")
+
+    def _manifest(self):
+        if not os.path.exists(self.manifest_file):
+            return {}
+        return read_json(self.manifest_file)
+
+    def refresh(self, before):
+        """
+        Bring the segments up to date with storage.
+        Args:
+            before (str): First date not to store (normally today).
+        Returns:
+            list: Months whose segments were rewritten or removed.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        # One lock covers every month's segment and the manifest, so a
+        # concurrent refresh cannot interleave its writes with ours.
+        with file_lock(self.manifest_file):
+            months = {}
+            for date_str in self.storage.list_days():
+                if date_str >= before:
+                    break
+                months.setdefault(date_str[:7], {})[date_str] = (
+                    self.storage.day_etag(date_str))
+            manifest = self._manifest()
+            changed = []
+            for month, stamps in months.items():
+                if manifest.get(month) == stamps and os.path.exists(
+                        self.segment_path(month)):
+                    continue
+                write_segment(self.segment_path(month), [
+                    (d, self.storage.load_day(d)) for d in stamps])
+                manifest[month] = stamps
+                changed.append(month)
+            for month in set(manifest) - set(months):
+                try:
+                    os.remove(self.segment_path(month))
+                except FileNotFoundError:
+                    pass
+                del manifest[month]
+                changed.append(month)
+            if changed:
+                write_json(self.manifest_file, manifest)
+            return sorted(changed)
+
+    def segments(self, start=None, end=None):
+        """
+        Open the segments overlapping a date range.
+        Args:
+            start (str, optional): First date 'YYYY-MM-DD'.
+            end (str, optional): Last date 'YYYY-MM-DD'.
+        Returns:
+            list: Segment objects, oldest month first.
+        """
+        result = []
+        for month in sorted(self._manifest()):
+            if (start and month < start[:7]) or (end and month > end[:7]):
+                continue
+            result.append(Segment(self.segment_path(month)))
+        return result
@@ -0,0 +1,125 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from .. import metrics
+from ..file_utils import read_json, write_json
+
+# Filesystems may round mtimes to a clock tick; a file rewritten within
+# this long of its cached stamp may carry the same stamp.
+RACY_WINDOW_NS = 20_000_000
+
+
+def file_stamp(path):
+    """
+    Get a cheap freshness stamp for a file.
+    Args:
+        path (str): File path.
+    Returns:
+        tuple or None: (mtime_ns, size), or None if the file is missing.
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def stamp_value(stamp):
+    """
+    Convert a stamp to the form it takes after a JSON round trip, so a
+    stamp saved in a file compares equal to a freshly taken one.
+    Args:
+        stamp (object): A file_stamp() tuple or a backend's stamp.
+    Returns:
+        object: The stamp with tuples turned into lists.
+    """
+    return list(stamp) if isinstance(stamp, tuple) else stamp
+
+
+class DayCache:
+    """
+    LRU cache of parsed day documents keyed by file path.
+
+    Each entry remembers the file's (mtime, size) stamp at load time, so
+    a later edit made by another process (e.g. the CLI through
+    file_utils.write_json) is noticed on the next read with a single
+    stat() call. Writes go through the cache and refresh the entry.
+    Entries cached within RACY_WINDOW_NS of the file's mtime are not
+    trusted: another write in the same clock tick of the same size would
+    leave the stamp unchanged, so they are read again until they age.
+    """
+
+    def __init__(self, maxsize=32, name=None):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if name:
+            metrics.track_cache(name, self)
+
+    def get(self, path):
+        """
+        Get the parsed document for a path, reloading it if it changed.
+        The returned dict is the cached object; callers that mutate it
+        must save it back with put().
+        Args:
+            path (str): Path to the day file.
+        Returns:
+            dict: Parsed day document.
+        Raises:
+            FileNotFoundError: If the file does not exist.
+        """
+        stamp = file_stamp(path)
+        with self._lock:
+            entry = self._entries.get(path)
+            if (entry is not None and stamp is not None
+                    and entry[0] == stamp
+                    and entry[2] - stamp[0] > RACY_WINDOW_NS):
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry[1]
+        self.misses += 1
+        # Keep the stamp taken before reading: if the file changes
+        # mid-read the next get() sees a mismatch and reloads.
+        data = read_json(path)
+        self._store(path, stamp, data)
+        return data
+
+    def put(self, path, data):
+        """
+        Write a document to disk and keep it as the cached copy.
+        Args:
+            path (str): Path to the day file.
+            data (dict): Document to write.
+        Returns:
+            None
+        """
+        try:
+            write_json(path, data)
+        except Exception:
+            self.invalidate(path)
+            raise
+        self._store(path, file_stamp(path), data)
+
+    def invalidate(self, path=None):
+        """
+        Drop one cached document, or all of them.
+        Args:
+            path (str, optional): Path to drop. Defaults to every entry.
+        Returns:
+            None
+        """
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(path, None)
+
+    def _store(self, path, stamp, data):
+        with self._lock:
+            self._entries[path] = (stamp, data, time.time_ns())
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
@@ -0,0 +1,290 @@
+import heapq
+import mmap
+import os
+import struct
+from collections.abc import Mapping
+from ..constants import COMPILED_FOOD_DIR
+from ..file_utils import read_json, temp_path, write_json
+from .day_cache import file_stamp, stamp_value
+from .locks import file_lock
+from .ops import NUTRIENTS
+
+MAGIC = b"PLNRFOOD"
+# magic, record count
+HEADER = struct.Struct("<8sQ")
+# key offset, key length, name offset, name length, nutrients per 100g
+RECORD = struct.Struct("<QIQI" + "d" * len(NUTRIENTS))
+SEPARATOR = b"\n"
+
+
+def compile_food_db(foods, stamp, root=COMPILED_FOOD_DIR):
+    """
+    Write the compiled food store for a food database.
+
+    Three files are written under root: 'keys' holds the normalized
+    names sorted by their UTF-8 bytes and separated by newlines,
+    'names' the original names, and 'records' one fixed-width record
+    per food in key order. meta.json is written last and records the
+    database stamp the store was built from. The whole compile holds
+    the lock of meta.json, so concurrent compiles do not interleave.
+    Args:
+        foods (dict): Mapping of food name to nutrients per 100g.
+        stamp (object): food_db_stamp() of the source database.
+        root (str): Directory of the store.
+    Returns:
+        int: Number of foods compiled.
+    """
+    from ..core.food_index import normalize_name
+    entries = sorted(
+        ((normalize_name(name).encode("utf-8"), i, name)
+         for i, (name, _) in enumerate(foods.items())),
+        key=lambda e: (e[0], e[1]))
+    os.makedirs(root, exist_ok=True)
+    meta_path = os.path.join(root, "meta.json")
+    paths = {part: os.path.join(root, part)
+             for part in ("keys", "names", "records")}
+    tmps = {part: temp_path(path) for part, path in paths.items()}
+    with file_lock(meta_path):
+        try:
+            with open(tmps["keys"], "wb") as keys, \
+                    open(tmps["names"], "wb") as names, \
+                    open(tmps["records"], "wb") as records:
+                records.write(HEADER.pack(MAGIC, len(entries)))
+                key_off = name_off = 0
+                for key, _, name in entries:
+                    raw = name.encode("utf-8")
+                    info = foods[name]
+                    records.write(RECORD.pack(
+                        key_off, len(key), name_off, len(raw),
+                        *(float(info.get(k, 0) or 0) for k in NUTRIENTS)))
+                    keys.write(key + SEPARATOR)
+                    names.write(raw)
+                    key_off += len(key) + len(SEPARATOR)
+                    name_off += len(raw)
+            for part, path in paths.items():
+                os.replace(tmps[part], path)
+        except BaseException:
+            for tmp in tmps.values():
+                try:
+                    os.remove(tmp)
+                except FileNotFoundError:
+                    pass
+            raise
+        write_json(meta_path,
+                   {"stamp": stamp_value(stamp), "count": len(entries)})
+    return len(entries)
+
+
+def map_file(path):
+    """
+    Map a file read-only into memory.
+    Args:
+        path (str): File path.
+    Returns:
+        mmap.mmap or bytes: The mapping, or b"" for an empty file
+            (which cannot be mapped).
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class CompiledFoods(Mapping):
+    """
+    Read-only mapping of food name to nutrients backed by the store.
+    Lookups are a binary search; nothing is loaded up front.
+    """
+
+    def __init__(self, store):
+        self._store = store
+
+    def __getitem__(self, name):
+        i = self._store.find(name)
+        if i is None:
+            raise KeyError(name)
+        return self._store.nutrients(i)
+
+    def __iter__(self):
+        for i in range(self._store.count):
+            yield self._store.name(i)
+
+    def __len__(self):
+        return self._store.count
+
+
+class CompiledFoodStore:
+    """
+    Memory-mapped food database compiled by compile_food_db().
+
+    It offers the lookup interface of FoodIndex (resolve, search, get,
+    foods) without loading the database: exact lookups and prefix
+    ranges binary-search the sorted records, and substring search scans
+    the mapped key file with mmap.find(). Resident memory is the pages
+    touched, so it stays flat as the database grows.
+    """
+
+    def __init__(self, root=COMPILED_FOOD_DIR):
+        self.root = root
+        meta_path = os.path.join(root, "meta.json")
+        # Map all three files from one compile, not a mix of two.
+        with file_lock(meta_path):
+            meta = read_json(meta_path)
+            self._keys = map_file(os.path.join(root, "keys"))
+            self._names = map_file(os.path.join(root, "names"))
+            self._records = map_file(os.path.join(root, "records"))
+        self.stamp = meta["stamp"]
+        magic, self.count = HEADER.unpack_from(self._records, 0)
+        if magic != MAGIC or self.count != meta["count"]:
+            raise ValueError(f"Corrupt compiled food store: {root}")
+        self.foods = CompiledFoods(self)
+
+    def refresh(self):
+        return self
+
+    def _record(self, i):
+        return RECORD.unpack_from(self._records,
+                                  HEADER.size + i * RECORD.size)
+
+    def key(self, i):
+        off, length = self._record(i)[:2]
+        return self._keys[off:off + length]
+
+    def name(self, i):
+        _, _, off, length = self._record(i)[:4]
+        return self._names[off:off + length].decode("utf-8")
+
+    def nutrients(self, i):
+        return dict(zip(NUTRIENTS, self._record(i)[4:]))
+
+    def _lower_bound(self, key):
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.key(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def find(self, name):
+        """
+        Find the record of a stored name.
+        Args:
+            name (str): Exact food name.
+        Returns:
+            int or None: Record number, or None if missing.
+        """
+        from ..core.food_index import normalize_name
+        key = normalize_name(name).encode("utf-8")
+        i = self._lower_bound(key)
+        while i < self.count and self.key(i) == key:
+            if self.name(i) == name:
+                return i
+            i += 1
+        return None
+
+    def resolve(self, name):
+        """
+        Find the stored name equal to a name after normalization.
+        Args:
+            name (str): Food name as typed by the user.
+        Returns:
+            str or None: The stored name, or None if there is no match.
+        """
+        from ..core.food_index import normalize_name
+        if self.find(name) is not None:
+            return name
+        key = normalize_name(name).encode("utf-8")
+        i = self._lower_bound(key)
+        if i < self.count and self.key(i) == key:
+            return self.name(i)
+        return None
+
+    def get(self, name):
+        """
+        Get the nutrient entry for a food name.
+        Args:
+            name (str): Food name (normalized lookup).
+        Returns:
+            dict or None: Nutrients per 100g, or None if unknown.
+        """
+        key = self.resolve(name)
+        return self.foods[key] if key is not None else None
+
+    def prefix(self, prefix, limit=None):
+        """
+        List the foods whose normalized name starts with a prefix.
+        Args:
+            prefix (str): Name prefix (normalized before matching).
+            limit (int, optional): Maximum number of names.
+        Returns:
+            list: Stored names in key order.
+        """
+        from ..core.food_index import normalize_name
+        key = normalize_name(prefix).encode("utf-8")
+        result = []
+        i = self._lower_bound(key)
+        while i < self.count and self.key(i).startswith(key):
+            if limit is not None and len(result) >= limit:
+                break
+            result.append(self.name(i))
+            i += 1
+        return result
+
+    def search(self, query, limit=10):
+        """
+        Find food names containing the query, ranked like
+        FoodIndex.search() (exact, then prefix, then match position and
+        name length); ties go to key order instead of database order.
+        Args:
+            query (str): Substring to search for.
+            limit (int, optional): Maximum number of results.
+                None returns all matches. Defaults to 10.
+        Returns:
+            list: Matching food names (original keys).
+        """
+        from ..core.food_index import normalize_name
+        needle = normalize_name(query).encode("utf-8")
+        if not needle or SEPARATOR in needle:
+            return []
+        ranked = []
+        i, counted = 0, 0
+        pos = self._keys.find(needle)
+        while pos >= 0:
+            # Keys are newline-terminated in record order, so the
+            # record number is the count of separators before pos
+            i += self._keys[counted:pos].count(SEPARATOR)
+            counted = pos
+            key_off, key_len = self._record(i)[:2]
+            key = self._keys[key_off:key_off + key_len]
+            # Rank by character position, as FoodIndex does
+            chars = len(key[:pos - key_off].decode("utf-8"))
+            ranked.append((key != needle, chars,
+                           len(key.decode("utf-8")), i))
+            # Continue after this key: one hit per food
+            pos = self._keys.find(needle, key_off + key_len + 1)
+        if limit is None:
+            ranked = sorted(ranked)
+        else:
+            ranked = heapq.nsmallest(limit, ranked)
+        return [self.name(r[3]) for r in ranked]
+
+
+def open_compiled(stamp, root=COMPILED_FOOD_DIR):
+    """
+    Open the compiled store if it was built from the current database.
+    Args:
+        stamp (object): Current food_db_stamp() of the database.
+        root (str): Directory of the store.
+    Returns:
+        CompiledFoodStore or None: The store, or None if it is missing
+            or out of date.
+    """
+    if file_stamp(os.path.join(root, "meta.json")) is None:
+        return None
+    try:
+        store = CompiledFoodStore(root)
+    except (OSError, ValueError, KeyError):
+        return None
+    return store if store.stamp == stamp_value(stamp) else None
@@ -0,0 +1,201 @@
+import copy
+import json
+import os
+import threading
+from .. import metrics
+from ..file_utils import read_json, write_json
+from .day_cache import file_stamp
+from .ops import apply_op
+
+
+def journal_path(path):
+    """
+    Get the journal file path for a day file.
+    Args:
+        path (str): Path to the day file (e.g. logs/2025-07-24.json).
+    Returns:
+        str: Path to its journal (e.g. logs/2025-07-24.journal.jsonl).
+    """
+    base, _ = os.path.splitext(path)
+    return f"{base}.journal.jsonl"
+
+
+class _Snapshot:
+    def __init__(self, base_stamp, data):
+        self.base_stamp = base_stamp
+        self.data = data
+        self.offset = 0
+        self.seq = data.get("journal_seq", 0)
+
+
+_snapshots = {}
+_lock = threading.RLock()
+
+
+def _replay(snap, jpath):
+    """
+    Apply journal records past the snapshot's offset.
+    The records are applied to a copy that replaces snap.data only once
+    all of them succeeded, so readers never see a half-replayed day.
+    """
+    try:
+        f = open(jpath, "rb")
+    except FileNotFoundError:
+        return
+    metrics.inc("planner_json_reads_total")
+    data = copy.deepcopy(snap.data)
+    offset, seq = snap.offset, snap.seq
+    with f:
+        f.seek(offset)
+        for raw in f:
+            if not raw.endswith(b"\n"):
+                # Torn write from a crash; ignore the partial record.
+                break
+            offset += len(raw)
+            try:
+                rec = json.loads(raw)
+            except ValueError:
+                continue
+            if rec.get("seq", 0) <= seq:
+                continue
+            apply_op(data, rec)
+            seq = rec["seq"]
+    snap.data, snap.offset, snap.seq = data, offset, seq
+
+
+def load(path):
+    """
+    Materialize a day document from its base file plus journal.
+    A snapshot is cached per path; later calls only replay records
+    appended since the last call.
+    Args:
+        path (str): Path to the day file.
+    Returns:
+        dict: Current day document (the cached snapshot object).
+    Raises:
+        FileNotFoundError: If the base day file does not exist.
+    """
+    jpath = journal_path(path)
+    with _lock:
+        base_stamp = file_stamp(path)
+        snap = _snapshots.get(path)
+        jstamp = file_stamp(jpath)
+        jsize = jstamp[1] if jstamp else 0
+        if (snap is None or snap.base_stamp != base_stamp
+                or jsize < snap.offset):
+            snap = _Snapshot(base_stamp, read_json(path))
+            _snapshots[path] = snap
+        if jsize > snap.offset:
+            _replay(snap, jpath)
+        return snap.data
+
+
+def append(path, ops, applied=None):
+    """
+    Append mutation records to a day's journal and make the updated
+    document the cached snapshot.
+    The cached snapshot is never modified in place: readers may hold it
+    without a lock, and a failing op must not leave it half-updated.
+    Args:
+        path (str): Path to the day file.
+        ops (list): Mutation records.
+        applied (dict, optional): Copy of the current document that the
+            caller already applied the records to. Defaults to applying
+            them to a copy of the snapshot.
+    Returns:
+        dict: The updated document.
+    """
+    jpath = journal_path(path)
+    with _lock:
+        load(path)
+        snap = _snapshots[path]
+        if applied is None:
+            applied = copy.deepcopy(snap.data)
+            for op in ops:
+                apply_op(applied, op)
+        seq = snap.seq
+        lines = []
+        for op in ops:
+            seq += 1
+            lines.append(json.dumps(
+                dict(op, seq=seq), ensure_ascii=False,
+                separators=(",", ":")) + "\n")
+        payload = "".join(lines).encode("utf-8")
+        metrics.inc("planner_json_writes_total")
+        metrics.inc("planner_json_bytes_written_total", len(payload))
+        try:
+            with open(jpath, "ab") as f:
+                start = f.tell()
+                f.write(payload)
+        except BaseException:
+            _snapshots.pop(path, None)
+            raise
+        if start == snap.offset:
+            snap.data, snap.seq = applied, seq
+            snap.offset += len(payload)
+        else:
+            # Another writer appended in between; rebuild on next load.
+            _snapshots.pop(path, None)
+        return applied
+
+
+def invalidate(path):
+    """
+    Drop the cached snapshot of a day so the next load rebuilds it.
+    Args:
+        path (str): Path to the day file.
+    Returns:
+        None
+    """
+    with _lock:
+        _snapshots.pop(path, None)
+
+
+def compact(path):
+    """
+    Fold a day's journal back into its canonical JSON file.
+    The folded sequence number is stored in the document, so a crash
+    between writing the file and removing the journal cannot apply the
+    same records twice.
+    Args:
+        path (str): Path to the day file.
+    Returns:
+        int: Number of journal records folded.
+    """
+    jpath = journal_path(path)
+    with _lock:
+        if not os.path.exists(jpath):
+            return 0
+        # Shallow copy: readers may hold the snapshot itself
+        data = dict(load(path))
+        folded = data.get("journal_seq", 0)
+        data["journal_seq"] = _snapshots[path].seq
+        write_json(path, data)
+        os.remove(jpath)
+        _snapshots.pop(path, None)
+        return data["journal_seq"] - folded
+
+
+def replace(path, data):
+    """
+    Write a whole day document and discard its journal.
+    The current sequence number is carried over so records already
+    folded into the document are never replayed.
+    Args:
+        path (str): Path to the day file.
+        data (dict): New day document.
+    Returns:
+        None
+    """
+    jpath = journal_path(path)
+    with _lock:
+        seq = data.get("journal_seq", 0)
+        if os.path.exists(path):
+            load(path)
+            seq = max(seq, _snapshots[path].seq)
+        if seq:
+            data["journal_seq"] = seq
+        write_json(path, data)
+        if os.path.exists(jpath):
+            os.remove(jpath)
+        _snapshots.pop(path, None)
@@ -0,0 +1,149 @@
+import copy
+import os
+import re
+from ..file_utils import read_json, write_json
+from ..constants import DATA_DIR, FOOD_DB_FILE
+from . import journal
+from .base import Storage, VersionConflict
+from .day_cache import DayCache, file_stamp
+from .locks import file_lock
+from .ops import apply_ops
+
+DAY_FILE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}\.json$")
+
+
+class JsonStorage(Storage):
+    """
+    The original layout: one pretty-printed JSON file per day in
+    DATA_DIR and the food database in defaults/food_db.json.
+
+    With journal=True, mutations are appended to a per-day JSONL
+    journal instead of rewriting the day file (see storage.journal).
+
+    Every read-modify-write holds the file's lock (see storage.locks),
+    so the web app and CLI commands can write the same day at once.
+    """
+
+    def __init__(self, data_dir=DATA_DIR, food_db_file=FOOD_DB_FILE,
+                 journal=False, cache_size=64):
+        self.data_dir = data_dir
+        self.food_db_file = food_db_file
+        self.journal = journal
+        self.cache = DayCache(maxsize=cache_size, name="day")
+
+    def day_path(self, date_str):
+        """
+        Get the path of a day file.
+        Args:
+            date_str (str): Date in 'YYYY-MM-DD' format.
+        Returns:
+            str: Path to the JSON file for the date.
+        """
+        return os.path.join(self.data_dir, f"{date_str}.json")
+
+    def day_exists(self, date_str):
+        return os.path.exists(self.day_path(date_str))
+
+    def load_day(self, date_str):
+        path = self.day_path(date_str)
+        if self.journal:
+            return journal.load(path)
+        return self.cache.get(path)
+
+    def day_etag(self, date_str):
+        # The file stamps change on every write, so no read is needed.
+        path = self.day_path(date_str)
+        stamp = file_stamp(path)
+        if stamp is None:
+            raise FileNotFoundError(f"No planner for {date_str}")
+        tag = f"{stamp[0]:x}-{stamp[1]:x}"
+        if self.journal:
+            jstamp = file_stamp(journal.journal_path(path))
+            if jstamp is not None:
+                tag += f"-{jstamp[1]:x}"
+        return tag
+
+    def save_day(self, date_str, data):
+        path = self.day_path(date_str)
+        with file_lock(path):
+            self._write(path, data)
+
+    def create_day(self, date_str, data):
+        path = self.day_path(date_str)
+        with file_lock(path):
+            if os.path.exists(path):
+                return False
+            self._write(path, data)
+        return True
+
+    def _write(self, path, data):
+        if self.journal:
+            journal.replace(path, data)
+        else:
+            self.cache.put(path, data)
+
+    def apply(self, date_str, ops, data=None, expected_version=None):
+        path = self.day_path(date_str)
+        with file_lock(path):
+            # The caller's copy may predate a write made by another
+            # request or process, so check and apply against a fresh
+            # load. The cached document is shared with readers; work on
+            # a copy that replaces it only once every op succeeded.
+            current = self.load_day(date_str)
+            if (expected_version is not None
+                    and current.get("version", 0) != expected_version):
+                raise VersionConflict(current)
+            if not ops:
+                return current
+            updated = copy.deepcopy(current)
+            try:
+                apply_ops(updated, ops)
+                if self.journal:
+                    journal.append(path, ops, applied=updated)
+                else:
+                    self.cache.put(path, updated)
+            except BaseException:
+                if self.journal:
+                    journal.invalidate(path)
+                else:
+                    self.cache.invalidate(path)
+                raise
+        return updated
+
+    def compact(self, date_str):
+        """
+        Fold a day's journal into its JSON file.
+        Args:
+            date_str (str): Date in 'YYYY-MM-DD' format.
+        Returns:
+            int: Number of journal records folded.
+        """
+        path = self.day_path(date_str)
+        with file_lock(path):
+            return journal.compact(path)
+
+    def list_days(self):
+        try:
+            names = os.listdir(self.data_dir)
+        except FileNotFoundError:
+            return []
+        return sorted(n[:-5] for n in names if DAY_FILE_RE.match(n))
+
+    def load_food_db(self):
+        if not os.path.exists(self.food_db_file):
+            return {}
+        return read_json(self.food_db_file)
+
+    def food_db_stamp(self):
+        return file_stamp(self.food_db_file)
+
+    def add_food(self, name, info):
+        with file_lock(self.food_db_file):
+            return super().add_food(name, info)
+
+    def add_foods(self, foods):
+        with file_lock(self.food_db_file):
+            return super().add_foods(foods)
+
+    def save_food_db(self, food_db):
+        write_json(self.food_db_file, food_db)
@@ -0,0 +1,62 @@
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: threads are still serialized
+    fcntl = None
+
+# Lock files live in a hidden directory next to the files they guard
+LOCK_DIR = ".locks"
+
+_thread_locks = {}
+_guard = threading.Lock()
+
+
+def lock_path(path):
+    """
+    Get the lock file guarding a data file.
+    Args:
+        path (str): Path to the data file (e.g. logs/2025-07-24.json).
+    Returns:
+        str: Path to its lock file (e.g. logs/.locks/2025-07-24.json.lock).
+    """
+    head, tail = os.path.split(path)
+    return os.path.join(head, LOCK_DIR, f"{tail}.lock")
+
+
+def _thread_lock(path):
+    with _guard:
+        lock = _thread_locks.get(path)
+        if lock is None:
+            lock = _thread_locks[path] = threading.Lock()
+        return lock
+
+
+@contextmanager
+def file_lock(path):
+    """
+    Hold the exclusive lock of a data file for a read-modify-write.
+    Threads of this process queue on an in-memory lock; other processes
+    (the web app, CLI commands) are excluded with flock() on the lock
+    file, which the kernel releases even if the holder crashes. The
+    lock is not reentrant.
+    Args:
+        path (str): Path to the data file.
+    Yields:
+        None
+    """
+    with _thread_lock(path):
+        if fcntl is None:
+            yield
+            return
+        lpath = lock_path(path)
+        os.makedirs(os.path.dirname(lpath), exist_ok=True)
+        fd = os.open(lpath, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            # Closing the descriptor releases the flock.
+            os.close(fd)
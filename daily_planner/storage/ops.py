@@ -0,0 +1,199 @@
+NUTRIENTS = ("protein", "fat", "carbon")
+
+
+class OpError(ValueError):
+    """
+    A mutation record in a batch that could not be applied.
+    Attributes:
+        index (int): Position of the record in the batch.
+        error (Exception): The original error.
+    """
+
+    def __init__(self, index, error):
+        super().__init__(f"op {index}: {error!r}")
+        self.index = index
+        self.error = error
+
+
+def sum_food_totals(food):
+    """
+    Sum the macros of every logged food entry.
+    The sums are kept unrounded; displays round them when printing.
+    Args:
+        food (dict): The day's "food" mapping of meal to entries.
+    Returns:
+        dict: {"meals": {meal: {nutrient: grams}}, "day": {...}}.
+    """
+    meals = {}
+    day = dict.fromkeys(NUTRIENTS, 0.0)
+    for meal, items in food.items():
+        sums = dict.fromkeys(NUTRIENTS, 0.0)
+        for item in items:
+            if isinstance(item, dict):
+                for k in NUTRIENTS:
+                    sums[k] += item.get(k, 0.0)
+        meals[meal] = sums
+        for k in NUTRIENTS:
+            day[k] += sums[k]
+    return {"meals": meals, "day": day}
+
+
+def food_totals(data):
+    """
+    Get the running macro totals of a day without modifying it.
+    Days written before totals were tracked are summed on the fly.
+    Args:
+        data (dict): Day document.
+    Returns:
+        dict: {"meals": {meal: {nutrient: grams}}, "day": {...}}.
+    """
+    totals = data.get("food_totals")
+    if totals is None:
+        totals = sum_food_totals(data.get("food", {}))
+    return totals
+
+
+def _adjust_totals(data, meal, item, sign):
+    # Must run before the entry list changes, since a missing totals
+    # block is rebuilt from the current entries.
+    totals = data.get("food_totals")
+    if totals is None:
+        totals = data["food_totals"] = sum_food_totals(data.get("food", {}))
+    if not isinstance(item, dict):
+        return
+    meal_totals = totals["meals"].setdefault(
+        meal, dict.fromkeys(NUTRIENTS, 0.0))
+    for k in NUTRIENTS:
+        amount = sign * item.get(k, 0.0)
+        meal_totals[k] += amount
+        totals["day"][k] += amount
+
+
+def op_index(op):
+    """
+    Get the entry position named by an op, shared by both backends.
+    Args:
+        op (dict): Mutation record with an "index" key.
+    Returns:
+        int: The position.
+    Raises:
+        TypeError: If the index is not an integer.
+        IndexError: If the index is negative (Python would count it
+            from the end of the list).
+    """
+    index = op["index"]
+    if not isinstance(index, int) or isinstance(index, bool):
+        raise TypeError(f"index must be an integer, not {index!r}")
+    if index < 0:
+        raise IndexError("No such entry")
+    return index
+
+
+def op_amount(op):
+    """
+    Get the water amount of an add_water op, shared by both backends.
+    Args:
+        op (dict): Mutation record with an "amount" key.
+    Returns:
+        int: The amount.
+    Raises:
+        TypeError: If the amount is not an integer.
+    """
+    amount = op["amount"]
+    if not isinstance(amount, int) or isinstance(amount, bool):
+        raise TypeError(f"amount must be an integer, not {amount!r}")
+    return amount
+
+
+def _check(data, op):
+    data["done"][op["section"]][op_index(op)] = op["done"]
+
+
+def _check_goal(data, op):
+    data["goals"][op["section"]][op_index(op)]["done"] = op["done"]
+
+
+def _add_task(data, op):
+    data["tasks"][op["section"]].append(op["text"])
+    data["done"][op["section"]].append(False)
+
+
+def _add_goal(data, op):
+    goals = data.setdefault("goals", {}).setdefault(op["section"], [])
+    goals.append({"text": op["text"], "done": False})
+
+
+def _add_food(data, op):
+    items = data["food"][op["meal"]]
+    _adjust_totals(data, op["meal"], op["item"], 1)
+    items.append(op["item"])
+
+
+def _remove_food(data, op):
+    items = data["food"][op["meal"]]
+    index = op_index(op)
+    item = items[index]
+    _adjust_totals(data, op["meal"], item, -1)
+    del items[index]
+
+
+def _add_water(data, op):
+    data["water"] = data.get("water", 0) + op_amount(op)
+
+
+def _plan(data, op):
+    for h in range(op["start"], op["end"]):
+        data["plan"][f"{h:02}"] = op["task"]
+
+
+OPS = {
+    "check": _check,
+    "check_goal": _check_goal,
+    "add_task": _add_task,
+    "add_goal": _add_goal,
+    "add_food": _add_food,
+    "remove_food": _remove_food,
+    "add_water": _add_water,
+    "plan": _plan,
+}
+
+
+def apply_op(data, op):
+    """
+    Apply one mutation record to a day document in place.
+    Every applied record increments the document's "version" counter.
+    Args:
+        data (dict): Day document.
+        op (dict): Mutation record with an "op" key naming one of OPS.
+    Returns:
+        dict: The same document.
+    Raises:
+        ValueError: If the op type is unknown.
+    """
+    try:
+        handler = OPS[op["op"]]
+    except KeyError:
+        raise ValueError(f"Unknown op: {op.get('op')}")
+    handler(data, op)
+    data["version"] = data.get("version", 0) + 1
+    return data
+
+
+def apply_ops(data, ops):
+    """
+    Apply a batch of mutation records to a day document in place.
+    Args:
+        data (dict): Day document.
+        ops (list): Mutation records.
+    Returns:
+        dict: The same document.
+    Raises:
+        OpError: If a record cannot be applied; data may then hold the
+            records before it, so callers apply batches to a copy.
+    """
+    for i, op in enumerate(ops):
+        try:
+            apply_op(data, op)
+        except (KeyError, IndexError, TypeError, ValueError) as e:
+            raise OpError(i, e) from e
+    return data
@@ -0,0 +1,516 @@
+import json
+import sqlite3
+import threading
+from .base import Storage, VersionConflict
+from .ops import (
+    NUTRIENTS, OpError, apply_op, op_amount, op_index, sum_food_totals
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS days (
+    date TEXT PRIMARY KEY,
+    water INTEGER,
+    layout TEXT NOT NULL,
+    extra TEXT NOT NULL DEFAULT '{}'
+);
+CREATE TABLE IF NOT EXISTS sections (
+    date TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (date, kind, name)
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    date TEXT NOT NULL,
+    section TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    done INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (date, section, position)
+);
+CREATE TABLE IF NOT EXISTS plan (
+    date TEXT NOT NULL,
+    hour TEXT NOT NULL,
+    task TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (date, hour)
+);
+CREATE TABLE IF NOT EXISTS goals (
+    date TEXT NOT NULL,
+    section TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    done INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (date, section, position)
+);
+CREATE TABLE IF NOT EXISTS food_entries (
+    date TEXT NOT NULL,
+    meal TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    weight REAL,
+    protein REAL,
+    fat REAL,
+    carbon REAL,
+    extra TEXT NOT NULL DEFAULT '{}',
+    PRIMARY KEY (date, meal, position)
+);
+CREATE INDEX IF NOT EXISTS food_entries_name ON food_entries (name, date);
+CREATE TABLE IF NOT EXISTS foods (
+    name TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    protein REAL NOT NULL DEFAULT 0,
+    fat REAL NOT NULL DEFAULT 0,
+    carbon REAL NOT NULL DEFAULT 0,
+    extra TEXT NOT NULL DEFAULT '{}'
+);
+CREATE TABLE IF NOT EXISTS day_revs (
+    date TEXT PRIMARY KEY,
+    rev INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+DAY_KEYS = ("tasks", "done", "plan", "goals", "food", "water")
+FOOD_ITEM_KEYS = ("name", "weight", "protein", "fat", "carbon")
+
+
+def _dumps(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+class SqliteStorage(Storage):
+    """
+    SQLite backend (stdlib sqlite3, WAL mode).
+
+    Days are normalized into tasks, goals, plan and food_entries rows so
+    single-field updates touch one row and date ranges use the primary
+    key indexes. Unknown keys are kept in JSON 'extra' columns and the
+    top-level key order in 'layout', so documents round-trip unchanged.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.executescript(SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # Days
+
+    def day_exists(self, date_str):
+        row = self._conn().execute(
+            "SELECT 1 FROM days WHERE date = ?", (date_str,)).fetchone()
+        return row is not None
+
+    def load_day(self, date_str):
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT water, layout, extra FROM days WHERE date = ?",
+            (date_str,)).fetchone()
+        if row is None:
+            raise FileNotFoundError(f"No planner for {date_str}")
+        water, layout, extra = row
+        sections = {"tasks": [], "goals": [], "food": []}
+        for kind, name in conn.execute(
+                "SELECT kind, name FROM sections WHERE date = ? "
+                "ORDER BY kind, position", (date_str,)):
+            sections[kind].append(name)
+        tasks = {s: [] for s in sections["tasks"]}
+        done = {s: [] for s in sections["tasks"]}
+        for section, text, is_done in conn.execute(
+                "SELECT section, text, done FROM tasks WHERE date = ? "
+                "ORDER BY section, position", (date_str,)):
+            tasks[section].append(text)
+            done[section].append(bool(is_done))
+        plan = {hour: task for hour, task in conn.execute(
+            "SELECT hour, task FROM plan WHERE date = ? ORDER BY hour",
+            (date_str,))}
+        goals = {s: [] for s in sections["goals"]}
+        for section, text, is_done in conn.execute(
+                "SELECT section, text, done FROM goals WHERE date = ? "
+                "ORDER BY section, position", (date_str,)):
+            goals[section].append({"text": text, "done": bool(is_done)})
+        food = {m: [] for m in sections["food"]}
+        for meal, *values, item_extra in conn.execute(
+                "SELECT meal, name, weight, protein, fat, carbon, extra "
+                "FROM food_entries WHERE date = ? "
+                "ORDER BY meal, position", (date_str,)):
+            item = {k: v for k, v in zip(FOOD_ITEM_KEYS, values)
+                    if v is not None}
+            item.update(json.loads(item_extra))
+            food[meal].append(item)
+        parts = {
+            "tasks": tasks,
+            "done": done,
+            "plan": plan,
+            "goals": goals,
+            "food": food,
+            "water": water,
+        }
+        parts.update(json.loads(extra))
+        return {key: parts[key] for key in json.loads(layout)}
+
+    def day_etag(self, date_str):
+        # Every write bumps the day's revision, so no document is loaded.
+        row = self._conn().execute(
+            "SELECT COALESCE(r.rev, 0) FROM days d "
+            "LEFT JOIN day_revs r ON r.date = d.date WHERE d.date = ?",
+            (date_str,)).fetchone()
+        if row is None:
+            raise FileNotFoundError(f"No planner for {date_str}")
+        return f"r{row[0]:x}"
+
+    def save_day(self, date_str, data):
+        with self._conn() as conn:
+            self._write_day(conn, date_str, data)
+
+    def create_day(self, date_str, data):
+        with self._conn() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if conn.execute("SELECT 1 FROM days WHERE date = ?",
+                            (date_str,)).fetchone():
+                return False
+            self._write_day(conn, date_str, data)
+        return True
+
+    def _write_day(self, conn, date_str, data):
+        self._delete_day(conn, date_str)
+        self._bump_rev(conn, date_str)
+        extra = {k: v for k, v in data.items() if k not in DAY_KEYS}
+        conn.execute(
+            "INSERT INTO days (date, water, layout, extra) "
+            "VALUES (?, ?, ?, ?)",
+            (date_str, data.get("water"), _dumps(list(data)),
+             _dumps(extra)))
+        for kind in ("tasks", "goals", "food"):
+            conn.executemany(
+                "INSERT INTO sections (date, kind, name, position) "
+                "VALUES (?, ?, ?, ?)",
+                [(date_str, kind, name, i)
+                 for i, name in enumerate(data.get(kind, {}))])
+        done = data.get("done", {})
+        conn.executemany(
+            "INSERT INTO tasks (date, section, position, text, done) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [(date_str, s, i, text, int(done[s][i]))
+             for s, items in data.get("tasks", {}).items()
+             for i, text in enumerate(items)])
+        conn.executemany(
+            "INSERT INTO plan (date, hour, task) VALUES (?, ?, ?)",
+            [(date_str, hour, task)
+             for hour, task in data.get("plan", {}).items()])
+        conn.executemany(
+            "INSERT INTO goals (date, section, position, text, done) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [(date_str, s, i, g["text"], int(g["done"]))
+             for s, items in data.get("goals", {}).items()
+             for i, g in enumerate(items)])
+        for meal, items in data.get("food", {}).items():
+            for i, item in enumerate(items):
+                self._insert_food_entry(conn, date_str, meal, i, item)
+
+    def _delete_day(self, conn, date_str):
+        for table in ("days", "sections", "tasks", "plan", "goals",
+                      "food_entries"):
+            conn.execute(f"DELETE FROM {table} WHERE date = ?", (date_str,))
+
+    def _insert_food_entry(self, conn, date_str, meal, position, item):
+        if isinstance(item, str):
+            item = {"name": item}
+        extra = {k: v for k, v in item.items() if k not in FOOD_ITEM_KEYS}
+        conn.execute(
+            "INSERT INTO food_entries (date, meal, position, name, weight, "
+            "protein, fat, carbon, extra) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (date_str, meal, position,
+             *(item.get(k) for k in FOOD_ITEM_KEYS), _dumps(extra)))
+
+    def _bump_rev(self, conn, date_str):
+        # Kept out of _delete_day so a rewritten day never reuses a tag.
+        conn.execute(
+            "INSERT INTO day_revs (date, rev) VALUES (?, 1) "
+            "ON CONFLICT(date) DO UPDATE SET rev = rev + 1", (date_str,))
+
+    def _ensure_section(self, conn, date_str, kind, name):
+        conn.execute(
+            "INSERT OR IGNORE INTO sections (date, kind, name, position) "
+            "SELECT ?, ?, ?, COALESCE(MAX(position) + 1, 0) FROM sections "
+            "WHERE date = ? AND kind = ?",
+            (date_str, kind, name, date_str, kind))
+
+    def _ensure_key(self, conn, date_str, key):
+        layout = json.loads(conn.execute(
+            "SELECT layout FROM days WHERE date = ?",
+            (date_str,)).fetchone()[0])
+        if key not in layout:
+            conn.execute(
+                "UPDATE days SET layout = ? WHERE date = ?",
+                (_dumps(layout + [key]), date_str))
+
+    def _bump_version(self, conn, date_str):
+        self._ensure_key(conn, date_str, "version")
+        conn.execute(
+            "UPDATE days SET extra = json_set(extra, '$.version', "
+            "COALESCE(json_extract(extra, '$.version'), 0) + 1) "
+            "WHERE date = ?", (date_str,))
+
+    def _require_section(self, conn, date_str, kind, name):
+        row = conn.execute(
+            "SELECT 1 FROM sections WHERE date = ? AND kind = ? "
+            "AND name = ?", (date_str, kind, name)).fetchone()
+        if row is None:
+            raise KeyError(name)
+
+    def _next_position(self, conn, table, column, date_str, name):
+        return conn.execute(
+            f"SELECT COUNT(*) FROM {table} WHERE date = ? AND {column} = ?",
+            (date_str, name)).fetchone()[0]
+
+    def _update_one(self, conn, sql, params):
+        if conn.execute(sql, params).rowcount != 1:
+            raise IndexError("No such entry")
+
+    def _sql_check(self, conn, date_str, op):
+        self._update_one(
+            conn, "UPDATE tasks SET done = ? WHERE date = ? AND section = ? "
+            "AND position = ?",
+            (int(op["done"]), date_str, op["section"], op_index(op)))
+
+    def _sql_check_goal(self, conn, date_str, op):
+        self._update_one(
+            conn, "UPDATE goals SET done = ? WHERE date = ? AND section = ? "
+            "AND position = ?",
+            (int(op["done"]), date_str, op["section"], op_index(op)))
+
+    def _sql_add_task(self, conn, date_str, op):
+        self._require_section(conn, date_str, "tasks", op["section"])
+        pos = self._next_position(
+            conn, "tasks", "section", date_str, op["section"])
+        conn.execute(
+            "INSERT INTO tasks (date, section, position, text, done) "
+            "VALUES (?, ?, ?, ?, 0)",
+            (date_str, op["section"], pos, op["text"]))
+
+    def _sql_add_goal(self, conn, date_str, op):
+        self._ensure_key(conn, date_str, "goals")
+        self._ensure_section(conn, date_str, "goals", op["section"])
+        pos = self._next_position(
+            conn, "goals", "section", date_str, op["section"])
+        conn.execute(
+            "INSERT INTO goals (date, section, position, text, done) "
+            "VALUES (?, ?, ?, ?, 0)",
+            (date_str, op["section"], pos, op["text"]))
+
+    def _adjust_totals(self, conn, date_str, meal, item, sign):
+        # Same bookkeeping as ops._adjust_totals, done with json_set on
+        # the stored totals; called before the entry rows change.
+        row = conn.execute(
+            "SELECT json_extract(extra, '$.food_totals') IS NULL "
+            "FROM days WHERE date = ?", (date_str,)).fetchone()
+        if row[0]:
+            food = {meal: [] for (meal,) in conn.execute(
+                "SELECT name FROM sections WHERE date = ? AND kind = 'food' "
+                "ORDER BY position", (date_str,))}
+            for m, *values in conn.execute(
+                    "SELECT meal, protein, fat, carbon FROM food_entries "
+                    "WHERE date = ? ORDER BY meal, position", (date_str,)):
+                food[m].append({k: v or 0.0
+                                for k, v in zip(NUTRIENTS, values)})
+            self._ensure_key(conn, date_str, "food_totals")
+            conn.execute(
+                "UPDATE days SET extra = json_set(extra, '$.food_totals', "
+                "json(?)) WHERE date = ?",
+                (_dumps(sum_food_totals(food)), date_str))
+        if not isinstance(item, dict):
+            return
+        meal_path = "$.food_totals.meals." + json.dumps(meal)
+        conn.execute(
+            "UPDATE days SET extra = json_set(extra, ?, json(?)) "
+            "WHERE date = ? AND json_extract(extra, ?) IS NULL",
+            (meal_path, _dumps(dict.fromkeys(NUTRIENTS, 0.0)), date_str,
+             meal_path))
+        for k in NUTRIENTS:
+            amount = sign * item.get(k, 0.0)
+            for path in (f"{meal_path}.{k}", f"$.food_totals.day.{k}"):
+                conn.execute(
+                    "UPDATE days SET extra = json_set(extra, ?, "
+                    "json_extract(extra, ?) + ?) WHERE date = ?",
+                    (path, path, amount, date_str))
+
+    def _sql_add_food(self, conn, date_str, op):
+        self._require_section(conn, date_str, "food", op["meal"])
+        pos = self._next_position(
+            conn, "food_entries", "meal", date_str, op["meal"])
+        item = op["item"]
+        self._adjust_totals(conn, date_str, op["meal"], item, 1)
+        self._insert_food_entry(conn, date_str, op["meal"], pos, item)
+
+    def _sql_remove_food(self, conn, date_str, op):
+        index = op_index(op)
+        row = conn.execute(
+            "SELECT name, weight, protein, fat, carbon, extra "
+            "FROM food_entries WHERE date = ? AND meal = ? "
+            "AND position = ?",
+            (date_str, op["meal"], index)).fetchone()
+        if row is None:
+            raise IndexError("No such entry")
+        item = {k: v for k, v in zip(FOOD_ITEM_KEYS, row) if v is not None}
+        self._adjust_totals(conn, date_str, op["meal"], item, -1)
+        conn.execute(
+            "DELETE FROM food_entries WHERE date = ? AND meal = ? "
+            "AND position = ?", (date_str, op["meal"], index))
+        # Close the gap in two steps so no intermediate row collides
+        # with the primary key.
+        conn.execute(
+            "UPDATE food_entries SET position = -position "
+            "WHERE date = ? AND meal = ? AND position > ?",
+            (date_str, op["meal"], index))
+        conn.execute(
+            "UPDATE food_entries SET position = -position - 1 "
+            "WHERE date = ? AND meal = ? AND position < 0",
+            (date_str, op["meal"]))
+
+    def _sql_add_water(self, conn, date_str, op):
+        self._ensure_key(conn, date_str, "water")
+        self._update_one(
+            conn, "UPDATE days SET water = COALESCE(water, 0) + ? "
+            "WHERE date = ?", (op_amount(op), date_str))
+
+    def _sql_plan(self, conn, date_str, op):
+        conn.executemany(
+            "INSERT OR REPLACE INTO plan (date, hour, task) VALUES (?, ?, ?)",
+            [(date_str, f"{h:02}", op["task"])
+             for h in range(op["start"], op["end"])])
+
+    def apply(self, date_str, ops, data=None, expected_version=None):
+        with self._conn() as conn:
+            # Take the write lock up front so the version check and a
+            # fallback rewrite below cannot be based on a read another
+            # writer has superseded.
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT COALESCE(json_extract(extra, '$.version'), 0) "
+                "FROM days WHERE date = ?", (date_str,)).fetchone()
+            if row is None:
+                raise FileNotFoundError(f"No planner for {date_str}")
+            if expected_version is not None and row[0] != expected_version:
+                raise VersionConflict(self.load_day(date_str))
+            fallback = None
+            for i, op in enumerate(ops):
+                try:
+                    handler = getattr(self, f"_sql_{op['op']}", None)
+                    if handler is not None and fallback is None:
+                        handler(conn, date_str, op)
+                        self._bump_version(conn, date_str)
+                        continue
+                    # No targeted statement for this op: finish the
+                    # batch by rewriting the materialized day.
+                    if fallback is None:
+                        fallback = self.load_day(date_str)
+                    apply_op(fallback, op)
+                except (KeyError, IndexError, TypeError, ValueError) as e:
+                    raise OpError(i, e) from e
+            if fallback is not None:
+                self._write_day(conn, date_str, fallback)
+            elif ops:
+                self._bump_rev(conn, date_str)
+            # Read back inside the transaction: the caller's copy may
+            # predate another writer's commit.
+            return self.load_day(date_str)
+
+    def list_days(self):
+        return [row[0] for row in self._conn().execute(
+            "SELECT date FROM days ORDER BY date")]
+
+    def iter_days(self, start=None, end=None):
+        dates = [row[0] for row in self._conn().execute(
+            "SELECT date FROM days WHERE date >= ? AND date <= ? "
+            "ORDER BY date", (start or "", end or "9999-99-99"))]
+        for date_str in dates:
+            yield date_str, self.load_day(date_str)
+
+    # Food database
+
+    def _bump_food_version(self, conn):
+        conn.execute(
+            "INSERT INTO meta (key, value) VALUES ('foods_version', 1) "
+            "ON CONFLICT(key) DO UPDATE SET value = value + 1")
+
+    def _food_row(self, row):
+        protein, fat, carbon, extra = row
+        info = {"protein": protein, "fat": fat, "carbon": carbon}
+        info.update(json.loads(extra))
+        return info
+
+    def load_food_db(self):
+        rows = self._conn().execute(
+            "SELECT name, protein, fat, carbon, extra FROM foods "
+            "ORDER BY position")
+        return {row[0]: self._food_row(row[1:]) for row in rows}
+
+    def food_db_stamp(self):
+        row = self._conn().execute(
+            "SELECT value FROM meta WHERE key = 'foods_version'").fetchone()
+        return row[0] if row else 0
+
+    def get_food(self, name):
+        row = self._conn().execute(
+            "SELECT protein, fat, carbon, extra FROM foods WHERE name = ?",
+            (name,)).fetchone()
+        return self._food_row(row) if row else None
+
+    def _food_values(self, name, position, info):
+        extra = {k: v for k, v in info.items() if k not in NUTRIENTS}
+        return (name, position, *(info.get(k, 0) for k in NUTRIENTS),
+                _dumps(extra))
+
+    def add_food(self, name, info):
+        with self._conn() as conn:
+            pos = conn.execute(
+                "SELECT COALESCE(MAX(position) + 1, 0) FROM foods"
+            ).fetchone()[0]
+            cur = conn.execute(
+                "INSERT OR IGNORE INTO foods (name, position, protein, fat, "
+                "carbon, extra) VALUES (?, ?, ?, ?, ?, ?)",
+                self._food_values(name, pos, info))
+            if cur.rowcount != 1:
+                return False
+            self._bump_food_version(conn)
+            return True
+
+    def add_foods(self, foods):
+        with self._conn() as conn:
+            pos = conn.execute(
+                "SELECT COALESCE(MAX(position) + 1, 0) FROM foods"
+            ).fetchone()[0]
+            before = conn.total_changes
+            # executemany consumes the generator row by row
+            conn.executemany(
+                "INSERT OR IGNORE INTO foods (name, position, protein, fat, "
+                "carbon, extra) VALUES (?, ?, ?, ?, ?, ?)",
+                (self._food_values(name, pos + i, info)
+                 for i, (name, info) in enumerate(foods)))
+            added = conn.total_changes - before
+            if added:
+                self._bump_food_version(conn)
+            return added
+
+    def save_food_db(self, food_db):
+        with self._conn() as conn:
+            conn.execute("DELETE FROM foods")
+            conn.executemany(
+                "INSERT INTO foods (name, position, protein, fat, carbon, "
+                "extra) VALUES (?, ?, ?, ?, ?, ?)",
+                [self._food_values(name, i, info)
+                 for i, (name, info) in enumerate(food_db.items())])
+            self._bump_food_version(conn)
@@ -1,3 +1,11 @@
+import sys
+
+# Must run before the planner modules are imported to time them all
+if "--startup-profile" in sys.argv:
+    sys.argv.remove("--startup-profile")
+    from daily_planner.startup_profile import enable
+    enable()
+
 from daily_planner.cli import main
 
 if __name__ == "__main__":
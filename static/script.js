@@ -15,6 +15,11 @@ document.addEventListener("DOMContentLoaded", function () {
     return date.toISOString().split("T")[0];
   }
 
+  // Totals are stored unrounded; show one decimal like the CLI.
+  function grams(value) {
+    return Math.round(value * 10) / 10;
+  }
+
   function showModal(html) {
     modal.innerHTML = html;
     modal.style.display = "block";
@@ -61,6 +66,7 @@ document.addEventListener("DOMContentLoaded", function () {
       plannerContainer.textContent = "No data available.";
       return;
     }
+    watchDay(currentDate);
     const morningKey = getSectionName(data, "morning");
     if (data.tasks && data.tasks[morningKey]) {
       renderRoutineSection(
@@ -101,10 +107,12 @@ document.addEventListener("DOMContentLoaded", function () {
     if (data.food) {
       ["breakfast", "lunch", "dinner"].forEach((meal) => {
         if (data.food[meal]) {
-          renderFoodSection(meal, data.food[meal]);
+          const totals = data.food_totals && data.food_totals.meals[meal];
+          renderFoodSection(meal, data.food[meal], totals);
         }
       });
     }
+    loadSummary(currentDate);
   }
 
   function renderRoutineSection(
@@ -178,16 +186,70 @@ document.addEventListener("DOMContentLoaded", function () {
     plannerContainer.appendChild(box);
   }
 
-  function renderFoodSection(meal, foods) {
+  function renderFoodSection(meal, foods, totals) {
     const box = document.createElement("div");
     box.className = "box";
     const title = document.createElement("div");
     title.className = "section-title";
     title.textContent = `[Food] ${meal}`;
     box.appendChild(title);
-    (foods || []).forEach((food) => {
+    (foods || []).forEach((food, idx) => {
       const line = document.createElement("div");
-      line.textContent = `${food.name || food} (${food.weight || ""}g)`;
+      line.textContent = `${food.name || food} (${food.weight || ""}g) `;
+      const remove = document.createElement("button");
+      remove.textContent = "×";
+      remove.onclick = () => removeFood(meal, idx);
+      line.appendChild(remove);
+      box.appendChild(line);
+    });
+    if (totals && foods && foods.length) {
+      const sum = document.createElement("div");
+      sum.textContent =
+        `P ${grams(totals.protein)}g | F ${grams(totals.fat)}g | ` +
+        `C ${grams(totals.carbon)}g`;
+      box.appendChild(sum);
+    }
+    plannerContainer.appendChild(box);
+  }
+
+  function removeFood(meal, index) {
+    const date = currentDate || formatDate(new Date());
+    fetch("/remove_food", {
+      method: "POST",
+      headers: { "Content-Type": "application/x-www-form-urlencoded" },
+      body: `date=${encodeURIComponent(date)}&meal=${encodeURIComponent(
+        meal
+      )}&index=${index}`,
+    }).then(() => loadToday());
+  }
+
+  // Totals, targets and percentages come precomputed from the server.
+  function loadSummary(date) {
+    const url = date ? `/day_summary?date=${date}` : "/day_summary";
+    fetch(url)
+      .then((res) => res.json())
+      .then((summary) => {
+        if (!summary.error) renderProgressSection(summary);
+      });
+  }
+
+  function renderProgressSection(summary) {
+    const old = document.getElementById("progressBox");
+    if (old) old.remove();
+    const box = document.createElement("div");
+    box.className = "box";
+    box.id = "progressBox";
+    const title = document.createElement("div");
+    title.className = "section-title";
+    title.textContent = "[Progress]";
+    box.appendChild(title);
+    ["protein", "fat", "carbon", "water"].forEach((key) => {
+      const unit = key === "water" ? "ml" : "g";
+      const line = document.createElement("div");
+      line.textContent =
+        `${key}: ${grams(summary.totals[key])}/${summary.targets[key]}` +
+        `${unit} ` +
+        `(${summary.progress[key]}%)`;
       box.appendChild(line);
     });
     plannerContainer.appendChild(box);
@@ -204,25 +266,90 @@ document.addEventListener("DOMContentLoaded", function () {
     plannerContainer.appendChild(box);
   }
 
-  function updateTask(section, index, done) {
+  // Checkbox edits are queued briefly and sent together to /batch,
+  // so fast clicking costs one request and one write.
+  let pendingOps = [];
+  let pendingDate = null;
+  let flushTimer = null;
+  // Days are served with no-cache and an ETag, so the browser
+  // revalidates each load and gets a cheap 304 when nothing changed.
+  function fetchDay(date) {
+    return fetch(`/get_day?date=${date}`);
+  }
+
+  function queueOp(op) {
     const date = currentDate || formatDate(new Date());
-    fetch("/update_task", {
+    if (pendingDate !== null && pendingDate !== date) flushOps();
+    pendingDate = date;
+    pendingOps.push(op);
+    clearTimeout(flushTimer);
+    flushTimer = setTimeout(flushOps, 150);
+  }
+
+  function flushOps() {
+    clearTimeout(flushTimer);
+    if (pendingOps.length === 0) return;
+    const body = JSON.stringify({ date: pendingDate, ops: pendingOps });
+    pendingOps = [];
+    pendingDate = null;
+    fetch("/batch", {
       method: "POST",
-      headers: { "Content-Type": "application/x-www-form-urlencoded" },
-      body: `part=${encodeURIComponent(
-        section
-      )}&index=${index}&done=${done}&date=${date}`,
-    }).then(() => loadToday());
+      headers: { "Content-Type": "application/json" },
+      body: body,
+    })
+      .then((res) => res.json())
+      .then((result) => {
+        if (result.success && pendingOps.length === 0) {
+          renderPlanner(result.data);
+        } else if (!result.success) {
+          loadToday();
+        }
+      })
+      .catch(() => loadToday());
+  }
+
+  // The server pushes per-field changes to the shown day over /events,
+  // so edits from the CLI or other tabs show up without refetching.
+  let feed = null;
+  let feedDate;
+
+  function watchDay(date) {
+    if (!window.EventSource || date === feedDate) return;
+    if (feed) feed.close();
+    feedDate = date;
+    feed = new EventSource(date ? `/events?date=${date}` : "/events");
+    feed.onmessage = function (e) {
+      applyNotice(JSON.parse(e.data));
+    };
+  }
+
+  function applyNotice(notice) {
+    if (notice.reset || !lastData) {
+      loadToday();
+      return;
+    }
+    if (notice.version < (lastData.version || 0)) return;
+    notice.changes.forEach((change) => {
+      let target = lastData;
+      const path = change.path;
+      for (let i = 0; i < path.length - 1; i++) {
+        if (target[path[i]] === undefined) target[path[i]] = {};
+        target = target[path[i]];
+      }
+      const key = path[path.length - 1];
+      if (change.deleted) delete target[key];
+      else target[key] = change.value;
+    });
+    lastData.version = notice.version;
+    // Queued checkbox edits are already shown; /batch re-renders later.
+    if (pendingOps.length === 0) renderPlanner(lastData);
+  }
+
+  function updateTask(section, index, done) {
+    queueOp({ op: "check", section: section, index: index, done: done });
   }
   function updateGoal(section, index, done) {
-    const date = currentDate || formatDate(new Date());
-    fetch("/update_goal", {
-      method: "POST",
-      headers: { "Content-Type": "application/x-www-form-urlencoded" },
-      body: `section=${encodeURIComponent(
-        section
-      )}&index=${index}&done=${done}&date=${date}`,
-    }).then(() => loadToday());
+    queueOp({ op: "check_goal", section: section, index: index, done: done });
   }
   function addTaskModal() {
     // Use dropdown for section
@@ -380,10 +507,16 @@ document.addEventListener("DOMContentLoaded", function () {
         )}&name=${encodeURIComponent(
           form.name.value
         )}&weight=${encodeURIComponent(form.weight.value)}`,
-      }).then(() => {
-        closeModal();
-        loadToday();
-      });
+      })
+        .then((res) => res.json())
+        .then((result) => {
+          if (!result.success) {
+            alert(result.error || "Failed to add food.");
+            return;
+          }
+          closeModal();
+          loadToday();
+        });
     };
   }
 
@@ -462,7 +595,7 @@ document.addEventListener("DOMContentLoaded", function () {
       const date = datePicker.value;
       if (date) {
         currentDate = date;
-        fetch(`/get_day?date=${date}`)
+        fetchDay(date)
           .then((res) => res.json())
           .then((data) => {
             renderPlanner(data);
@@ -484,7 +617,7 @@ document.addEventListener("DOMContentLoaded", function () {
 
   function loadToday() {
     if (currentDate) {
-      fetch(`/get_day?date=${currentDate}`)
+      fetchDay(currentDate)
         .then((res) => res.json())
         .then((data) => {
           renderPlanner(data);
@@ -0,0 +1,81 @@
+import json
+import os
+import subprocess
+
+import pytest
+
+from daily_planner.core.archive import archive_days
+
+
+def git(*args, cwd=None):
+    return subprocess.run(["git", *args], cwd=cwd, check=True,
+                          capture_output=True, text=True).stdout.strip()
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    """A git work tree with two day files and an empty bare remote."""
+    for key, value in (("NAME", "Planner Test"),
+                       ("EMAIL", "planner@example.com")):
+        monkeypatch.setenv(f"GIT_AUTHOR_{key}", value)
+        monkeypatch.setenv(f"GIT_COMMITTER_{key}", value)
+    remote = tmp_path / "remote.git"
+    git("init", "-q", "--bare", str(remote))
+    work = tmp_path / "work"
+    (work / "logs").mkdir(parents=True)
+    git("init", "-q", cwd=work)
+    for date_str in ("2025-07-23", "2025-07-24"):
+        with open(work / "logs" / f"{date_str}.json", "w") as f:
+            json.dump({"water": 0}, f)
+    monkeypatch.chdir(work)
+    return {"remote": str(remote), "work": work,
+            "kwargs": {"data_dir": "logs",
+                       "record_file": os.path.join("logs", ".archived.json"),
+                       "pending_file": os.path.join("logs", ".pending.json")}}
+
+
+def remote_files(remote, branch="main"):
+    return git("ls-tree", "-r", "--name-only", branch, cwd=remote).split()
+
+
+def test_archive_pushes_one_commit_to_bare_remote(workspace):
+    count = archive_days(remote=workspace["remote"], **workspace["kwargs"])
+    assert count == 2
+    assert remote_files(workspace["remote"]) == [
+        "logs/2025-07-23.json", "logs/2025-07-24.json"]
+    assert git("rev-list", "--count", "main", cwd=workspace["remote"]) == "1"
+    # Unchanged days are not archived again
+    assert archive_days(remote=workspace["remote"],
+                        **workspace["kwargs"]) == 0
+
+
+def test_archive_pushes_from_detached_head(workspace):
+    archive_days("2025-07-23", "2025-07-23", push=False,
+                 **workspace["kwargs"])
+    git("checkout", "-q", "--detach")
+    archive_days(remote=workspace["remote"], **workspace["kwargs"])
+    assert remote_files(workspace["remote"]) == [
+        "logs/2025-07-23.json", "logs/2025-07-24.json"]
+
+
+def test_failed_push_is_retried(workspace, tmp_path):
+    missing = str(tmp_path / "later.git")
+    kwargs = workspace["kwargs"]
+    assert archive_days(remote=missing, **kwargs) == 2
+    assert os.path.exists(kwargs["pending_file"])
+    git("init", "-q", "--bare", missing)
+    # Nothing new to commit, but the earlier commit is pushed now
+    assert archive_days(remote=missing, **kwargs) == 0
+    assert not os.path.exists(kwargs["pending_file"])
+    assert remote_files(missing) == [
+        "logs/2025-07-23.json", "logs/2025-07-24.json"]
+
+
+def test_failed_commit_unstages_files(workspace):
+    hook = workspace["work"] / ".git" / "hooks" / "pre-commit"
+    hook.write_text("#!/bin/sh\nexit 1\n")
+    hook.chmod(0o755)
+    assert archive_days(remote=workspace["remote"],
+                        **workspace["kwargs"]) == 0
+    assert git("diff", "--cached", "--name-only") == ""
+    assert not os.path.exists(workspace["kwargs"]["record_file"])